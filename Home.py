@@ -1,6 +1,4 @@
 import streamlit as st
-from datetime import datetime, timedelta
-from collections import Counter
 import pandas as pd
 
 from sidebar import (
@@ -9,19 +7,23 @@ from sidebar import (
     hide_admin_page_for_non_admin,
     get_current_user,
     is_admin,
+    sign_out,
 )
 
-from db import init_db, list_tickets
+from db import init_db, get_dashboard_stats
+import profiler
 
 # -------------------------------------------------
 # Page + DB init
 # -------------------------------------------------
 st.set_page_config(page_title="TicketApp - Home", page_icon="🎫", layout="wide")
 init_db()
+profiler.start("Home", st.session_state)
 
 # -------------------------------------------------
 # Auth gate
 # -------------------------------------------------
+profiler.phase("auth")
 require_login()
 hide_login_link_if_logged_in()
 hide_admin_page_for_non_admin()
@@ -33,55 +35,24 @@ admin = is_admin()
 with st.sidebar:
     st.success("Use the sidebar to switch pages.")
     if user and st.button("Logout", use_container_width=True):
-        st.session_state.user = None
+        sign_out()
         st.rerun()
 
 # -------------------------------------------------
-# Load ticket data
+# Load dashboard data (aggregated in SQL)
 # -------------------------------------------------
-rows = list_tickets(statuses=None, search="")
-tickets = list(rows)
-
-def parse_created_at(value):
-    if not value:
-        return None
-    try:
-        return datetime.fromisoformat(value)
-    except Exception:
-        return None
-
-now = datetime.utcnow()
-week_ago = now - timedelta(days=7)
-
-total_tickets = len(tickets)
-
-OPEN_STATUSES = {
-    "New",
-    "Open",
-    "In Progress",
-    "Test: Sprint Test",
-    "Test: Build Ready",
-    "Test: Regression",
-    "Product Backlog - Pending (B)",
-}
-
-open_tickets = [t for t in tickets if t["status"] in OPEN_STATUSES]
-new_this_week = [
-    t for t in tickets
-    if (dt := parse_created_at(t["created_at"])) is not None and dt >= week_ago
-]
-
-assigned_to_me = [
-    t for t in tickets
-    if (t["assigned_to"] or "").lower() == username.lower()
-]
-
-status_counts = Counter(t["status"] for t in tickets)
-unassigned_tickets = [t for t in tickets if not t["assigned_to"]]
+profiler.phase("db")
+stats = get_dashboard_stats(username)
+
+total_tickets = stats["total"]
+status_counts = stats["status_counts"]
+unassigned_tickets = stats["unassigned_top"]
+assigned_to_me = stats["assigned_to_me_top"]
 
 # -------------------------------------------------
 # UI
 # -------------------------------------------------
+profiler.phase("render")
 st.title("🏠 TicketApp Home")
 st.caption(f"Signed in as **{username}**")
 st.markdown("---")
@@ -92,11 +63,11 @@ with st.container(border=True):
     with c1:
         st.metric("Total tickets", total_tickets)
     with c2:
-        st.metric("Open tickets", len(open_tickets))
+        st.metric("Open tickets", stats["open"])
     with c3:
-        st.metric("New in last 7 days", len(new_this_week))
+        st.metric("New in last 7 days", stats["new_this_week"])
     with c4:
-        st.metric("Assigned to you", len(assigned_to_me))
+        st.metric("Assigned to you", stats["assigned_to_me"])
 
 st.markdown("")
 
@@ -123,19 +94,17 @@ if admin:
                 with c1:
                     st.metric("Total tickets (system)", total_tickets)
                 with c2:
-                    st.metric("Open / In Progress", len(open_tickets))
+                    st.metric("Open / In Progress", stats["open"])
                 with c3:
-                    st.metric("Unassigned tickets", len(unassigned_tickets))
+                    st.metric("Unassigned tickets", stats["unassigned"])
 
         # 2️⃣ In Progress tickets per user
         with row1_col2:
             with st.container(border=True):
                 st.markdown("#### In Progress tickets per user")
 
-                in_progress = [t for t in tickets if t["status"] == "In Progress"]
-                if in_progress:
-                    from collections import Counter
-                    counts = Counter((t["assigned_to"] or "Unassigned") for t in in_progress)
+                counts = stats["in_progress_by_user"]
+                if counts:
                     df_inprog = (
                         pd.DataFrame(
                             [{"user": u, "in_progress": c} for u, c in counts.items()]
@@ -155,7 +124,7 @@ if admin:
         with row2_col1:
             with st.container(border=True):
                 st.markdown("#### Tickets by status")
-                if tickets and status_counts:
+                if status_counts:
                     df_status = (
                         pd.DataFrame(
                             [{"status": s, "count": c} for s, c in status_counts.items()]
@@ -174,7 +143,7 @@ if admin:
                 if not unassigned_tickets:
                     st.info("All tickets are assigned. ✅")
                 else:
-                    for t in unassigned_tickets[:10]:
+                    for t in unassigned_tickets:
                         tid = t["ticket_id"]
                         subject = t["subject"]
                         status = t["status"]
@@ -213,6 +182,11 @@ else:
             if not assigned_to_me:
                 st.info("You currently have no tickets assigned.")
             else:
+                if stats["assigned_to_me"] > len(assigned_to_me):
+                    st.caption(
+                        f"Showing the newest {len(assigned_to_me)} of "
+                        f"{stats['assigned_to_me']} tickets."
+                    )
                 for t in assigned_to_me:
                     tid = t["ticket_id"]
                     subject = t["subject"]
@@ -237,4 +211,6 @@ else:
                     st.markdown(
                         "<hr style='margin: 0.4rem 0;'>",
                         unsafe_allow_html=True,
-                    )
\ No newline at end of file
+                    )
+
+profiler.finish()
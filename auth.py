@@ -1,37 +1,255 @@
+import hashlib
+import os
+import secrets
 import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
 import bcrypt
 
+from cache import cached_object, object_cache, read_cache
+from connection import connect
+
 DB_PATH = "ticketapp.db"
 
-def get_user(username: str):
-    con = sqlite3.connect(DB_PATH)
-    con.row_factory = sqlite3.Row
-    cur = con.cursor()
-    cur.execute("SELECT * FROM users WHERE username = ?", (username,))
-    row = cur.fetchone()
-    con.close()
+# =========================================================
+# PASSWORD HASHING
+# =========================================================
+# bcrypt is deliberately slow, so it runs on a small worker pool instead of
+# the Streamlit script thread. The pool is bounded both in threads and in
+# how many requests may wait for one; past that, logins fail fast with
+# HashingBusyError rather than piling up behind each other.
+BCRYPT_ROUNDS = int(os.environ.get("TICKETAPP_BCRYPT_ROUNDS", "12"))
+HASH_WORKERS = int(os.environ.get("TICKETAPP_HASH_WORKERS", str(os.cpu_count() or 2)))
+HASH_QUEUE_LIMIT = int(os.environ.get("TICKETAPP_HASH_QUEUE_LIMIT", "32"))
+HASH_TIMEOUT = float(os.environ.get("TICKETAPP_HASH_TIMEOUT", "30"))
+
+_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="bcrypt")
+_slots = threading.BoundedSemaphore(HASH_QUEUE_LIMIT)
+
+
+class HashingBusyError(RuntimeError):
+    """Too many password checks are already queued; try again shortly."""
+
+
+def _submit(fn, *args):
+    if not _slots.acquire(blocking=False):
+        raise HashingBusyError("Too many sign-in attempts in progress, please retry.")
+    try:
+        future = _executor.submit(fn, *args)
+    except BaseException:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+    try:
+        return future.result(timeout=HASH_TIMEOUT)
+    except FuturesTimeoutError:
+        # still queued behind other checks: drop it (its slot is released
+        # by the done callback) and report busy like a full queue
+        future.cancel()
+        raise HashingBusyError("Sign-in is taking too long right now, please retry.") from None
+
+
+def _as_bytes(value) -> bytes:
+    return value.encode("utf-8") if isinstance(value, str) else bytes(value)
+
+
+def hash_cost(password_hash) -> int:
+    """The cost factor a bcrypt hash was created with ($2b$<cost>$...)."""
+    return int(_as_bytes(password_hash).split(b"$")[2])
+
+
+def _hash(password: str, rounds: int) -> bytes:
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds))
+
+
+def _check(password: str, password_hash, rounds: int):
+    stored = _as_bytes(password_hash)
+    if not bcrypt.checkpw(password.encode("utf-8"), stored):
+        return False, None
+    if hash_cost(stored) != rounds:
+        return True, _hash(password, rounds)
+    return True, None
+
+
+def hash_password(password: str, rounds: int | None = None) -> bytes:
+    """Hash a password on the worker pool with the configured cost factor."""
+    return _submit(_hash, password, rounds or BCRYPT_ROUNDS)
+
+
+def check_password(password: str, password_hash):
+    """
+    Verify a password on the worker pool. Returns (ok, new_hash) where
+    new_hash is a replacement hash at the configured cost factor when the
+    stored one uses a different cost, else None.
+    """
+    return _submit(_check, password, password_hash, BCRYPT_ROUNDS)
+
+
+def store_rehash(path: str, user_id: int, old_hash, new_hash: bytes):
+    """Swap in a rehashed password unless it changed in the meantime."""
+    with connect(path) as con:
+        con.execute(
+            "UPDATE users SET password_hash = ? WHERE id = ? AND password_hash = ?",
+            (new_hash, user_id, old_hash),
+        )
+    object_cache.discard_where(lambda key, value: key[:2] == (path, "user") and value["id"] == user_id)
+
+
+# =========================================================
+# USERS
+# =========================================================
+def _load_user(username: str):
+    with connect(DB_PATH) as con:
+        row = con.execute("SELECT * FROM users WHERE username = ?", (username,)).fetchone()
     return dict(row) if row else None
 
+def get_user(username: str):
+    user = cached_object(DB_PATH, "user", username, lambda: _load_user(username))
+    return dict(user) if user else None
+
 def verify_user(username: str, password: str):
     user = get_user(username)
     if not user:
         return None
-    if bcrypt.checkpw(password.encode("utf-8"), user["password_hash"]):
-        return {"id": user["id"], "username": user["username"], "role": user["role"]}
-    return None
+    ok, new_hash = check_password(password, user["password_hash"])
+    if not ok:
+        return None
+    if new_hash:
+        store_rehash(DB_PATH, user["id"], user["password_hash"], new_hash)
+    return {"id": user["id"], "username": user["username"], "role": user["role"]}
 
+@read_cache.writes
 def create_user(username: str, password: str, role: str = "user"):
-    con = sqlite3.connect(DB_PATH)
-    cur = con.cursor()
-    pw_hash = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt())
+    pw_hash = hash_password(password)
     try:
-        cur.execute(
-            "INSERT INTO users (username, password_hash, role, created_at) VALUES (?, ?, ?, datetime('now'))",
-            (username, pw_hash, role),
-        )
-        con.commit()
+        with connect(DB_PATH) as con:
+            con.execute(
+                "INSERT INTO users (username, password_hash, role, created_at) VALUES (?, ?, ?, datetime('now'))",
+                (username, pw_hash, role),
+            )
         return True
     except sqlite3.IntegrityError:
         return False
-    finally:
-        con.close()
\ No newline at end of file
+
+
+# =========================================================
+# SESSIONS
+# =========================================================
+# A successful sign-in issues a random token that lives only in the server-side
+# Streamlit session; reruns resolve it with one indexed lookup instead of
+# asking for the password and running bcrypt again.
+#
+# Streamlit keeps no state across a browser reload, so the browser holds a
+# separate one-time resume token in the ?sid= query parameter. A reload
+# redeems it, which gives the session a new token and voids the URL one.
+# The exposure: until the next reload, the current ?sid= (in browser
+# history, a copied link, a proxy log) can be redeemed once by whoever holds
+# it, which also signs the original tab out at its next rerun.
+SESSION_TTL = int(os.environ.get("TICKETAPP_SESSION_TTL_HOURS", "12")) * 3600
+SESSION_PURGE_INTERVAL = int(os.environ.get("TICKETAPP_SESSION_PURGE_SECONDS", "3600"))
+
+def _token_hash(token: str) -> bytes:
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+def issue_session(user_id: int, ttl: int | None = None) -> str:
+    """Create a session for ``user_id`` and return its opaque token."""
+    token = secrets.token_urlsafe(32)
+    now = int(time.time())
+    with connect(DB_PATH) as con:
+        con.execute(
+            "INSERT INTO sessions (token_hash, user_id, created_at, expires_at) VALUES (?, ?, ?, ?)",
+            (_token_hash(token), user_id, now, now + (SESSION_TTL if ttl is None else ttl)),
+        )
+    return token
+
+def resolve_session(token: str):
+    """Return the signed-in user for a live token, or None."""
+    if not token:
+        return None
+    with connect(DB_PATH) as con:
+        row = con.execute(
+            """
+            SELECT u.id, u.username, u.role
+            FROM sessions s JOIN users u ON u.id = s.user_id
+            WHERE s.token_hash = ? AND s.expires_at > ?
+            """,
+            (_token_hash(token), int(time.time())),
+        ).fetchone()
+    return dict(row) if row else None
+
+def issue_resume_token(token: str) -> str | None:
+    """
+    Return a one-time token for the browser URL that redeem_resume_token()
+    swaps for the live session ``token``. Replaces any earlier one.
+    """
+    resume = secrets.token_urlsafe(32)
+    with connect(DB_PATH) as con:
+        updated = con.execute(
+            "UPDATE sessions SET resume_hash = ? WHERE token_hash = ? AND expires_at > ?",
+            (_token_hash(resume), _token_hash(token), int(time.time())),
+        ).rowcount
+    return resume if updated else None
+
+def redeem_resume_token(resume: str) -> str | None:
+    """
+    Swap a resume token for a new token of its session, or None. Works once:
+    the old session token and the resume token both stop resolving.
+    """
+    if not resume:
+        return None
+    token = secrets.token_urlsafe(32)
+    with connect(DB_PATH) as con:
+        updated = con.execute(
+            "UPDATE sessions SET token_hash = ?, resume_hash = NULL WHERE resume_hash = ? AND expires_at > ?",
+            (_token_hash(token), _token_hash(resume), int(time.time())),
+        ).rowcount
+    return token if updated else None
+
+def revoke_session(token: str) -> bool:
+    with connect(DB_PATH) as con:
+        return con.execute("DELETE FROM sessions WHERE token_hash = ?", (_token_hash(token),)).rowcount > 0
+
+def revoke_user_sessions(user_id: int) -> int:
+    """Sign a user out everywhere. Returns the number of sessions ended."""
+    with connect(DB_PATH) as con:
+        return con.execute("DELETE FROM sessions WHERE user_id = ?", (user_id,)).rowcount
+
+def active_session_counts() -> dict:
+    """Return {user_id: live session count} for the admin page."""
+    with connect(DB_PATH) as con:
+        rows = con.execute(
+            "SELECT user_id, COUNT(*) FROM sessions WHERE expires_at > ? GROUP BY user_id",
+            (int(time.time()),),
+        ).fetchall()
+    return {user_id: n for user_id, n in rows}
+
+def purge_expired_sessions(path: str | None = None) -> int:
+    with connect(path or DB_PATH) as con:
+        return con.execute("DELETE FROM sessions WHERE expires_at <= ?", (int(time.time()),)).rowcount
+
+_purge_paths: set[str] = set()
+_purge_lock = threading.Lock()
+_purger = None
+
+def _purge_loop():
+    while True:
+        time.sleep(SESSION_PURGE_INTERVAL)
+        with _purge_lock:
+            paths = list(_purge_paths)
+        for path in paths:
+            try:
+                purge_expired_sessions(path)
+            except sqlite3.Error:
+                pass  # retried on the next round
+
+def start_session_purger(path: str | None = None):
+    """Purge expired sessions of ``path`` periodically on a daemon thread."""
+    global _purger
+    with _purge_lock:
+        _purge_paths.add(path or DB_PATH)
+        if _purger is None:
+            _purger = threading.Thread(target=_purge_loop, name="session-purger", daemon=True)
+            _purger.start()
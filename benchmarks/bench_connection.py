@@ -0,0 +1,71 @@
+"""
+Per-call overhead of opening a fresh connection vs. borrowing a pooled one.
+
+    python -m benchmarks.bench_connection [--calls 5000]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import connection  # noqa: E402
+import db  # noqa: E402
+
+QUERY = """
+    SELECT t.*, u.username AS assigned_to
+    FROM tickets t
+    LEFT JOIN users u ON t.user_id = u.id
+    WHERE ticket_id = ?
+"""
+
+
+def fresh_connection_call(path: str, ticket_id: int):
+    """The old db._connect(): a new connection and PRAGMA on every call."""
+    con = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES)
+    con.row_factory = sqlite3.Row
+    con.execute("PRAGMA foreign_keys = ON")
+    with con:
+        row = con.execute(QUERY, (ticket_id,)).fetchone()
+    con.close()
+    return row
+
+
+def pooled_call(path: str, ticket_id: int):
+    with connection.connect(path) as con:
+        return con.execute(QUERY, (ticket_id,)).fetchone()
+
+
+def _time(fn, path: str, calls: int) -> float:
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(path, i % 100 + 1)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        db.DB_PATH = path
+        db.init_db()
+        for i in range(100):
+            db.create_ticket("Bug", f"Ticket {i}", "s", "p", "steps", "o", "e", "bench")
+
+        before = _time(fresh_connection_call, path, args.calls)
+        after = _time(pooled_call, path, args.calls)
+        connection.close_all()
+
+    print(f"fresh connection per call: {before:8.1f} µs/call")
+    print(f"pooled connection:         {after:8.1f} µs/call")
+    print(f"speed-up:                  {before / after:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
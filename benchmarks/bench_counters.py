@@ -0,0 +1,89 @@
+"""
+Dashboard totals read from ticket_counters vs. live COUNT(*) over tickets.
+
+    python -m benchmarks.bench_counters [--tickets 100000] [--repeat 50]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import connection  # noqa: E402
+import db  # noqa: E402
+
+STATUSES = ["New", "Open", "In Progress", "Test: Regression", "Released", "Closed"]
+
+LIVE_QUERIES = [
+    "SELECT status, COUNT(*) FROM tickets GROUP BY status",
+    """
+    SELECT t.user_id, COUNT(*), SUM(t.status = 'In Progress')
+    FROM tickets t GROUP BY t.user_id
+    """,
+]
+COUNTER_QUERIES = [
+    "SELECT status, SUM(n) FROM ticket_counters GROUP BY status HAVING SUM(n) > 0",
+    """
+    SELECT assignee_id, SUM(n), SUM(CASE WHEN status = 'In Progress' THEN n ELSE 0 END)
+    FROM ticket_counters GROUP BY assignee_id
+    """,
+]
+
+
+def _seed(tickets: int, users: int = 50):
+    rng = random.Random(42)
+    with db._connect() as con:
+        con.executemany(
+            "INSERT INTO users (username, password_hash, role, created_at) VALUES (?, x'00', 'user', '')",
+            [(f"user{i}",) for i in range(users)],
+        )
+        con.executemany(
+            "INSERT INTO tickets (ticket_type, subject, summary, status, user_id) VALUES (?, ?, '', ?, ?)",
+            (
+                (
+                    rng.choice(["Bug", "Test Case"]),
+                    f"Ticket {i}",
+                    rng.choice(STATUSES),
+                    rng.choice([None] + list(range(1, users + 1))),
+                )
+                for i in range(tickets)
+            ),
+        )
+
+
+def _time(queries, repeat: int) -> float:
+    with db._connect() as con:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for q in queries:
+                con.execute(q).fetchall()
+        return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = os.path.join(tmp, "bench.db")
+        db.init_db()
+        _seed(args.tickets)
+        assert db.check_ticket_counters() == []
+
+        live = _time(LIVE_QUERIES, args.repeat)
+        counters = _time(COUNTER_QUERIES, args.repeat)
+        connection.close_all()
+
+    print(f"{args.tickets} tickets")
+    print(f"live COUNT(*):   {live:8.2f} ms per dashboard load")
+    print(f"ticket_counters: {counters:8.2f} ms per dashboard load")
+    print(f"speed-up:        {live / counters:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
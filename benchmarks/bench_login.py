@@ -0,0 +1,48 @@
+"""
+Logins per second through the bcrypt worker pool at several cost factors and
+levels of concurrency (simultaneous sign-ins).
+
+    python -m benchmarks.bench_login [--rounds 4 8 10 12] [--parallel 1 2 4 8] [--logins 32]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import auth  # noqa: E402
+
+
+def logins_per_second(rounds: int, parallel: int, logins: int) -> float:
+    auth.BCRYPT_ROUNDS = rounds
+    stored = auth.hash_password("correct horse", rounds)
+
+    def login(_):
+        ok, _ = auth.check_password("correct horse", stored)
+        assert ok
+
+    # each client thread stands in for one Streamlit session signing in
+    with ThreadPoolExecutor(max_workers=parallel) as clients:
+        start = time.perf_counter()
+        list(clients.map(login, range(logins)))
+        return logins / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, nargs="+", default=[4, 8, 10, 12])
+    parser.add_argument("--parallel", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--logins", type=int, default=32)
+    args = parser.parse_args()
+
+    print(f"hash workers: {auth.HASH_WORKERS}, queue limit: {auth.HASH_QUEUE_LIMIT}")
+    print("cost  " + "".join(f"{p:>9} par" for p in args.parallel))
+    for rounds in args.rounds:
+        rates = [logins_per_second(rounds, p, args.logins) for p in args.parallel]
+        print(f"{rounds:>4}  " + "".join(f"{r:>10.1f}/s " for r in rates))
+
+
+if __name__ == "__main__":
+    main()
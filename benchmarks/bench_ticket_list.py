@@ -0,0 +1,84 @@
+"""
+Render time of the Tickets list in its table layout (one st.dataframe) and
+its card layout (a widget row per ticket) at growing result sizes, run
+through Streamlit's AppTest harness.
+
+    python -m benchmarks.bench_ticket_list [--sizes 100 1000 10000] [--repeat 5]
+
+Each size renders that many rows in one page; the query result is served
+from the read cache after the warm-up run, so the timings are rendering.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import auth  # noqa: E402
+import cache  # noqa: E402
+import connection  # noqa: E402
+from benchmarks.generate import generate  # noqa: E402
+
+LAYOUTS = ("table", "cards")
+
+
+def _page(layout: str, limit: int, db_path: str, root: str):
+    # runs as the AppTest script: everything it needs is imported here
+    import sys
+
+    sys.path.insert(0, root)
+    import db
+    import ticket_list
+
+    db.DB_PATH = db_path
+    rows, _ = db.list_tickets_page(limit=limit)
+    if layout == "table":
+        ticket_list.render_table(rows, key="bench")
+    else:
+        ticket_list.render_cards(rows)
+
+
+def render_ms(layout: str, rows: int, db_path: str, repeat: int) -> tuple[float, int]:
+    """Median ms per rerun and the number of elements one rerun produces."""
+    at = AppTest.from_function(_page, args=(layout, rows, db_path, ROOT), default_timeout=600)
+    at.run()  # warm-up: imports, query, first render
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        at.run()
+        samples.append((time.perf_counter() - start) * 1000)
+    elements = len(at.markdown) + len(at.caption) + len(at.checkbox) + len(at.button) + len(at.dataframe)
+    return statistics.median(samples), elements
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    auth.BCRYPT_ROUNDS = 4  # only the tickets matter here
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        generate(path, users=50, tickets=max(args.sizes))
+
+        print(f"{'rows':>8}" + "".join(f"{layout + ' ms':>14}{'elements':>10}" for layout in LAYOUTS))
+        for size in args.sizes:
+            line = f"{size:>8}"
+            for layout in LAYOUTS:
+                ms, elements = render_ms(layout, size, path, args.repeat)
+                line += f"{ms:>14.1f}{elements:>10}"
+            print(line, flush=True)
+
+        connection.close_all()
+        cache.close_monitors()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Write throughput with many sessions saving at once, through the writer
+thread (group commit) and with each session writing on its own connection.
+
+    python -m benchmarks.bench_writes [--threads 1 8 32 64] [--writes 50]
+
+Each thread stands in for one Streamlit session alternating ticket creates
+and status updates. Failed writes (lock errors past the busy timeout) are
+counted, not retried.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import auth  # noqa: E402
+import cache  # noqa: E402
+import connection  # noqa: E402
+import db  # noqa: E402
+import writer  # noqa: E402
+
+
+def writes_per_second(threads: int, writes: int, queued: bool) -> tuple[float, int, float]:
+    """(writes/s, failed writes, mean writes per transaction) for one run."""
+    writer.ENABLED = queued
+    failures = []
+
+    def session(n):
+        tid = None
+        for i in range(writes):
+            try:
+                if tid is None or i % 2 == 0:
+                    tid = db.create_ticket("Bug", f"S{n}-{i}", "s", "p", "s", "o", "e", "bench")
+                else:
+                    db.update_ticket_status(tid, "In Progress")
+            except Exception as exc:
+                failures.append(exc)
+
+    workers = [threading.Thread(target=session, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    w = writer._writers.get(db.DB_PATH)
+    per_batch = w.operations / w.batches if queued and w and w.batches else 1.0
+    writer.close_writers()
+    return threads * writes / elapsed, len(failures), per_batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--writes", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = auth.DB_PATH = os.path.join(tmp, "bench.db")
+        db.init_db()
+
+        print(f"{'threads':>8}{'direct/s':>12}{'failed':>8}{'queued/s':>12}{'failed':>8}{'per tx':>8}")
+        for threads in args.threads:
+            direct, direct_failed, _ = writes_per_second(threads, args.writes, queued=False)
+            queued, queued_failed, per_batch = writes_per_second(threads, args.writes, queued=True)
+            print(
+                f"{threads:>8}{direct:>12.0f}{direct_failed:>8}"
+                f"{queued:>12.0f}{queued_failed:>8}{per_batch:>8.1f}",
+                flush=True,
+            )
+
+        connection.close_all()
+        cache.close_monitors()
+
+
+if __name__ == "__main__":
+    main()
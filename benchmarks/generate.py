@@ -0,0 +1,146 @@
+"""
+Generate a synthetic ticket database at production scale.
+
+    python -m benchmarks.generate --db bench.db [--users 200] [--tickets 100000] [--seed 42]
+
+Users share one password (PASSWORD) hashed at the configured bcrypt cost.
+Tickets are spread over the last two years, follow STATUS_WEIGHTS, carry
+multi-paragraph text bodies, and about a third are children of an earlier
+ticket, forming parent/child trees of varying depth. The same seed always
+produces the same data.
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import auth  # noqa: E402
+import db  # noqa: E402
+
+PASSWORD = "benchmark"
+
+# Relative frequency of each db.STATUS_CHOICES entry in a mature project:
+# most tickets are done, a steady share is in flight.
+STATUS_WEIGHTS = {
+    "New": 10,
+    "Product Backlog - Pending (B)": 8,
+    "Test: Sprint Test": 4,
+    "Test: Build Ready": 3,
+    "Test: Regression": 3,
+    "Released": 20,
+    "Open": 12,
+    "In Progress": 10,
+    "Closed": 30,
+}
+TYPE_WEIGHTS = {"Bug": 7, "Test Case": 3}
+# Share of tickets that are children of an earlier ticket
+CHILD_RATIO = 0.3
+# Share of tickets without an assignee
+UNASSIGNED_RATIO = 0.25
+HISTORY_DAYS = 730
+
+WORDS = (
+    "login logout session token password user admin role permission report export "
+    "import dashboard ticket status filter search page sidebar button form field "
+    "validation error warning crash timeout database query index cache latency "
+    "release build regression sprint backlog deploy server client browser mobile "
+    "invoice payment order customer account profile settings notification email "
+    "upload download attachment file image preview print schedule calendar approve "
+    "reject submit cancel retry refresh load save delete update create display"
+).split()
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    text = " ".join(rng.choices(WORDS, k=words))
+    return text[0].upper() + text[1:] + "."
+
+
+def _paragraphs(rng: random.Random, count: int) -> str:
+    return "\n\n".join(
+        " ".join(_sentence(rng, rng.randint(6, 18)) for _ in range(rng.randint(2, 5)))
+        for _ in range(count)
+    )
+
+
+def _steps(rng: random.Random) -> str:
+    return "\n".join(f"{i}. {_sentence(rng, rng.randint(4, 12))}" for i in range(1, rng.randint(4, 12)))
+
+
+def iter_ticket_rows(tickets: int, usernames: list[str], seed: int = 42):
+    """
+    Yield ``tickets`` import rows (see db.import_tickets) in creation order.
+    Children always point at an earlier ticket, so parents resolve in one pass.
+    """
+    rng = random.Random(seed)
+    statuses, status_weights = zip(*STATUS_WEIGHTS.items())
+    types, type_weights = zip(*TYPE_WEIGHTS.items())
+    start = datetime.datetime.utcnow() - datetime.timedelta(days=HISTORY_DAYS)
+    step = HISTORY_DAYS * 86400 / max(tickets, 1)
+
+    for i in range(1, tickets + 1):
+        ticket_type = rng.choices(types, type_weights)[0]
+        parent_id = rng.randint(max(1, i - 5000), i - 1) if i > 1 and rng.random() < CHILD_RATIO else None
+        created_at = start + datetime.timedelta(seconds=i * step + rng.uniform(0, step))
+        yield {
+            "ticket_id": i,
+            "parent_id": parent_id,
+            "ticket_type": ticket_type,
+            "subject": _sentence(rng, rng.randint(4, 10)).rstrip("."),
+            "summary": "" if ticket_type == "Test Case" else _sentence(rng, rng.randint(8, 20)),
+            "prerequisites": _paragraphs(rng, rng.randint(1, 3)),
+            "steps_to_replicate": _steps(rng),
+            "outcome": "" if ticket_type == "Test Case" else _paragraphs(rng, 1),
+            "expected_outcome": _paragraphs(rng, 1),
+            "status": rng.choices(statuses, status_weights)[0],
+            "assignee": None if rng.random() < UNASSIGNED_RATIO else rng.choice(usernames),
+            "created_by": rng.choice(usernames),
+            "created_at": created_at.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+
+def generate(path: str, users: int = 200, tickets: int = 100_000, seed: int = 42) -> dict:
+    """Create and fill a new database at ``path``. Returns a summary dict."""
+    if os.path.exists(path):
+        raise FileExistsError(path)
+    started = time.perf_counter()
+    db.DB_PATH = auth.DB_PATH = path
+    db.init_db()
+
+    usernames = [f"user{i:04d}" for i in range(users)]
+    password_hash = auth.hash_password(PASSWORD)
+    with db._connect() as con:
+        con.executemany(
+            "INSERT INTO users (username, password_hash, role, created_at) VALUES (?, ?, ?, datetime('now'))",
+            [(name, password_hash, "admin" if i == 0 else "user") for i, name in enumerate(usernames)],
+        )
+
+    report = db.import_tickets(iter_ticket_rows(tickets, usernames, seed), created_by=usernames[0])
+    if report.rejected:
+        raise RuntimeError(f"generator produced invalid rows: {report.rejected[:5]}")
+
+    return {
+        "users": users,
+        "tickets": report.inserted,
+        "seed": seed,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", required=True, help="database file to create")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--tickets", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    summary = generate(args.db, args.users, args.tickets, args.seed)
+    print(f"✅ {summary['users']} users, {summary['tickets']} tickets in {summary['seconds']} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+Timed benchmark scenarios over a generated database, with JSON results and
+regression checks against a stored baseline.
+
+    python -m benchmarks.run [--tickets 100000] [--users 200] [--output results.json]
+    python -m benchmarks.run --db bench.db --baseline baseline.json [--threshold 0.2]
+    python -m benchmarks.run --only list_tickets_search get_ticket --cached
+
+Without --db a fresh database is generated (see benchmarks.generate); with
+--db a copy of that database is used, so write scenarios never change it.
+By default reads bypass the in-process caches to measure the SQL itself;
+--cached goes through them like the pages do. The exit status is 1 when a
+scenario's median is more than --threshold slower than in the baseline.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import auth  # noqa: E402
+import cache  # noqa: E402
+import connection  # noqa: E402
+import db  # noqa: E402
+from benchmarks.generate import PASSWORD, WORDS, generate  # noqa: E402
+
+WARMUP = 3
+
+# =========================================================
+# SCENARIOS
+# =========================================================
+# name -> (iterations, setup). setup(ctx) returns the callable to time; ctx
+# holds a seeded rng, the ticket id range and the usernames.
+SCENARIOS: dict = {}
+
+
+def scenario(name: str, iterations: int = 200):
+    def register(setup):
+        SCENARIOS[name] = (iterations, setup)
+        return setup
+
+    return register
+
+
+def _read(fn, cached: bool):
+    return fn if cached else fn.uncached
+
+
+@scenario("list_tickets_open", iterations=20)
+def _list_open(ctx):
+    list_tickets = _read(db.list_tickets, ctx["cached"])
+    return lambda: list_tickets(statuses=sorted(db.OPEN_STATUSES))
+
+
+@scenario("list_tickets_search", iterations=50)
+def _list_search(ctx):
+    list_tickets = _read(db.list_tickets, ctx["cached"])
+    rng = ctx["rng"]
+    return lambda: list_tickets(statuses=["In Progress"], search=" ".join(rng.sample(WORDS, 2)))
+
+
+@scenario("list_tickets_page", iterations=200)
+def _list_page(ctx):
+    list_tickets_page = _read(db.list_tickets_page, ctx["cached"])
+    return lambda: list_tickets_page(statuses=sorted(db.OPEN_STATUSES))
+
+
+@scenario("list_tickets_last_30_days", iterations=50)
+def _list_recent(ctx):
+    list_tickets = _read(db.list_tickets, ctx["cached"])
+    since = datetime.date.today() - datetime.timedelta(days=30)
+    return lambda: list_tickets(created_from=since)
+
+
+@scenario("get_ticket", iterations=1000)
+def _get_ticket(ctx):
+    rng, max_id = ctx["rng"], ctx["max_id"]
+    get = db.get_ticket if ctx["cached"] else db._load_ticket
+    return lambda: get(rng.randint(1, max_id))
+
+
+@scenario("dashboard", iterations=50)
+def _dashboard(ctx):
+    get_dashboard_stats = _read(db.get_dashboard_stats, ctx["cached"])
+    rng, usernames = ctx["rng"], ctx["usernames"]
+    return lambda: get_dashboard_stats(rng.choice(usernames))
+
+
+@scenario("create_ticket", iterations=200)
+def _create_ticket(ctx):
+    rng, max_id = ctx["rng"], ctx["max_id"]
+
+    def create():
+        db.create_ticket(
+            "Bug", "Benchmark ticket", "summary", "prerequisites", "1. step", "outcome",
+            "expected", "bench", parent_id=rng.choice([None, rng.randint(1, max_id)]),
+        )
+
+    return create
+
+
+@scenario("update_ticket", iterations=200)
+def _update_ticket(ctx):
+    rng, max_id = ctx["rng"], ctx["max_id"]
+
+    def update():
+        t = db._load_ticket(rng.randint(1, max_id))
+        db.update_ticket(
+            t["ticket_id"], t["ticket_type"], t["subject"], t["summary"], t["prerequisites"],
+            t["steps_to_replicate"] + "\n- retested", t["outcome"], t["expected_outcome"],
+            rng.choice(db.STATUS_CHOICES), t["user_id"], t["parent_id"],
+        )
+
+    return update
+
+
+@scenario("login", iterations=10)
+def _login(ctx):
+    rng, usernames = ctx["rng"], ctx["usernames"]
+    return lambda: auth.verify_user(rng.choice(usernames), PASSWORD)
+
+
+# =========================================================
+# RUNNER
+# =========================================================
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def time_scenario(fn, iterations: int) -> dict:
+    for _ in range(WARMUP):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "iterations": iterations,
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "median_ms": round(statistics.median(samples), 4),
+        "p95_ms": round(_percentile(samples, 0.95), 4),
+        "min_ms": round(min(samples), 4),
+        "max_ms": round(max(samples), 4),
+        "ops_per_sec": round(1000 / statistics.fmean(samples), 1),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Return (scenario, baseline_median_ms, median_ms, ratio) for every
+    scenario whose median is more than ``threshold`` slower than baseline.
+    """
+    regressions = []
+    for name, result in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        ratio = result["median_ms"] / base["median_ms"]
+        if ratio > 1 + threshold:
+            regressions.append((name, base["median_ms"], result["median_ms"], round(ratio, 2)))
+    return regressions
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(path: str, names: list[str], cached: bool = False, seed: int = 42) -> dict:
+    """Run the named scenarios against the database at ``path``."""
+    db.DB_PATH = auth.DB_PATH = path
+    db.init_db()
+    with db._connect() as con:
+        max_id = con.execute("SELECT MAX(ticket_id) FROM tickets").fetchone()[0]
+        tickets = con.execute("SELECT COUNT(*) FROM tickets").fetchone()[0]
+        usernames = [r[0] for r in con.execute("SELECT username FROM users ORDER BY id")]
+
+    results = {}
+    for name in names:
+        iterations, setup = SCENARIOS[name]
+        ctx = {"rng": random.Random(seed), "max_id": max_id, "usernames": usernames, "cached": cached}
+        results[name] = time_scenario(setup(ctx), iterations)
+
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "tickets": tickets,
+            "users": len(usernames),
+            "cached": cached,
+            "bcrypt_rounds": auth.BCRYPT_ROUNDS,
+        },
+        "scenarios": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", help="generated database to copy (default: generate one)")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--tickets", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", nargs="+", choices=sorted(SCENARIOS), help="scenarios to run")
+    parser.add_argument("--cached", action="store_true", help="read through the in-process caches")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown (default: %(default)s)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        if args.db:
+            with sqlite3.connect(args.db) as src, sqlite3.connect(path) as dst:
+                src.backup(dst)
+        else:
+            summary = generate(path, args.users, args.tickets, args.seed)
+            print(f"generated {summary['tickets']} tickets / {summary['users']} users in {summary['seconds']} s")
+
+        results = run(path, args.only or list(SCENARIOS), args.cached, args.seed)
+        connection.close_all()
+        cache.close_monitors()
+
+    print(f"{'scenario':<28}{'median ms':>12}{'p95 ms':>12}{'ops/s':>12}")
+    for name, r in results["scenarios"].items():
+        print(f"{name:<28}{r['median_ms']:>12.3f}{r['p95_ms']:>12.3f}{r['ops_per_sec']:>12.1f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"📄 Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for name, before, after, ratio in regressions:
+            print(f"⚠️ {name}: {before:.3f} ms -> {after:.3f} ms ({ratio}x)")
+        print(f"{'⚠️' if regressions else '✅'} {len(regressions)} regressions vs {args.baseline}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+import functools
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# =========================================================
+# CONFIGURATION
+# =========================================================
+READ_CACHE_SIZE = int(os.environ.get("TICKETAPP_READ_CACHE_SIZE", "512"))
+OBJECT_CACHE_SIZE = int(os.environ.get("TICKETAPP_OBJECT_CACHE_SIZE", "4096"))
+
+_MISSING = object()
+# ChangeMonitor.poll() result when the change log cannot say what changed
+ALL_CHANGED = object()
+
+
+# =========================================================
+# LRU CACHE
+# =========================================================
+class LRUCache:
+    """A thread-safe, size-bounded mapping that evicts the least recently used key."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def discard_where(self, predicate):
+        """Remove every entry for which ``predicate(key, value)`` is true."""
+        with self._lock:
+            for key in [k for k, v in self._data.items() if predicate(k, v)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+
+# =========================================================
+# CROSS-PROCESS CHANGE DETECTION
+# =========================================================
+class ChangeMonitor:
+    """
+    Watches one database file for commits made by any other connection,
+    including other server processes.
+
+    ``poll()`` costs a single PRAGMA data_version on a dedicated connection
+    and returns None while nothing has changed. When something has, it reads
+    the new entries of the trigger-maintained data_changes log and returns
+    the changed (entity, entity_id) pairs. The list is empty for commits
+    that only touched untracked tables (e.g. a closure rebuild), which still
+    invalidate generation-keyed reads. ALL_CHANGED means the log was pruned
+    past what this process last saw and everything has to be dropped.
+    """
+
+    def __init__(self, path: str):
+        self._con = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        self._version = self._data_version()
+        self._seq = self._con.execute("SELECT COALESCE(MAX(seq), 0) FROM data_changes").fetchone()[0]
+
+    def _data_version(self) -> int:
+        return self._con.execute("PRAGMA data_version").fetchone()[0]
+
+    def poll(self):
+        with self._lock:
+            version = self._data_version()
+            if version == self._version:
+                return None
+            self._version = version
+            rows = self._con.execute(
+                "SELECT seq, entity, entity_id FROM data_changes WHERE seq > ? ORDER BY seq",
+                (self._seq,),
+            ).fetchall()
+            if not rows:
+                return []
+            gap = rows[0][0] != self._seq + 1
+            self._seq = rows[-1][0]
+            if gap:
+                return ALL_CHANGED
+            return [(entity, entity_id) for _, entity, entity_id in rows]
+
+    def close(self):
+        self._con.close()
+
+
+_monitors: dict[str, ChangeMonitor] = {}
+_monitors_lock = threading.Lock()
+
+
+def _monitor(path: str) -> ChangeMonitor | None:
+    monitor = _monitors.get(path)
+    if monitor is None:
+        with _monitors_lock:
+            monitor = _monitors.get(path)
+            if monitor is None:
+                try:
+                    monitor = _monitors[path] = ChangeMonitor(path)
+                except sqlite3.OperationalError:
+                    # schema not migrated yet; nothing can be cached anyway
+                    return None
+    return monitor
+
+
+def sync(path: str):
+    """
+    Apply changes committed to ``path`` since the last call: drop the changed
+    rows from object_cache (or all of them if the log has a gap) and
+    invalidate generation-keyed reads.
+    """
+    monitor = _monitor(path)
+    if monitor is None:
+        return
+    changes = monitor.poll()
+    if changes is None:
+        return
+
+    read_cache.bump()
+    if changes is ALL_CHANGED:
+        object_cache.discard_where(lambda key, value: key[0] == path)
+        return
+
+    ticket_ids = {i for entity, i in changes if entity == "ticket"}
+    user_ids = {i for entity, i in changes if entity == "user"}
+    for ticket_id in ticket_ids:
+        object_cache.pop((path, "ticket", ticket_id))
+    if user_ids:
+        object_cache.discard_where(
+            lambda key, value: key[:2] == (path, "user") and value["id"] in user_ids
+        )
+
+
+def close_monitors():
+    with _monitors_lock:
+        monitors = list(_monitors.values())
+        _monitors.clear()
+    for monitor in monitors:
+        monitor.close()
+
+
+# =========================================================
+# OBJECT CACHE
+# =========================================================
+object_cache = LRUCache(OBJECT_CACHE_SIZE)
+
+
+def cached_object(path: str, entity: str, key, loader):
+    """
+    Return the ``entity`` row identified by ``key`` from the process-wide
+    object cache, loading it with ``loader()`` on a miss. Missing rows (None)
+    are not cached. Entries stay valid until that row changes.
+    """
+    sync(path)
+    cache_key = (path, entity, key)
+    value = object_cache.get(cache_key, _MISSING)
+    if value is not _MISSING:
+        return value
+    generation = read_cache.generation
+    value = loader()
+    # A commit landing while the row loads may already have been synced
+    # (popping a key that was not there yet), or may be seen only now.
+    # Either way it moves the generation on, and the row may be stale.
+    sync(path)
+    if value is not None and read_cache.generation == generation:
+        object_cache.set(cache_key, value)
+    return value
+
+
+# =========================================================
+# GENERATION-KEYED READ CACHE
+# =========================================================
+def _freeze(value):
+    """Make call arguments hashable (lists/sets of statuses, etc.)."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+def _copy(value):
+    """Shallow-copy containers so callers cannot mutate a cached result."""
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+class GenerationCache:
+    """
+    Caches results of read functions keyed by their arguments plus a global
+    data generation number. Every write bumps the generation, so entries
+    from before the write can never be served again and simply age out of
+    the LRU. Before serving, ``sync(scope())`` also bumps it when another
+    process has committed.
+    """
+
+    def __init__(self, maxsize: int = READ_CACHE_SIZE):
+        self._entries = LRUCache(maxsize)
+        self._counter = itertools.count(1)
+        self.generation = 0
+
+    def bump(self):
+        """Invalidate everything cached so far."""
+        self.generation = next(self._counter)
+
+    def clear(self):
+        self._entries.clear()
+        self.bump()
+
+    def reads(self, fn=None, *, scope=None, max_age: float | None = None):
+        """
+        Decorate a read function. ``scope()`` is added to the key (e.g. the
+        database path); ``max_age`` bounds how long an entry may be served
+        for results that also depend on the clock.
+        """
+        if fn is None:
+            return functools.partial(self.reads, scope=scope, max_age=max_age)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            scope_value = scope() if scope else None
+            if scope_value is not None:
+                sync(scope_value)
+            key = (
+                fn.__qualname__,
+                scope_value,
+                self.generation,
+                _freeze(args),
+                _freeze(kwargs),
+            )
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, stored_at = entry
+                if max_age is None or time.monotonic() - stored_at < max_age:
+                    return _copy(value)
+            value = fn(*args, **kwargs)
+            self._entries.set(key, (value, time.monotonic()))
+            return _copy(value)
+
+        wrapper.uncached = fn
+        return wrapper
+
+    def writes(self, fn):
+        """Decorate a write function so it invalidates cached reads."""
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.bump()
+
+        return wrapper
+
+
+read_cache = GenerationCache()
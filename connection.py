@@ -0,0 +1,198 @@
+import os
+import sqlite3
+import threading
+import urllib.parse
+from contextlib import contextmanager
+
+import instrumentation
+from instrumentation import InstrumentedConnection
+
+# =========================================================
+# CONFIGURATION
+# =========================================================
+# All settings can be overridden through the environment so each deployment
+# can tune them without code changes.
+BUSY_TIMEOUT_MS = int(os.environ.get("TICKETAPP_BUSY_TIMEOUT_MS", "5000"))
+SYNCHRONOUS = os.environ.get("TICKETAPP_SYNCHRONOUS", "NORMAL").upper()
+POOL_SIZE = int(os.environ.get("TICKETAPP_POOL_SIZE", "8"))
+# Read-only connections kept for dashboard / report reads (see snapshot)
+READ_POOL_SIZE = int(os.environ.get("TICKETAPP_READ_POOL_SIZE", "4"))
+CACHED_STATEMENTS = int(os.environ.get("TICKETAPP_CACHED_STATEMENTS", "256"))
+
+_SYNCHRONOUS_LEVELS = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+
+# =========================================================
+# CONNECTION POOL
+# =========================================================
+class ConnectionPool:
+    """
+    A small pool of long-lived SQLite connections for one database file.
+
+    Connections are configured once when opened (WAL, busy timeout,
+    synchronous level, foreign keys) and then reused, so their prepared
+    statement cache survives between calls. A connection is owned by a single
+    thread while checked out; nested use on the same thread shares the outer
+    connection and its transaction.
+
+    A ``readonly`` pool opens the file with mode=ro and query_only set, so
+    its connections can never take the write lock. It relies on a read-write
+    connection having put the database in WAL mode already (init_db does).
+
+    Turning instrumentation on or off takes effect connection by connection:
+    one of the wrong kind is closed when it is checked out or returned, and
+    a fresh one opened in its place. Connections in use by other threads are
+    never closed under them.
+    """
+
+    def __init__(self, path: str, size: int = POOL_SIZE, readonly: bool = False):
+        if SYNCHRONOUS not in _SYNCHRONOUS_LEVELS:
+            raise ValueError(f"Invalid synchronous level: {SYNCHRONOUS}")
+        self.path = path
+        self.size = size
+        self.readonly = readonly
+        self._idle: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _open(self) -> sqlite3.Connection:
+        instrumented = instrumentation.ENABLED
+        if self.readonly:
+            target = f"file:{urllib.parse.quote(os.path.abspath(self.path))}?mode=ro"
+        else:
+            target = self.path
+        con = sqlite3.connect(
+            target,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,
+            cached_statements=CACHED_STATEMENTS,
+            factory=InstrumentedConnection if instrumented else sqlite3.Connection,
+            uri=self.readonly,
+        )
+        con.row_factory = sqlite3.Row
+        if self.readonly:
+            con.execute("PRAGMA query_only = ON")
+        else:
+            con.execute("PRAGMA journal_mode = WAL")
+            con.execute(f"PRAGMA synchronous = {SYNCHRONOUS}")
+        if instrumented:
+            # lock waits are retried (and timed) by the connection itself
+            con.busy_timeout_ms = BUSY_TIMEOUT_MS
+            con.execute("PRAGMA busy_timeout = 0")
+        else:
+            con.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        con.execute("PRAGMA foreign_keys = ON")
+        return con
+
+    @staticmethod
+    def _current(con: sqlite3.Connection) -> bool:
+        return isinstance(con, InstrumentedConnection) == instrumentation.ENABLED
+
+    def _checkout(self) -> sqlite3.Connection:
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                con = self._idle.pop()
+            if self._current(con):
+                return con
+            con.close()
+        return self._open()
+
+    def _checkin(self, con: sqlite3.Connection):
+        if self._current(con):
+            with self._lock:
+                if len(self._idle) < self.size:
+                    self._idle.append(con)
+                    return
+        con.close()
+
+    @contextmanager
+    def connection(self):
+        """
+        Yield a pooled connection. Commits on success and rolls back on error,
+        like ``with sqlite3.connect(...) as con`` does.
+        """
+        held = getattr(self._local, "con", None)
+        if held is not None:
+            yield held
+            return
+
+        con = self._checkout()
+        self._local.con = con
+        try:
+            yield con
+            if con.in_transaction:
+                con.commit()
+        except BaseException:
+            if con.in_transaction:
+                con.rollback()
+            raise
+        finally:
+            self._local.con = None
+            if isinstance(con, InstrumentedConnection):
+                con.flush()
+            self._checkin(con)
+
+    def close(self):
+        """Close all idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for con in idle:
+            con.close()
+
+
+_pools: dict[tuple[str, bool], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path: str, readonly: bool = False) -> ConnectionPool:
+    """Return the process-wide pool for a database file, creating it on first use."""
+    pool = _pools.get((path, readonly))
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get((path, readonly))
+            if pool is None:
+                size = READ_POOL_SIZE if readonly else POOL_SIZE
+                pool = _pools[(path, readonly)] = ConnectionPool(path, size, readonly)
+    return pool
+
+
+def connect(path: str, readonly: bool = False):
+    """Context manager yielding a pooled, pre-configured connection to ``path``."""
+    return get_pool(path, readonly).connection()
+
+
+def holds_connection(path: str) -> bool:
+    """True if this thread is inside ``connect(path)`` (read-write) already."""
+    pool = _pools.get((path, False))
+    return pool is not None and getattr(pool._local, "con", None) is not None
+
+
+@contextmanager
+def snapshot(path: str):
+    """
+    Yield a read-only connection to ``path`` inside one read transaction, so
+    every query in the block sees the database as of its first read. In WAL
+    mode the snapshot neither waits for writers nor holds them up; they
+    commit alongside it and their changes show up in the next snapshot.
+    """
+    with connect(path, readonly=True) as con:
+        if con.in_transaction:  # nested: already inside a snapshot
+            yield con
+            return
+        con.execute("BEGIN")
+        try:
+            yield con
+        finally:
+            con.rollback()
+
+
+def close_all():
+    """Close every pooled connection (used by tests and on shutdown)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -1,45 +1,336 @@
 import sqlite3
-import bcrypt
+import csv
 import datetime
+import functools
+import json
+import os
+import re
+import tempfile
+import threading
+import time
 from contextlib import closing
+from dataclasses import dataclass, field
+
+from auth import check_password, hash_password, start_session_purger, store_rehash
+from cache import cached_object, read_cache
+from connection import connect, snapshot
+import migrations
+from migrations import migrate
+from writer import run_write
+import history
 
 # =========================================================
 # CONFIGURATION
 # =========================================================
 DB_PATH = "ticketapp.db"
 
+# Fields that must be filled in, per ticket type, as label -> column. Other
+# ticket types follow the Bug rules (same as the Tickets page form).
+REQUIRED_FIELDS = {
+    "Test Case": {
+        "Subject": "subject",
+        "Preconditions / Requirements": "prerequisites",
+        "Test Steps": "steps_to_replicate",
+        "Pass Criteria": "expected_outcome",
+    },
+    "Bug": {
+        "Subject": "subject",
+        "Summary": "summary",
+        "Prerequisites": "prerequisites",
+        "Steps to replicate": "steps_to_replicate",
+        "Outcome": "outcome",
+        "Expected Outcome": "expected_outcome",
+    },
+}
+# Rows inserted per transaction by import_tickets
+IMPORT_BATCH_SIZE = 1000
+# Rows fetched per query by iter_tickets / export_tickets
+EXPORT_BATCH_SIZE = 500
+# Where prepared export files wait for download, and how long before one is
+# treated as abandoned and deleted
+EXPORT_DIR = os.environ.get("TICKETAPP_EXPORT_DIR", os.path.join(tempfile.gettempdir(), "ticketapp-exports"))
+EXPORT_MAX_AGE = int(os.environ.get("TICKETAPP_EXPORT_MAX_AGE_SECONDS", "3600"))
+# Column order of ticket exports
+EXPORT_COLUMNS = [
+    "ticket_id", "ticket_type", "subject", "summary", "prerequisites",
+    "steps_to_replicate", "outcome", "expected_outcome", "status",
+    "assigned_to", "parent_id", "created_by", "created_at",
+]
+# Ticket statuses and types offered by the pages, in display order
+STATUS_CHOICES = [
+    "New",
+    "Product Backlog - Pending (B)",
+    "Test: Sprint Test",
+    "Test: Build Ready",
+    "Test: Regression",
+    "Released",
+    "Open",
+    "In Progress",
+    "Closed",
+]
+TICKET_TYPES = [
+    "Bug",
+    "Test Case",
+]
+# Statuses counted as "open" on the dashboard
+OPEN_STATUSES = {
+    "New",
+    "Open",
+    "In Progress",
+    "Test: Sprint Test",
+    "Test: Build Ready",
+    "Test: Regression",
+    "Product Backlog - Pending (B)",
+}
+# Seconds a cached dashboard may be served without any write, since its
+# "new in last 7 days" count also changes with the clock
+DASHBOARD_MAX_AGE = 60
+# Rows per page for list_tickets_page
+PAGE_SIZE = 50
+# Entries per page for list_ticket_history
+HISTORY_PAGE_SIZE = 20
+# Sort orders list_tickets_page accepts -> the ticket column it orders by.
+# Only these names ever reach the SQL.
+SORT_COLUMNS = {
+    "created": "created_ts",
+    "updated": "updated_ts",
+    "id": "ticket_id",
+    "status": "status",
+    "subject": "subject",
+}
+# list_tickets_page sort order for search results ranked by bm25
+RELEVANCE = "relevance"
+# Columns of the tickets table, and of a full ticket row (plus assigned_to)
+TICKET_COLUMNS = (
+    "ticket_id",
+    "ticket_type",
+    "subject",
+    "summary",
+    "prerequisites",
+    "steps_to_replicate",
+    "outcome",
+    "expected_outcome",
+    "status",
+    "user_id",
+    "parent_id",
+    "created_by",
+    "created_at",
+    "created_ts",
+    "updated_ts",
+    "version",
+)
+TICKET_FIELDS = TICKET_COLUMNS + ("assigned_to",)
+# Column sets the read functions accept as ``fields=``. Whatever a profile
+# leaves out (the multi-kilobyte text bodies, mostly) is read on first
+# access instead; see TicketRow.
+PROJECTIONS = {
+    # everything Home shows per row, so its lists never fall back to _load
+    "dashboard": (
+        "ticket_id",
+        "ticket_type",
+        "subject",
+        "status",
+        "created_by",
+        "created_at",
+        "created_ts",
+        "assigned_to",
+    ),
+    "list": (
+        "ticket_id",
+        "ticket_type",
+        "subject",
+        "status",
+        "user_id",
+        "parent_id",
+        "created_by",
+        "created_at",
+        "created_ts",
+        "updated_ts",
+        "assigned_to",
+    ),
+    "full": TICKET_FIELDS,
+}
+# Markers around matched words in search snippets (rendered as bold markdown)
+SNIPPET_MARK = "**"
+# bm25 column weights, in migrations.SEARCH_COLUMNS order: subject matches
+# count most, then summary and expected outcome.
+SEARCH_WEIGHTS = "10.0, 4.0, 1.0, 1.0, 1.0, 2.0"
+
+_initialised: set[str] = set()
+_init_lock = threading.Lock()
+
 
 def _connect():
-    """Connect to the SQLite database with FK support enabled."""
-    con = sqlite3.connect(DB_PATH, detect_types=sqlite3.PARSE_DECLTYPES)
-    con.row_factory = sqlite3.Row
-    con.execute("PRAGMA foreign_keys = ON")
-    return con
+    """Borrow a pooled connection to DB_PATH (WAL, FK support enabled)."""
+    return connect(DB_PATH)
+
+
+def _snapshot():
+    """
+    Borrow a read-only connection to DB_PATH holding one read transaction,
+    for multi-query reads that must agree with each other (dashboards,
+    reports). It never blocks, or is blocked by, ticket edits.
+    """
+    return snapshot(DB_PATH)
+
+
+def _now() -> int:
+    return int(time.time())
+
+
+def _timestamp_text(ts: int) -> str:
+    """created_at text for an epoch timestamp, in SQLite's datetime('now') format (UTC)."""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(ts))
+
+
+def _epoch(value, end_of_day: bool = False) -> int | None:
+    """
+    Convert a timestamp argument to epoch seconds: an int passes through,
+    a datetime is taken as UTC when naive, a date means midnight UTC (or the
+    following midnight with ``end_of_day``), and a string is parsed as ISO
+    8601, a date-only string ("2024-05-01") counting as a date. Returns None
+    for None or an unparseable string; raises ValueError for any other type
+    (a bool, a float, ...).
+    """
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, str, datetime.date)):
+        raise ValueError(f"Not a timestamp: {value!r}")
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        text = value.strip()
+        try:
+            value = datetime.date.fromisoformat(text)
+        except ValueError:
+            try:
+                value = datetime.datetime.fromisoformat(text)
+            except ValueError:
+                return None
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime.combine(value, datetime.time())
+        if end_of_day:
+            value += datetime.timedelta(days=1)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return int(value.timestamp())
+
+
+def _cached(fn=None, *, max_age=None):
+    """
+    Serve a read function from the in-process cache until a write function
+    (decorated with ``read_cache.writes``) changes the data.
+    """
+    return read_cache.reads(fn, scope=lambda: DB_PATH, max_age=max_age)
+
+
+def _queued(fn):
+    """
+    Run a write function on DB_PATH's writer thread, group-committed with
+    writes from other sessions (see writer.py). Goes under
+    ``read_cache.writes`` so reads are invalidated after the commit.
+    """
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        return run_write(DB_PATH, fn, *args, **kwargs)
+
+    return wrapper
 
 
 # =========================================================
-# USER MANAGEMENT
+# COLUMN PROJECTIONS
 # =========================================================
-def init_user_db():
-    """Create the users table if it doesn't exist."""
-    with _connect() as con, closing(con.cursor()) as cur:
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password_hash BLOB NOT NULL,
-                role TEXT NOT NULL CHECK(role IN ('user', 'admin')),
-                created_at TEXT NOT NULL
+def _projection(fields) -> tuple:
+    """
+    Columns to select for ``fields``: a PROJECTIONS name or an iterable of
+    TICKET_FIELDS names. ticket_id is always included.
+    """
+    columns = PROJECTIONS.get(fields) if isinstance(fields, str) else tuple(fields)
+    if columns is None or not set(columns) <= set(TICKET_FIELDS):
+        raise ValueError(f"Unknown ticket fields: {fields!r}")
+    return columns if "ticket_id" in columns else ("ticket_id",) + columns
+
+
+def _select_columns(columns, assigned_to: str = "u.username") -> str:
+    """SELECT list for ``columns`` over tickets t LEFT JOIN users u."""
+    return ", ".join(
+        f"{assigned_to} AS assigned_to" if c == "assigned_to" else f"t.{c}" for c in columns
+    )
+
+
+class TicketRow(sqlite3.Row):
+    """
+    A sqlite3.Row read with a column projection. Any ticket column the
+    projection left out is loaded on first access by name, all of them in
+    one query, and kept on the row. That query re-reads the columns already
+    held too, so the row never mixes two versions of the ticket.
+
+    Rows are built by sqlite itself (see _ticket_cursor), one subclass per
+    database path, so a projected read costs no more than a plain one.
+    """
+
+    __slots__ = ("_loaded",)  # every field, once one outside the row was asked for
+    _path: str
+
+    def __getitem__(self, key):
+        loaded = getattr(self, "_loaded", None)
+        if loaded is not None and isinstance(key, str):
+            return loaded[key]
+        try:
+            return super().__getitem__(key)
+        except IndexError:
+            if key not in TICKET_FIELDS:
+                raise
+        return self._load()[key]
+
+    def keys(self) -> list[str]:
+        """Every field the row can return: its own columns, then the lazy ones."""
+        return list(dict.fromkeys([*super().keys(), *TICKET_FIELDS]))
+
+    def _load(self) -> dict:
+        held = {k: super(TicketRow, self).__getitem__(k) for k in super().keys()}
+        with connect(self._path) as con, closing(con.cursor()) as cur:
+            cur.execute(
+                """
+                SELECT t.*, u.username AS assigned_to
+                FROM tickets t
+                LEFT JOIN users u ON t.user_id = u.id
+                WHERE t.ticket_id = ?
+                """,
+                (held["ticket_id"],),
             )
-        """
-        )
-        con.commit()
+            row = cur.fetchone()
+        if row is None:  # deleted since: keep what was read, the rest is gone
+            loaded = {**dict.fromkeys(TICKET_FIELDS), **held}
+        else:
+            loaded = {**held, **dict(zip(row.keys(), row))}
+            if held.get("assigned_to") == "":
+                # list rows show a missing assignee as '' rather than None
+                loaded["assigned_to"] = loaded["assigned_to"] or ""
+        self._loaded = loaded
+        return loaded
+
+
+@functools.lru_cache(maxsize=None)
+def _ticket_row_type(path: str) -> type:
+    return type("TicketRow", (TicketRow,), {"__slots__": (), "_path": path})
+
 
+def _ticket_cursor(con: sqlite3.Connection) -> sqlite3.Cursor:
+    """A cursor on ``con`` that returns its rows as TicketRows."""
+    cur = con.cursor()
+    cur.row_factory = _ticket_row_type(DB_PATH)
+    return cur
 
+
+# =========================================================
+# USER MANAGEMENT
+# =========================================================
+@read_cache.writes
 def create_user(username: str, password: str, role: str = "user") -> bool:
     """Create a new user with a hashed password. Returns True on success, False if username exists."""
-    pw_hash = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt())
+    pw_hash = hash_password(password)
     with _connect() as con, closing(con.cursor()) as cur:
         try:
             cur.execute(
@@ -47,9 +338,8 @@ def create_user(username: str, password: str, role: str = "user") -> bool:
                 INSERT INTO users (username, password_hash, role, created_at)
                 VALUES (?, ?, ?, ?)
                 """,
-                (username, pw_hash, role, datetime.datetime.utcnow().isoformat()),
+                (username, pw_hash, role, _timestamp_text(_now())),
             )
-            con.commit()
             print(f"✅ Created user: {username} ({role})")
             return True
         except sqlite3.IntegrityError:
@@ -62,17 +352,24 @@ def authenticate_user(username: str, password: str):
     with _connect() as con, closing(con.cursor()) as cur:
         cur.execute("SELECT * FROM users WHERE username = ?", (username,))
         user = cur.fetchone()
-        if user and bcrypt.checkpw(password.encode("utf-8"), user["password_hash"]):
-            return user
+    if not user:
+        return None
+    ok, new_hash = check_password(password, user["password_hash"])
+    if not ok:
         return None
+    if new_hash:
+        store_rehash(DB_PATH, user["id"], user["password_hash"], new_hash)
+    return user
 
 
+@_cached
 def list_users():
     """Return a list of all users (id + username)."""
     with _connect() as con, closing(con.cursor()) as cur:
         cur.execute("SELECT id, username FROM users ORDER BY username ASC")
         return cur.fetchall()
     
+@_cached
 def list_users_full():
     """Return all user details for admin view."""
     with _connect() as con, closing(con.cursor()) as cur:
@@ -82,6 +379,8 @@ def list_users_full():
         return cur.fetchall()
 
 
+@read_cache.writes
+@_queued
 def update_user_role(user_id: int, new_role: str):
     """Update the role for a user."""
     if new_role not in ("user", "admin"):
@@ -91,46 +390,21 @@ def update_user_role(user_id: int, new_role: str):
             "UPDATE users SET role = ? WHERE id = ?",
             (new_role, user_id),
         )
-        con.commit()
 
 
+@read_cache.writes
+@_queued
 def delete_user(user_id: int):
     """Delete a user. Tickets with this user_id will have user_id set to NULL (per FK)."""
     with _connect() as con, closing(con.cursor()) as cur:
         cur.execute("DELETE FROM users WHERE id = ?", (user_id,))
-        con.commit()
 
 
 # =========================================================
 # TICKET MANAGEMENT
 # =========================================================
-def init_ticket_db():
-    """Create the tickets table (if it doesn't exist)."""
-    with _connect() as con, closing(con.cursor()) as cur:
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS tickets (
-                ticket_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ticket_type TEXT NOT NULL DEFAULT 'Bug',  
-                subject TEXT NOT NULL,
-                summary TEXT NOT NULL,
-                prerequisites TEXT,
-                steps_to_replicate TEXT,
-                outcome TEXT,
-                expected_outcome TEXT,
-                status TEXT NOT NULL DEFAULT 'New',
-                user_id INTEGER NULL,
-                parent_id INTEGER NULL,
-                created_by TEXT,
-                created_at TEXT NOT NULL DEFAULT (datetime('now')),
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL,
-                FOREIGN KEY (parent_id) REFERENCES tickets(ticket_id) ON DELETE SET NULL
-            )
-        """
-        )
-        con.commit()
-
-
+@read_cache.writes
+@_queued
 def create_ticket(
     ticket_type: str,
     subject: str,
@@ -149,13 +423,16 @@ def create_ticket(
 
     ticket_type examples: 'Bug', 'Test Case', 'Change Request', ...
     """
+    now = _now()
     with _connect() as con, closing(con.cursor()) as cur:
+        _check_parent(cur, None, parent_id)
         cur.execute(
             """
             INSERT INTO tickets
             (ticket_type, subject, summary, prerequisites, steps_to_replicate,
-             outcome, expected_outcome, created_by, user_id, parent_id, status)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+             outcome, expected_outcome, created_by, user_id, parent_id, status,
+             created_at, created_ts, updated_ts)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """,
             (
                 ticket_type,
@@ -169,81 +446,474 @@ def create_ticket(
                 user_id,
                 parent_id,
                 status,
+                _timestamp_text(now),
+                now,
+                now,
             ),
         )
-        con.commit()
         return cur.lastrowid
 
 
-def list_tickets(statuses=None, search: str = ""):
+def missing_required_fields(ticket_type: str, values: dict) -> list[str]:
+    """Return the labels of required fields that are empty for this ticket type."""
+    required = REQUIRED_FIELDS.get(ticket_type, REQUIRED_FIELDS["Bug"])
+    return [label for label, col in required.items() if not _text(values, col)]
+
+
+def _text(values: dict, key: str) -> str:
+    return str(values.get(key) or "").strip()
+
+
+def _search_query(search: str) -> str:
     """
-    Return ticket rows, optionally filtered by statuses and search term.
+    Turn free text into an FTS5 query: every word must match, and each word
+    also matches as a prefix ("logi" finds "login").
+    """
+    words = re.findall(r"\w+", search)
+    return " ".join(f'"{w}"*' for w in words)
+
 
-    Each row has: ticket_id, ticket_type, subject, summary, status,
-    created_by, created_at, assigned_to.
+def _list_select(match: str, fields="list", relevance: bool = False):
     """
-    q = """
-        SELECT t.ticket_id,
-               t.ticket_type,
-               t.subject,
-               t.summary,
-               t.status,
-               t.created_by,
-               t.created_at,
-               COALESCE(u.username, '') AS assigned_to
+    SELECT ... FROM for list-style ticket rows (see list_tickets) with the
+    ``fields`` columns, joined to the search index when ``match`` is set.
+    With ``relevance`` (and a match) the bm25 rank is selected as well, as
+    ``relevance``. Returns (sql, params).
+    """
+    snippet = (
+        f"snippet(tickets_fts, -1, '{SNIPPET_MARK}', '{SNIPPET_MARK}', '…', 16)"
+        if match
+        else "NULL"
+    )
+    columns = _select_columns(_projection(fields), assigned_to="COALESCE(u.username, '')")
+    if match and relevance:
+        columns += f", bm25(tickets_fts, {SEARCH_WEIGHTS}) AS relevance"
+    q = f"""
+        SELECT {columns},
+               {snippet} AS snippet
         FROM tickets t
         LEFT JOIN users u ON t.user_id = u.id
-        WHERE 1=1
     """
-    params: list = []
+    if not match:
+        return q, []
+    q += " JOIN tickets_fts ON tickets_fts.rowid = t.ticket_id AND tickets_fts MATCH ?"
+    return q, [match]
+
+
+def _time_window(created_from=None, created_to=None, updated_from=None, updated_to=None):
+    """
+    SQL conditions on t.created_ts / t.updated_ts for the date-range filters
+    of list_tickets. Lower bounds are inclusive, upper bounds exclusive; a
+    date (or date-only string) as upper bound includes that whole day.
+    Returns (sql, params).
+    """
+    sql, params = "", []
+    for column, value, op, end_of_day in (
+        ("created_ts", created_from, ">=", False),
+        ("created_ts", created_to, "<", True),
+        ("updated_ts", updated_from, ">=", False),
+        ("updated_ts", updated_to, "<", True),
+    ):
+        if value is not None:
+            ts = _epoch(value, end_of_day)
+            if ts is None:
+                raise ValueError(f"Not a date: {value!r}")
+            sql += f" AND t.{column} {op} ?"
+            params.append(ts)
+    return sql, params
+
+
+@_cached
+def list_tickets(
+    statuses=None,
+    search: str = "",
+    created_from=None,
+    created_to=None,
+    updated_from=None,
+    updated_to=None,
+    fields="list",
+):
+    """
+    Return ticket rows, optionally filtered by statuses, search term and
+    created / updated date ranges (ints in epoch seconds, dates, datetimes
+    or ISO strings; see _time_window).
+
+    Rows are TicketRows holding the ``fields`` columns (a PROJECTIONS name
+    or a list of TICKET_FIELDS) plus ``snippet``; other ticket columns, such
+    as the text bodies, are read when first used. The default "list"
+    profile has ticket_id, ticket_type, subject, status, user_id, parent_id,
+    created_by, created_at, created_ts, updated_ts and assigned_to ('' when
+    unassigned).
+
+    Searching matches all ticket text fields through the tickets_fts index;
+    results are then ordered by relevance (bm25) and ``snippet`` holds a
+    highlighted excerpt. Without a search term ``snippet`` is None.
+    """
+    match = _search_query(search) if search else ""
+    if search and not match:
+        return []
+
+    q, params = _list_select(match, fields)
+    q += " WHERE 1=1"
 
     if statuses:
         q += f" AND t.status IN ({','.join('?' * len(statuses))})"
         params += list(statuses)
 
-    if search:
-        s = f"%{search}%"
-        q += """
-        AND (
-            t.subject LIKE ? OR
-            t.summary LIKE ? OR
-            t.expected_outcome LIKE ?
-        )
-        """
-        params += [s, s, s]
+    window, window_params = _time_window(created_from, created_to, updated_from, updated_to)
+    q += window
+    params += window_params
 
-    q += " ORDER BY t.created_at DESC"
+    # With an updated_ts window, read that index range and sort the result;
+    # the unary + stops SQLite walking idx_tickets_created_ts instead.
+    order = "+t.created_ts" if updated_from is not None or updated_to is not None else "t.created_ts"
+    if match:
+        q += f" ORDER BY bm25(tickets_fts, {SEARCH_WEIGHTS}), {order} DESC, t.ticket_id DESC"
+    else:
+        q += f" ORDER BY {order} DESC, t.ticket_id DESC"
 
-    with _connect() as con, closing(con.cursor()) as cur:
+    with _connect() as con, closing(_ticket_cursor(con)) as cur:
         cur.execute(q, params)
         return cur.fetchall()
 
 
-def get_ticket(ticket_id: int):
-    """Return full ticket details by ID."""
-    with _connect() as con, closing(con.cursor()) as cur:
+@_cached
+def list_tickets_page(
+    statuses=None,
+    search: str = "",
+    after=None,
+    limit: int = PAGE_SIZE,
+    created_from=None,
+    created_to=None,
+    updated_from=None,
+    updated_to=None,
+    sort: str = "created",
+    descending: bool = True,
+    fields="list",
+):
+    """
+    Return one page of tickets, newest first, plus the cursor for the next page.
+
+    ``after`` is the cursor returned for the previous page, a
+    (sort value, ticket_id) pair, or None for the first page. Returns
+    (rows, next_cursor) where next_cursor is None on the last page. Rows and
+    ``fields`` are as in list_tickets, and the date-range filters work the
+    same way; pages are ordered by ``sort`` (a SORT_COLUMNS key, ticket_id
+    breaking ties) even when searching, so cursors stay stable.
+
+    ``sort="relevance"`` orders search results by bm25 rank as list_tickets
+    does, best match first (last with ``descending=False``), and each row
+    also has its ``relevance``. Without a search term it sorts as
+    "created".
+
+    Each status is read as its own index range of at most ``limit + 1`` rows
+    and the ranges are merged, so the cost depends on the page size and not
+    on how many tickets match. Sorting by status or subject has no index to
+    walk and sorts every matching row first; so does relevance, which ranks
+    every match.
+    """
+    if sort not in SORT_COLUMNS and sort != RELEVANCE:
+        raise ValueError(f"Unknown sort order: {sort!r}")
+
+    match = _search_query(search) if search else ""
+    if search and not match:
+        return [], None
+    window, window_params = _time_window(created_from, created_to, updated_from, updated_to)
+    if sort == RELEVANCE:
+        if match:
+            return _relevance_page(match, statuses, after, limit, window, window_params, descending, fields)
+        sort = "created"
+
+    key = SORT_COLUMNS[sort]
+    direction, before = ("DESC", "<") if descending else ("ASC", ">")
+
+    fts = (
+        "JOIN tickets_fts ON tickets_fts.rowid = t.ticket_id AND tickets_fts MATCH ?"
+        if match
+        else ""
+    )
+    keyset = f"AND (t.{key}, t.ticket_id) {before} (?, ?)" if after else ""
+
+    def branch(where: str, where_params: list):
+        sql = f"""
+            SELECT * FROM (
+                SELECT t.ticket_id FROM tickets t {fts}
+                WHERE {where} {window} {keyset}
+                ORDER BY t.{key} {direction}, t.ticket_id {direction}
+                LIMIT ?
+            )
+        """
+        return sql, (
+            ([match] if match else []) + where_params + window_params + list(after or ()) + [limit + 1]
+        )
+
+    if not statuses:
+        branches = [branch("1=1", [])]
+    elif match:
+        branches = [branch(f"t.status IN ({','.join('?' * len(statuses))})", list(statuses))]
+    else:
+        branches = [branch("t.status = ?", [s]) for s in statuses]
+
+    q, params = _list_select(match, fields)
+    q += f" WHERE t.ticket_id IN ({' UNION ALL '.join(sql for sql, _ in branches)})"
+    for _, branch_params in branches:
+        params += branch_params
+    q += f" ORDER BY t.{key} {direction}, t.ticket_id {direction} LIMIT ?"
+    params.append(limit + 1)
+
+    with _connect() as con, closing(_ticket_cursor(con)) as cur:
+        cur.execute(q, params)
+        rows = cur.fetchall()
+
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, (rows[-1][key], rows[-1]["ticket_id"])
+
+
+def _relevance_page(match, statuses, after, limit, window, window_params, descending, fields):
+    """list_tickets_page for sort="relevance": keyset pages over (bm25 rank, ticket_id)."""
+    # lower bm25 is a better match; ties go newest first, as in list_tickets
+    direction, beyond, id_direction, id_beyond = (
+        ("ASC", ">", "DESC", "<") if descending else ("DESC", "<", "ASC", ">")
+    )
+    q, params = _list_select(match, fields, relevance=True)
+    if statuses:
+        q += f" WHERE t.status IN ({','.join('?' * len(statuses))}) {window}"
+        params += list(statuses)
+    else:
+        q += f" WHERE 1=1 {window}"
+    params += window_params
+    keyset = (
+        f"WHERE relevance {beyond} ? OR (relevance = ? AND ticket_id {id_beyond} ?)" if after else ""
+    )
+    q = f"SELECT * FROM ({q}) {keyset} ORDER BY relevance {direction}, ticket_id {id_direction} LIMIT ?"
+    if after:
+        params += [after[0], after[0], after[1]]
+    params.append(limit + 1)
+
+    with _connect() as con, closing(_ticket_cursor(con)) as cur:
+        cur.execute(q, params)
+        rows = cur.fetchall()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, (rows[-1]["relevance"], rows[-1]["ticket_id"])
+
+
+@_cached(max_age=DASHBOARD_MAX_AGE)
+def get_dashboard_stats(username: str, top_n: int = 10) -> dict:
+    """
+    Return everything the Home dashboard shows, computed in SQL. Counts are
+    read from ticket_counters; only the 7-day count touches tickets. All
+    queries run in one read-only snapshot, so the numbers agree with each
+    other even while tickets are being edited.
+
+    Keys: total, open, new_this_week, assigned_to_me, unassigned (counts),
+    status_counts ({status: count}), in_progress_by_user
+    ({username or 'Unassigned': count}), and unassigned_top /
+    assigned_to_me_top (the newest ``top_n`` rows, TicketRows with the
+    "dashboard" columns).
+    """
+    week_ago = _now() - 7 * 24 * 3600
+    rows_sql, _ = _list_select("", "dashboard")
+
+    with _snapshot() as con, closing(con.cursor()) as cur:
+        # totals come from the trigger-maintained ticket_counters table
+        cur.execute(
+            """
+            SELECT status, SUM(n) AS n FROM ticket_counters
+            GROUP BY status HAVING SUM(n) > 0
+            """
+        )
+        status_counts = {r["status"]: r["n"] for r in cur.fetchall()}
+
+        cur.execute("SELECT COUNT(*) FROM tickets WHERE created_ts >= ?", (week_ago,))
+        new_this_week = cur.fetchone()[0]
+
         cur.execute(
             """
-            SELECT t.*, u.username AS assigned_to
+            SELECT u.username,
+                   SUM(c.n) AS n,
+                   SUM(CASE WHEN c.status = 'In Progress' THEN c.n ELSE 0 END) AS in_progress
+            FROM ticket_counters c
+            LEFT JOIN users u ON c.assignee_id = u.id
+            GROUP BY c.assignee_id
+            """
+        )
+        per_user = cur.fetchall()
+
+        # the newest rows, as TicketRows
+        cur.row_factory = _ticket_row_type(DB_PATH)
+        cur.execute(
+            rows_sql
+            + """
+            WHERE t.user_id IS NULL
+            ORDER BY t.created_ts DESC, t.ticket_id DESC LIMIT ?
+            """,
+            (top_n,),
+        )
+        unassigned_top = cur.fetchall()
+
+        cur.execute(
+            rows_sql
+            + """
+            WHERE t.user_id IN (SELECT id FROM users WHERE username = ? COLLATE NOCASE)
+            ORDER BY t.created_ts DESC, t.ticket_id DESC LIMIT ?
+            """,
+            (username, top_n),
+        )
+        assigned_to_me_top = cur.fetchall()
+
+    me = username.lower()
+    return {
+        "total": sum(status_counts.values()),
+        "open": sum(n for s, n in status_counts.items() if s in OPEN_STATUSES),
+        "new_this_week": new_this_week,
+        "assigned_to_me": sum(r["n"] for r in per_user if (r["username"] or "").lower() == me),
+        "unassigned": sum(r["n"] for r in per_user if r["username"] is None),
+        "status_counts": status_counts,
+        "in_progress_by_user": {
+            r["username"] or "Unassigned": r["in_progress"]
+            for r in per_user
+            if r["in_progress"]
+        },
+        "unassigned_top": unassigned_top,
+        "assigned_to_me_top": assigned_to_me_top,
+    }
+
+
+@read_cache.writes
+def rebuild_ticket_counters():
+    """Recompute the dashboard counters from the tickets table."""
+    with _connect() as con:
+        migrations.rebuild_ticket_counters(con)
+
+
+def check_ticket_counters() -> list:
+    """
+    Return counter rows that disagree with the tickets table, as
+    (status, assignee_id, ticket_type, counted, actual). Empty when consistent.
+    """
+    with _connect() as con:
+        return migrations.check_ticket_counters(con)
+
+
+@read_cache.writes
+def rebuild_search_index():
+    """Backfill the full-text index from the tickets table."""
+    with _connect() as con:
+        migrations.rebuild_search_index(con)
+
+
+def get_ticket(ticket_id: int, fields="full"):
+    """
+    Return ticket details by ID as a TicketRow (None if there is no such
+    ticket), reading the ``fields`` columns up front and the rest on first
+    access; see list_tickets.
+
+    Served from the process-wide object cache; the entry is dropped as soon
+    as this ticket changes, in this or any other process. A cached row may
+    already hold more than ``fields``.
+    """
+    return cached_object(DB_PATH, "ticket", ticket_id, lambda: _load_ticket(ticket_id, fields))
+
+
+def _load_ticket(ticket_id: int, fields="full"):
+    with _connect() as con, closing(_ticket_cursor(con)) as cur:
+        cur.execute(
+            f"""
+            SELECT {_select_columns(_projection(fields))}
             FROM tickets t
             LEFT JOIN users u ON t.user_id = u.id
-            WHERE ticket_id = ?
+            WHERE t.ticket_id = ?
         """,
             (ticket_id,),
         )
         return cur.fetchone()
 
 
-def update_ticket_status(ticket_id: int, new_status: str):
+# Fields the app edits after creation; everything else is set by the app
+PATCHABLE_FIELDS = (
+    "ticket_type",
+    "subject",
+    "summary",
+    "prerequisites",
+    "steps_to_replicate",
+    "outcome",
+    "expected_outcome",
+    "status",
+    "user_id",
+    "parent_id",
+)
+
+
+class TicketConflictError(RuntimeError):
+    """Raised when a ticket changed (or was deleted) since the version a write was based on."""
+
+    def __init__(self, ticket_id: int, expected_version: int, current_version: int | None):
+        self.ticket_id = ticket_id
+        self.expected_version = expected_version
+        self.current_version = current_version
+        if current_version is None:
+            message = f"Ticket #{ticket_id} was deleted while you were editing it."
+        else:
+            message = (
+                f"Ticket #{ticket_id} was changed by someone else while you were editing it "
+                f"(version {expected_version} is now {current_version})."
+            )
+        super().__init__(message)
+
+
+def _begin_write(con):
+    """Take the write lock now, so rows read before an update cannot change under it."""
+    if not con.in_transaction:
+        con.execute("BEGIN IMMEDIATE")
+
+
+def _update_fields(cur, ticket_id: int, changes: dict, changed_by: str | None, expected_version: int | None = None):
+    """
+    Write the fields in ``changes`` that differ from the stored ticket, bump
+    its version and record the change in ticket_history. Returns the version
+    afterwards, or None if the ticket does not exist. With
+    ``expected_version``, raises TicketConflictError unless the ticket is
+    still at that version.
+    """
+    _begin_write(cur.connection)
+    columns = [name for name in PATCHABLE_FIELDS if name in changes]
+    cur.execute(f"SELECT {', '.join(['version'] + columns)} FROM tickets WHERE ticket_id = ?", (ticket_id,))
+    row = cur.fetchone()
+    if row is None:
+        if expected_version is not None:
+            raise TicketConflictError(ticket_id, expected_version, None)
+        return None
+    version = row[0]
+    if expected_version is not None and version != expected_version:
+        raise TicketConflictError(ticket_id, expected_version, version)
+
+    old = {name: value for name, value in zip(columns, row[1:]) if value != changes[name]}
+    if not old:
+        return version
+    new = {name: changes[name] for name in old}
+    assignments = "".join(f"{name} = ?, " for name in new)
+    cur.execute(
+        f"UPDATE tickets SET {assignments}updated_ts = ?, version = ? WHERE ticket_id = ?",
+        list(new.values()) + [_now(), version + 1, ticket_id],
+    )
+    _record_history(cur, [(ticket_id, version + 1, old, new)], changed_by)
+    return version + 1
+
+
+@read_cache.writes
+@_queued
+def update_ticket_status(ticket_id: int, new_status: str, changed_by: str | None = None):
     """Update only the status of a given ticket."""
     with _connect() as con, closing(con.cursor()) as cur:
-        cur.execute(
-            "UPDATE tickets SET status = ? WHERE ticket_id = ?",
-            (new_status, ticket_id),
-        )
-        con.commit()
+        _update_fields(cur, ticket_id, {"status": new_status}, changed_by)
 
 
+@read_cache.writes
+@_queued
 def update_ticket(
     ticket_id: int,
     ticket_type: str,
@@ -256,54 +926,731 @@ def update_ticket(
     status: str,
     user_id: int | None,
     parent_id: int | None,
+    changed_by: str | None = None,
 ):
-    """Update all editable fields of a ticket."""
+    """
+    Update all editable fields of a ticket. Raises TicketCycleError if the
+    new parent is the ticket itself or one of its descendants.
+    """
+    with _connect() as con, closing(con.cursor()) as cur:
+        _check_parent(cur, ticket_id, parent_id)
+        _update_fields(
+            cur,
+            ticket_id,
+            {
+                "ticket_type": ticket_type,
+                "subject": subject,
+                "summary": summary,
+                "prerequisites": prerequisites,
+                "steps_to_replicate": steps_to_replicate,
+                "outcome": outcome,
+                "expected_outcome": expected_outcome,
+                "status": status,
+                "user_id": user_id,
+                "parent_id": parent_id,
+            },
+            changed_by,
+        )
+
+
+@read_cache.writes
+@_queued
+def patch_ticket(ticket_id: int, changes: dict, expected_version: int, changed_by: str | None = None) -> int:
+    """
+    Write only the fields in ``changes`` (a subset of PATCHABLE_FIELDS),
+    provided the ticket is still at ``expected_version``. Returns the
+    version afterwards (unchanged if no field differed). Raises
+    TicketConflictError if the ticket changed in between, TicketCycleError
+    for a parent below the ticket, and ValueError for unknown fields.
+    """
+    unknown = set(changes) - set(PATCHABLE_FIELDS)
+    if unknown:
+        raise ValueError(f"Cannot patch {', '.join(sorted(unknown))}.")
+    with _connect() as con, closing(con.cursor()) as cur:
+        if "parent_id" in changes:
+            _check_parent(cur, ticket_id, changes["parent_id"])
+        return _update_fields(cur, ticket_id, changes, changed_by, expected_version)
+
+
+@read_cache.writes
+@_queued
+def delete_ticket(ticket_id: int):
+    """
+    Permanently delete a ticket by ID.
+    """
+    with _connect() as con, closing(con.cursor()) as cur:
+        cur.execute("DELETE FROM tickets WHERE ticket_id = ?", (ticket_id,))
+
+
+# =========================================================
+# TICKET HIERARCHY
+# =========================================================
+class TicketCycleError(ValueError):
+    """Raised when a parent change would make a ticket its own ancestor."""
+
+
+def _check_parent(cur, ticket_id: int | None, parent_id: int | None):
+    """Reject a missing parent, or one that is ``ticket_id`` or below it."""
+    if parent_id is None:
+        return
+    cur.execute("SELECT 1 FROM tickets WHERE ticket_id = ?", (parent_id,))
+    if cur.fetchone() is None:
+        raise ValueError(f"Parent ticket #{parent_id} does not exist.")
+    if ticket_id is None:
+        return
+    cur.execute(
+        "SELECT depth FROM ticket_closure WHERE ancestor_id = ? AND descendant_id = ?",
+        (ticket_id, parent_id),
+    )
+    if cur.fetchone() is not None:
+        raise TicketCycleError(
+            f"Ticket #{parent_id} is ticket #{ticket_id} or one of its sub-tickets, so it cannot be its parent."
+        )
+
+
+_HIERARCHY_COLUMNS = "t.ticket_id, t.parent_id, t.ticket_type, t.subject, t.status, c.depth"
+
+
+@_cached
+def get_ancestors(ticket_id: int):
+    """Return the ancestors of a ticket, root first, each with its distance (depth)."""
+    with _connect() as con, closing(con.cursor()) as cur:
+        cur.execute(
+            f"""
+            SELECT {_HIERARCHY_COLUMNS}
+            FROM ticket_closure c JOIN tickets t ON t.ticket_id = c.ancestor_id
+            WHERE c.descendant_id = ? AND c.depth > 0
+            ORDER BY c.depth DESC
+            """,
+            (ticket_id,),
+        )
+        return cur.fetchall()
+
+
+@_cached
+def get_descendants(ticket_id: int):
+    """Return every ticket below ``ticket_id``, nearest first, with its depth."""
     with _connect() as con, closing(con.cursor()) as cur:
+        cur.execute(
+            f"""
+            SELECT {_HIERARCHY_COLUMNS}
+            FROM ticket_closure c JOIN tickets t ON t.ticket_id = c.descendant_id
+            WHERE c.ancestor_id = ? AND c.depth > 0
+            ORDER BY c.depth, t.ticket_id
+            """,
+            (ticket_id,),
+        )
+        return cur.fetchall()
+
+
+@_cached
+def get_subtree(ticket_id: int) -> list[dict]:
+    """
+    Return the tree rooted at ``ticket_id`` (including it) in display order:
+    depth first, children by ticket ID, each row with its depth below the
+    root. Loaded with one query.
+    """
+    with _connect() as con, closing(con.cursor()) as cur:
+        cur.execute(
+            f"""
+            SELECT {_HIERARCHY_COLUMNS}
+            FROM ticket_closure c JOIN tickets t ON t.ticket_id = c.descendant_id
+            WHERE c.ancestor_id = ?
+            ORDER BY c.depth, t.ticket_id
+            """,
+            (ticket_id,),
+        )
+        return _tree_order([dict(r) for r in cur.fetchall()])
+
+
+@_cached
+def get_ticket_tree(ticket_id: int) -> list[dict]:
+    """
+    Return the whole tree ``ticket_id`` belongs to, from its root, in the
+    order of get_subtree(). The root is found inside the same query, so this
+    is one round trip whether or not the ticket has a parent.
+    """
+    with _connect() as con, closing(con.cursor()) as cur:
+        cur.execute(
+            f"""
+            SELECT {_HIERARCHY_COLUMNS}
+            FROM ticket_closure c JOIN tickets t ON t.ticket_id = c.descendant_id
+            WHERE c.ancestor_id = (
+                SELECT ancestor_id FROM ticket_closure
+                WHERE descendant_id = ? ORDER BY depth DESC LIMIT 1
+            )
+            ORDER BY c.depth, t.ticket_id
+            """,
+            (ticket_id,),
+        )
+        return _tree_order([dict(r) for r in cur.fetchall()])
+
+
+def _tree_order(rows: list[dict]) -> list[dict]:
+    # rows come root first, ordered by depth; lay them out depth first
+    children: dict = {}
+    for row in rows[1:]:
+        children.setdefault(row["parent_id"], []).append(row)
+    ordered, stack = [], rows[:1]
+    while stack:
+        row = stack.pop()
+        ordered.append(row)
+        stack.extend(reversed(children.get(row["ticket_id"], [])))
+    return ordered
+
+
+@read_cache.writes
+def rebuild_ticket_closure():
+    """Recompute the hierarchy table from parent_id."""
+    with _connect() as con:
+        migrations.rebuild_ticket_closure(con)
+
+
+# =========================================================
+# TICKET HISTORY
+# =========================================================
+def _record_history(cur, entries, changed_by: str | None):
+    """
+    Append ``(ticket_id, version, old, new)`` entries to ticket_history,
+    storing for each only how to get from ``new`` back to ``old``.
+    """
+    now = _now()
+    cur.executemany(
+        """
+        INSERT INTO ticket_history (ticket_id, version, changed_ts, changed_by, changes)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        [
+            (ticket_id, version, now, changed_by, history.encode_changes(old, new))
+            for ticket_id, version, old, new in entries
+        ],
+    )
+
+
+def _current_fields(cur, ticket_id: int) -> dict | None:
+    cur.execute(f"SELECT {', '.join(TICKET_COLUMNS)} FROM tickets WHERE ticket_id = ?", (ticket_id,))
+    row = cur.fetchone()
+    return dict(zip(TICKET_COLUMNS, row)) if row is not None else None
+
+
+@_cached
+def list_ticket_history(ticket_id: int, limit: int = HISTORY_PAGE_SIZE, before: int | None = None):
+    """
+    Return ``(entries, next_cursor)``: up to ``limit`` changes to a ticket,
+    newest first, each a dict with version, changed_ts, changed_at,
+    changed_by and ``changes`` as {field: (before, after)}. Pass
+    next_cursor back as ``before`` for the next page (None on the last).
+
+    Values are rebuilt by walking back from the current row, so a page
+    costs the entries newer than it, not the whole history. Returns no
+    entries for a deleted ticket.
+    """
+    with _snapshot() as con, closing(con.cursor()) as cur:
+        values = _current_fields(cur, ticket_id)
+        if values is None:
+            return [], None
         cur.execute(
             """
-            UPDATE tickets
-            SET ticket_type = ?,
-                subject = ?,
-                summary = ?,
-                prerequisites = ?,
-                steps_to_replicate = ?,
-                outcome = ?,
-                expected_outcome = ?,
-                status = ?,
-                user_id = ?,
-                parent_id = ?
+            SELECT version, changed_ts, changed_by, changes
+            FROM ticket_history
             WHERE ticket_id = ?
-        """,
+            ORDER BY version DESC
+            """,
+            (ticket_id,),
+        )
+        entries = []
+        for version, changed_ts, changed_by, changes in cur:
+            if len(entries) == limit:
+                return entries, entries[-1]["version"]
+            after = values
+            values = history.undo(values, changes)
+            if before is None or version < before:
+                entries.append({
+                    "version": version,
+                    "changed_ts": changed_ts,
+                    "changed_at": _timestamp_text(changed_ts),
+                    "changed_by": changed_by,
+                    "changes": {name: (values[name], after[name]) for name in json.loads(changes)},
+                })
+        return entries, None
+
+
+def get_ticket_as_of(ticket_id: int, at):
+    """
+    Return the ticket's fields (as get_ticket, in a dict) as they were at
+    ``at``: an epoch, datetime, date or ISO 8601 string, as the list
+    filters accept. None if the ticket did not exist yet, or no longer
+    exists. Not cached.
+
+    Starts from the current row and reverts only the changes made after
+    ``at``, newest first. Changes made outside the app (manual SQL,
+    ON DELETE SET NULL) are not in the history and are not reverted.
+    """
+    ts = _epoch(at)
+    if ts is None:
+        raise ValueError(f"Invalid timestamp: {at!r}")
+    with _snapshot() as con, closing(con.cursor()) as cur:
+        values = _current_fields(cur, ticket_id)
+        if values is None or values["created_ts"] > ts:
+            return None
+        cur.execute(
+            """
+            SELECT version, changed_ts, changes
+            FROM ticket_history
+            WHERE ticket_id = ? AND changed_ts > ?
+            ORDER BY version DESC
+            """,
+            (ticket_id, ts),
+        )
+        for version, changed_ts, changes in cur:
+            values = history.undo(values, changes)
+            values["version"] = version - 1
+        cur.execute(
+            "SELECT MAX(changed_ts) FROM ticket_history WHERE ticket_id = ? AND changed_ts <= ?",
+            (ticket_id, ts),
+        )
+        values["updated_ts"] = cur.fetchone()[0] or values["created_ts"]
+        cur.execute("SELECT username FROM users WHERE id = ?", (values["user_id"],))
+        assignee = cur.fetchone()
+        values["assigned_to"] = assignee[0] if assignee else None
+        return values
+
+
+# =========================================================
+# BULK OPERATIONS
+# =========================================================
+_TARGET_FILTERS = {
+    "statuses", "search", "user_id", "ticket_type",
+    "created_from", "created_to", "updated_from", "updated_to",
+}
+
+
+def _target_where(target):
+    """
+    SQL condition on ``t`` selecting the tickets a bulk operation applies to.
+
+    ``target`` is either a collection of ticket IDs or a filter spec dict with
+    any of: statuses (list), search (text, as list_tickets), user_id (None for
+    unassigned), ticket_type and the list_tickets date ranges. Returns
+    (sql, params).
+    """
+    if not isinstance(target, dict):
+        # one bound parameter however many IDs are selected
+        return "t.ticket_id IN (SELECT value FROM json_each(?))", [json.dumps([int(i) for i in target])]
+
+    unknown = set(target) - _TARGET_FILTERS
+    if unknown:
+        raise ValueError(f"Unknown filter: {', '.join(sorted(unknown))}")
+    clauses, params = [], []
+    if target.get("statuses"):
+        clauses.append(f"t.status IN ({','.join('?' * len(target['statuses']))})")
+        params += list(target["statuses"])
+    if target.get("search"):
+        clauses.append(
+            "t.ticket_id IN (SELECT rowid FROM tickets_fts WHERE tickets_fts MATCH ?)"
+        )
+        params.append(_search_query(target["search"]) or '""')
+    if "user_id" in target:
+        clauses.append("t.user_id IS ?")
+        params.append(target["user_id"])
+    if "ticket_type" in target:
+        clauses.append("t.ticket_type = ?")
+        params.append(target["ticket_type"])
+    window, window_params = _time_window(
+        target.get("created_from"), target.get("created_to"),
+        target.get("updated_from"), target.get("updated_to"),
+    )
+    if window:
+        clauses.append(window.removeprefix(" AND "))
+        params += window_params
+    if not clauses:
+        raise ValueError("Empty filter would select every ticket")
+    return " AND ".join(clauses), params
+
+
+def _bulk_update(
+    target, column: str, value, changed_by: str | None, extra_where: str = "", extra_params=()
+) -> int:
+    where, params = _target_where(target)
+    selected = f"ticket_id IN (SELECT t.ticket_id FROM tickets t WHERE {where}) {extra_where}"
+    with _connect() as con, closing(con.cursor()) as cur:
+        _begin_write(con)
+        # only tickets whose value actually changes are written, counted,
+        # versioned and recorded in the history
+        selected += f" AND {column} IS NOT ?"
+        cur.execute(
+            f"SELECT ticket_id, version, {column} FROM tickets WHERE {selected}",
+            params + list(extra_params) + [value],
+        )
+        changed = cur.fetchall()
+        cur.execute(
+            f"UPDATE tickets SET {column} = ?, updated_ts = ?, version = version + 1 WHERE {selected}",
+            [value, _now()] + params + list(extra_params) + [value],
+        )
+        count = cur.rowcount
+        _record_history(
+            cur,
+            [(tid, version + 1, {column: old}, {column: value}) for tid, version, old in changed],
+            changed_by,
+        )
+        return count
+
+
+@read_cache.writes
+@_queued
+def bulk_update_status(target, new_status: str, changed_by: str | None = None) -> int:
+    """
+    Set the status of every targeted ticket in one statement. Returns how
+    many changed; tickets already at that status are left untouched.
+    """
+    return _bulk_update(target, "status", new_status, changed_by)
+
+
+@read_cache.writes
+@_queued
+def bulk_assign(target, user_id: int | None, changed_by: str | None = None) -> int:
+    """
+    Assign every targeted ticket to ``user_id`` (None unassigns). Returns
+    how many changed; tickets already assigned to them are left untouched.
+    """
+    return _bulk_update(target, "user_id", user_id, changed_by)
+
+
+@read_cache.writes
+@_queued
+def bulk_set_parent(target, parent_id: int | None, changed_by: str | None = None) -> int:
+    """
+    Set the parent of every targeted ticket (None detaches them). The parent
+    itself is skipped if it is part of the target. Returns how many changed.
+    Raises TicketCycleError, changing nothing, if the parent descends from a
+    target.
+    """
+    try:
+        with _connect() as con, closing(con.cursor()) as cur:
+            _check_parent(cur, None, parent_id)
+            return _bulk_update(target, "parent_id", parent_id, changed_by, "AND ticket_id IS NOT ?", [parent_id])
+    except sqlite3.IntegrityError as e:
+        if "cycle" in str(e):
+            raise TicketCycleError(f"Ticket #{parent_id} is below one of the selected tickets.") from e
+        raise
+
+
+@read_cache.writes
+@_queued
+def bulk_delete(target) -> int:
+    """Permanently delete every targeted ticket in one transaction. Returns the count."""
+    where, params = _target_where(target)
+    with _connect() as con, closing(con.cursor()) as cur:
+        cur.execute(
+            f"DELETE FROM tickets WHERE ticket_id IN (SELECT t.ticket_id FROM tickets t WHERE {where})",
+            params,
+        )
+        return cur.rowcount
+
+
+# =========================================================
+# BULK IMPORT / EXPORT
+# =========================================================
+@dataclass
+class ImportReport:
+    """Outcome of import_tickets."""
+
+    inserted: int = 0
+    # (row number, reason) for every row that was not imported
+    rejected: list = field(default_factory=list)
+    # imported tickets whose parent was not part of the import
+    unresolved_parents: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.inserted / self.seconds if self.seconds else 0.0
+
+
+def read_ticket_file(path: str):
+    """Stream ticket dicts from a .csv (with header row) or .jsonl file."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def _optional_int(value):
+    return int(value) if value not in (None, "") else None
+
+
+@read_cache.writes
+def import_tickets(rows, batch_size: int = IMPORT_BATCH_SIZE, created_by: str | None = None) -> ImportReport:
+    """
+    Bulk-insert tickets from an iterable of dicts (e.g. read_ticket_file).
+
+    Keys match the tickets columns, plus:
+      - ``assigned_to`` (as exported; ``assignee`` also accepted): username,
+        resolved through one preloaded username map
+      - ``ticket_id`` / ``parent_id``: ids from the source system; parents
+        are remapped to the new ids, also when the child comes first
+
+    Rows are validated with the Tickets page rules (REQUIRED_FIELDS and
+    STATUS_CHOICES) and inserted with executemany, ``batch_size`` rows per
+    write. Each batch is one operation on the writer queue, so other
+    sessions' writes get their turn between batches of a large import. Rows
+    are consumed lazily, so the input can be larger than memory.
+    """
+    started = time.perf_counter()
+    report = ImportReport()
+
+    with _connect() as con:
+        user_ids = dict(con.execute("SELECT username, id FROM users"))
+
+    id_map: dict = {}      # source ticket_id -> new ticket_id
+    deferred: list = []    # (new ticket_id, source parent_id) seen before the parent
+    batch: list = []
+
+    def insert_batch():
+        with _connect() as con:
+            _begin_write(con)
+            next_id = con.execute(
+                """
+                SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'tickets'), 0),
+                           COALESCE((SELECT MAX(ticket_id) FROM tickets), 0))
+                """
+            ).fetchone()[0]
+            values = []
+            for source_id, source_parent, row in batch:
+                next_id += 1
+                if source_id is not None:
+                    id_map[source_id] = next_id
+                parent_id = id_map.get(source_parent)
+                if source_parent is not None and parent_id is None:
+                    deferred.append((next_id, source_parent))
+                values.append((next_id, *row, parent_id))
+            con.executemany(
+                """
+                INSERT INTO tickets
+                (ticket_id, ticket_type, subject, summary, prerequisites, steps_to_replicate,
+                 outcome, expected_outcome, created_by, user_id, status,
+                 created_at, created_ts, updated_ts, parent_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                values,
+            )
+
+    def flush():
+        run_write(DB_PATH, insert_batch)
+        report.inserted += len(batch)
+        batch.clear()
+
+    for n, raw in enumerate(rows, start=1):
+        ticket_type = _text(raw, "ticket_type") or "Bug"
+        missing = missing_required_fields(ticket_type, raw)
+        if missing:
+            report.rejected.append((n, "missing " + ", ".join(missing)))
+            continue
+
+        status = _text(raw, "status") or "New"
+        if status not in STATUS_CHOICES:
+            report.rejected.append((n, f"unknown status '{status}'"))
+            continue
+
+        assignee = _text(raw, "assigned_to") or _text(raw, "assignee")
+        if assignee and assignee not in user_ids:
+            report.rejected.append((n, f"unknown assignee '{assignee}'"))
+            continue
+
+        try:
+            source_id = _optional_int(raw.get("ticket_id"))
+            source_parent = _optional_int(raw.get("parent_id"))
+        except ValueError:
+            report.rejected.append((n, "ticket_id / parent_id must be integers"))
+            continue
+
+        created_ts = _epoch(_text(raw, "created_at")) if _text(raw, "created_at") else _now()
+        if created_ts is None:
+            report.rejected.append((n, f"created_at '{_text(raw, 'created_at')}' is not a date"))
+            continue
+
+        batch.append((
+            source_id,
+            source_parent,
             (
                 ticket_type,
-                subject,
-                summary,
-                prerequisites,
-                steps_to_replicate,
-                outcome,
-                expected_outcome,
+                _text(raw, "subject"),
+                _text(raw, "summary"),
+                _text(raw, "prerequisites"),
+                _text(raw, "steps_to_replicate"),
+                _text(raw, "outcome"),
+                _text(raw, "expected_outcome"),
+                _text(raw, "created_by") or created_by,
+                user_ids.get(assignee),
                 status,
-                user_id,
-                parent_id,
-                ticket_id,
+                _timestamp_text(created_ts),
+                created_ts,
+                created_ts,
             ),
+        ))
+        if len(batch) >= batch_size:
+            flush()
+
+    if batch:
+        flush()
+
+    resolved = [(id_map[parent], tid) for tid, parent in deferred if parent in id_map]
+    report.unresolved_parents = len(deferred) - len(resolved)
+    if resolved:
+        run_write(DB_PATH, _link_imported_parents, resolved, report, created_by)
+
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def _link_imported_parents(resolved, report: ImportReport, created_by: str | None):
+    """Set the parents import_tickets had to defer, as (parent_id, ticket_id)."""
+    link = "UPDATE tickets SET parent_id = ?, updated_ts = ?, version = version + 1 WHERE ticket_id = ?"
+    now = _now()
+    with _connect() as con, closing(con.cursor()) as cur:
+        _begin_write(con)
+        cur.execute("SAVEPOINT link_parents")
+        try:
+            cur.executemany(link, [(parent_id, now, tid) for parent_id, tid in resolved])
+            linked = resolved
+        except sqlite3.IntegrityError:
+            # parent links in the file form a cycle: link one at a time
+            # and leave the links that would close it detached
+            cur.execute("ROLLBACK TO link_parents")
+            linked = []
+            for parent_id, tid in resolved:
+                try:
+                    cur.execute(link, (parent_id, now, tid))
+                    linked.append((parent_id, tid))
+                except sqlite3.IntegrityError:
+                    report.unresolved_parents += 1
+        cur.execute("RELEASE link_parents")
+        # the link is a change like any other, so it gets a history entry
+        cur.execute(
+            "SELECT ticket_id, version FROM tickets WHERE ticket_id IN (SELECT value FROM json_each(?))",
+            (json.dumps([tid for _, tid in linked]),),
+        )
+        versions = dict(cur.fetchall())
+        _record_history(
+            cur,
+            [(tid, versions[tid], {"parent_id": None}, {"parent_id": parent_id}) for parent_id, tid in linked],
+            created_by,
         )
-        con.commit()
 
-def delete_ticket(ticket_id: int):
+
+def iter_tickets(statuses=None, search: str = "", batch_size: int = EXPORT_BATCH_SIZE):
     """
-    Permanently delete a ticket by ID.
+    Yield full ticket rows (as get_ticket) in ticket_id order, reading
+    ``batch_size`` rows per query with a keyset cursor on ticket_id. Only
+    one batch is held in memory and no read transaction stays open between
+    batches. Batches are read on the read-only pool, away from the
+    connections ticket edits use. Not cached.
     """
-    with _connect() as con, closing(con.cursor()) as cur:
-        cur.execute("DELETE FROM tickets WHERE ticket_id = ?", (ticket_id,))
-        con.commit()
+    match = _search_query(search) if search else ""
+    if search and not match:
+        return
+
+    q = """
+        SELECT t.*, COALESCE(u.username, '') AS assigned_to
+        FROM tickets t
+        LEFT JOIN users u ON t.user_id = u.id
+    """
+    if match:
+        q += " JOIN tickets_fts ON tickets_fts.rowid = t.ticket_id AND tickets_fts MATCH ?"
+    q += " WHERE t.ticket_id > ?"
+    if statuses:
+        q += f" AND t.status IN ({','.join('?' * len(statuses))})"
+    q += " ORDER BY t.ticket_id LIMIT ?"
+    head = [match] if match else []
+    tail = list(statuses or [])
+
+    last_id = 0
+    while True:
+        with connect(DB_PATH, readonly=True) as con, closing(con.cursor()) as cur:
+            cur.execute(q, head + [last_id] + tail + [batch_size])
+            rows = cur.fetchall()
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        last_id = rows[-1]["ticket_id"]
+
+
+def export_tickets(fp, fmt: str = "csv", statuses=None, search: str = "",
+                   batch_size: int = EXPORT_BATCH_SIZE) -> int:
+    """
+    Write tickets to the text file object ``fp`` as CSV (with header) or
+    JSONL, one batch at a time, so memory stays flat however many tickets
+    are exported. Returns the number of tickets written.
+    """
+    if fmt not in ("csv", "jsonl"):
+        raise ValueError("Invalid export format")
+
+    writer = csv.writer(fp) if fmt == "csv" else None
+    if writer:
+        writer.writerow(EXPORT_COLUMNS)
+
+    count = 0
+    for row in iter_tickets(statuses=statuses, search=search, batch_size=batch_size):
+        values = [row[c] for c in EXPORT_COLUMNS]
+        if writer:
+            writer.writerow(values)
+        else:
+            fp.write(json.dumps(dict(zip(EXPORT_COLUMNS, values)), ensure_ascii=False) + "\n")
+        count += 1
+    return count
+
+
+def new_export_file(fmt: str):
+    """
+    Open a new file in EXPORT_DIR for export_tickets(); the caller deletes it
+    when done. Files older than EXPORT_MAX_AGE, left by sessions that never
+    came back for them, are deleted first.
+    """
+    os.makedirs(EXPORT_DIR, mode=0o700, exist_ok=True)
+    purge_export_files()
+    return tempfile.NamedTemporaryFile(
+        "w", dir=EXPORT_DIR, suffix=f".{fmt}", newline="", encoding="utf-8", delete=False
+    )
+
+
+def purge_export_files(max_age: int | None = None) -> int:
+    """Delete export files older than ``max_age`` seconds. Returns how many."""
+    cutoff = time.time() - (EXPORT_MAX_AGE if max_age is None else max_age)
+    removed = 0
+    try:
+        entries = list(os.scandir(EXPORT_DIR))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except OSError:
+            pass  # removed by another session, or still open elsewhere
+    return removed
 
 
 # =========================================================
 # INITIALISATION
 # =========================================================
 def init_db():
-    """Initialise all database tables (safe to call multiple times)."""
-    init_user_db()
-    init_ticket_db()
-    print("✅ Database initialised successfully.")
\ No newline at end of file
+    """
+    Bring the schema up to date (safe to call multiple times).
+
+    Pages call this on every rerun, so migrations only run on the first call
+    per database in each process; later calls return immediately.
+    """
+    if DB_PATH in _initialised:
+        return
+    with _init_lock:
+        if DB_PATH in _initialised:
+            return
+        with _connect() as con:
+            migrate(con)
+        read_cache.bump()
+        start_session_purger(DB_PATH)
+        _initialised.add(DB_PATH)
\ No newline at end of file
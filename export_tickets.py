@@ -0,0 +1,37 @@
+"""
+Export tickets to CSV or JSONL without loading them all into memory.
+
+    python export_tickets.py tickets.csv
+    python export_tickets.py tickets.jsonl --status New --status "In Progress"
+    python export_tickets.py - --format jsonl --search crash > crashes.jsonl
+"""
+import argparse
+import sys
+
+import db
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export tickets to CSV or JSONL.")
+    parser.add_argument("path", help="output file, or - for stdout")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default=None,
+                        help="default: from the file extension, else csv")
+    parser.add_argument("--status", action="append", dest="statuses", help="repeatable")
+    parser.add_argument("--search", default="")
+    parser.add_argument("--db", default=db.DB_PATH, help="database file (default: %(default)s)")
+    args = parser.parse_args()
+
+    fmt = args.format or ("jsonl" if args.path.lower().endswith(".jsonl") else "csv")
+    db.DB_PATH = args.db
+    db.init_db()
+
+    if args.path == "-":
+        count = db.export_tickets(sys.stdout, fmt, statuses=args.statuses, search=args.search)
+    else:
+        with open(args.path, "w", newline="", encoding="utf-8") as f:
+            count = db.export_tickets(f, fmt, statuses=args.statuses, search=args.search)
+    print(f"✅ Exported {count} tickets.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import difflib
+import json
+
+# =========================================================
+# CONFIGURATION
+# =========================================================
+# Text values at least this long are stored as a line diff when that is
+# smaller than the value itself; shorter ones are stored whole.
+DIFF_MIN_CHARS = 200
+
+
+# =========================================================
+# REVERSE DIFFS
+# =========================================================
+# A history entry records how to get from a ticket's values after a change
+# back to its values before it: {field: old value} for short values, or
+# {field: {"diff": ops}} for long text, where ops replace line ranges of the
+# new text with the old lines:
+#
+#     [[start, end, "old lines"], ...]   # new_lines[start:end] -> "old lines"
+#
+# Walking backwards from the current row therefore only ever touches the
+# entries newer than the point being reconstructed.
+def reverse_diff(new: str, old: str) -> list:
+    """Ops turning ``new`` back into ``old``, as line ranges of ``new``."""
+    new_lines = new.splitlines(keepends=True)
+    old_lines = old.splitlines(keepends=True)
+    matcher = difflib.SequenceMatcher(None, new_lines, old_lines, autojunk=False)
+    return [
+        [i1, i2, "".join(old_lines[j1:j2])]
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != "equal"
+    ]
+
+
+def apply_reverse(new: str, ops: list) -> str:
+    """Rebuild the old text from ``new`` and the ops of reverse_diff(new, old)."""
+    lines = new.splitlines(keepends=True)
+    out = []
+    pos = 0
+    for start, end, text in ops:
+        out.extend(lines[pos:start])
+        out.append(text)
+        pos = end
+    out.extend(lines[pos:])
+    return "".join(out)
+
+
+def _encode_value(old, new):
+    if isinstance(old, str) and isinstance(new, str) and len(old) >= DIFF_MIN_CHARS:
+        ops = reverse_diff(new, old)
+        if len(json.dumps(ops)) < len(json.dumps(old)):
+            return {"diff": ops}
+    return old
+
+
+def encode_changes(old: dict, new: dict) -> str:
+    """JSON for a history entry taking the fields of ``new`` back to ``old``."""
+    return json.dumps({name: _encode_value(old[name], new[name]) for name in new}, separators=(",", ":"))
+
+
+def undo(values: dict, changes) -> dict:
+    """
+    Return a copy of ``values`` (a ticket's fields after a change) with the
+    change reverted. ``changes`` is an entry from encode_changes, as JSON or
+    already decoded.
+    """
+    if isinstance(changes, str):
+        changes = json.loads(changes)
+    before = dict(values)
+    for name, old in changes.items():
+        if isinstance(old, dict):
+            old = apply_reverse(values[name] or "", old["diff"])
+        before[name] = old
+    return before
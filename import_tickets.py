@@ -0,0 +1,47 @@
+"""
+Bulk-load tickets from another tracker's CSV or JSONL export.
+
+    python import_tickets.py tickets.csv
+    python import_tickets.py tickets.jsonl --db other.db --batch-size 5000 --created-by migration
+
+Columns / keys: ticket_id, parent_id (source ids, remapped on import),
+ticket_type, subject, summary, prerequisites, steps_to_replicate, outcome,
+expected_outcome, status, assigned_to (username; also read as assignee),
+created_by, created_at. Files written by export_tickets.py import as they are.
+"""
+import argparse
+
+import db
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load tickets from CSV or JSONL.")
+    parser.add_argument("path", help=".csv or .jsonl file")
+    parser.add_argument("--db", default=db.DB_PATH, help="database file (default: %(default)s)")
+    parser.add_argument("--batch-size", type=int, default=db.IMPORT_BATCH_SIZE)
+    parser.add_argument("--created-by", default=None, help="used when a row has no created_by")
+    args = parser.parse_args()
+
+    db.DB_PATH = args.db
+    db.init_db()
+
+    report = db.import_tickets(
+        db.read_ticket_file(args.path),
+        batch_size=args.batch_size,
+        created_by=args.created_by,
+    )
+
+    print(
+        f"✅ Imported {report.inserted} tickets in {report.seconds:.1f}s "
+        f"({report.rows_per_second:,.0f} rows/s)"
+    )
+    if report.unresolved_parents:
+        print(f"⚠️ {report.unresolved_parents} tickets reference a parent that was not imported.")
+    if report.rejected:
+        print(f"⚠️ Rejected {len(report.rejected)} rows:")
+        for row_number, reason in report.rejected:
+            print(f"  row {row_number}: {reason}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+import functools
+import json
+import os
+import re
+import sqlite3
+import statistics
+import sys
+import threading
+import time
+from collections import deque
+
+# =========================================================
+# CONFIGURATION
+# =========================================================
+# Off by default: set TICKETAPP_QUERY_STATS=1 (or call enable()) to record
+# every statement executed through connection.py.
+ENABLED = os.environ.get("TICKETAPP_QUERY_STATS", "0") == "1"
+# Statements slower than this are appended to SLOW_QUERY_LOG (JSON lines)
+SLOW_QUERY_MS = float(os.environ.get("TICKETAPP_SLOW_QUERY_MS", "100"))
+SLOW_QUERY_LOG = os.environ.get("TICKETAPP_SLOW_QUERY_LOG", "slow_queries.log")
+# Durations kept per query for the rolling percentiles
+SAMPLE_WINDOW = int(os.environ.get("TICKETAPP_QUERY_SAMPLES", "500"))
+
+# Frames in these files are plumbing, not the caller to attribute a query to
+_PLUMBING = {
+    os.path.abspath(__file__),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "connection.py"),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache.py"),
+}
+
+
+def enable():
+    """Instrument pooled connections from their next checkout on (see connection.py)."""
+    global ENABLED
+    ENABLED = True
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+
+# =========================================================
+# SQL NORMALISATION
+# =========================================================
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=2048)
+def normalize_sql(sql: str) -> str:
+    """
+    Reduce a statement to its shape: literals become ?, placeholder lists of
+    any length become (...), whitespace collapses. Statements that differ
+    only in their values are then counted as one query.
+    """
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("(...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+def _caller() -> str:
+    frame = sys._getframe(2)
+    while frame is not None:
+        path = frame.f_code.co_filename
+        if path not in _PLUMBING and "contextlib" not in path:
+            module = frame.f_globals.get("__name__", "?")
+            return f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "?"
+
+
+# =========================================================
+# STATISTICS
+# =========================================================
+class _Query:
+    __slots__ = ("calls", "total_ms", "max_ms", "rows", "lock_wait_ms", "samples")
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.lock_wait_ms = 0.0
+        self.samples = deque(maxlen=SAMPLE_WINDOW)
+
+
+class QueryStats:
+    """
+    Per (function, normalised SQL) totals plus a rolling window of recent
+    durations for percentiles. Statements slower than SLOW_QUERY_MS are also
+    appended to the slow-query log.
+    """
+
+    def __init__(self, slow_ms: float = SLOW_QUERY_MS, slow_log: str | None = SLOW_QUERY_LOG):
+        self.slow_ms = slow_ms
+        self.slow_log = slow_log
+        self._queries: dict[tuple, _Query] = {}
+        self._lock = threading.Lock()
+
+    def record(self, function: str, sql: str, ms: float, rows: int, lock_wait_ms: float = 0.0):
+        sql = normalize_sql(sql)
+        with self._lock:
+            q = self._queries.get((function, sql))
+            if q is None:
+                q = self._queries[(function, sql)] = _Query()
+            q.calls += 1
+            q.total_ms += ms
+            q.max_ms = max(q.max_ms, ms)
+            q.rows += max(rows, 0)
+            q.lock_wait_ms += lock_wait_ms
+            q.samples.append(ms)
+        if ms >= self.slow_ms and self.slow_log:
+            self._log_slow(function, sql, ms, rows, lock_wait_ms)
+
+    def _log_slow(self, function, sql, ms, rows, lock_wait_ms):
+        entry = {
+            "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "function": function,
+            "sql": sql,
+            "ms": round(ms, 3),
+            "rows": rows,
+            "lock_wait_ms": round(lock_wait_ms, 3),
+        }
+        with self._lock, open(self.slow_log, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def top(self, n: int = 20, by: str = "total_ms") -> list[dict]:
+        """The ``n`` heaviest queries by ``by`` (total_ms, calls, p95_ms, ...)."""
+        with self._lock:
+            items = [(key, q, sorted(q.samples)) for key, q in self._queries.items()]
+        rows = []
+        for (function, sql), q, samples in items:
+            rows.append({
+                "function": function,
+                "sql": sql,
+                "calls": q.calls,
+                "total_ms": round(q.total_ms, 3),
+                "mean_ms": round(q.total_ms / q.calls, 3),
+                "p50_ms": round(statistics.median(samples), 3),
+                "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+                "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 3),
+                "max_ms": round(q.max_ms, 3),
+                "rows": q.rows,
+                "lock_wait_ms": round(q.lock_wait_ms, 3),
+            })
+        rows.sort(key=lambda r: r[by], reverse=True)
+        return rows[:n]
+
+    def reset(self):
+        with self._lock:
+            self._queries.clear()
+
+
+query_stats = QueryStats()
+
+
+def read_slow_log(limit: int = 50, path: str | None = None) -> list[dict]:
+    """Return the last ``limit`` slow-query log entries, newest first."""
+    path = path or query_stats.slow_log
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        tail = deque(f, maxlen=limit)
+    return [json.loads(line) for line in reversed(tail)]
+
+
+# =========================================================
+# INSTRUMENTED CONNECTION
+# =========================================================
+def _record(entry: list):
+    if not entry[5]:
+        entry[5] = True
+        query_stats.record(*entry[:5])
+
+
+def _is_busy(e: sqlite3.OperationalError) -> bool:
+    return "locked" in str(e) or "busy" in str(e)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    Times each statement from execute through its last fetch and records it
+    when the cursor is reused or closed, or when the pooled connection is
+    returned (InstrumentedConnection.flush).
+    """
+
+    _pending = None   # [function, sql, ms, rows, lock_wait_ms, recorded]
+
+    def _finish(self):
+        if self._pending is not None:
+            _record(self._pending)
+            self._pending = None
+
+    def _run(self, method, sql, params):
+        self._finish()
+        function = _caller()
+        start = time.perf_counter()
+        wait = self.connection.retry_busy(lambda: method(sql, params))
+        elapsed = (time.perf_counter() - start) * 1000
+        self._pending = [function, sql, elapsed, 0 if self.description else self.rowcount, wait, False]
+        # the connection keeps the entry, not the cursor, so statements are
+        # still released as soon as the cursor is dropped
+        self.connection.track(self._pending)
+        return self
+
+    def execute(self, sql, params=()):
+        return self._run(super().execute, sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        # a lock retry runs executemany again, which needs the rows again
+        return self._run(super().executemany, sql, list(seq_of_params))
+
+    def _fetched(self, start: float, rows: int):
+        if self._pending is not None:
+            self._pending[2] += (time.perf_counter() - start) * 1000
+            self._pending[3] += rows
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, row is not None)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(size if size is not None else self.arraysize)
+        self._fetched(start, len(rows))
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows))
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(start, 0)
+            raise
+        self._fetched(start, 1)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """
+    Connection whose statements are recorded in ``query_stats``.
+
+    SQLite's own busy handler is switched off (busy_timeout = 0) and lock
+    contention is retried here instead, up to the same ``busy_timeout_ms``,
+    so the time spent waiting for locks can be measured per statement.
+    """
+
+    busy_timeout_ms = 5000
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._tracked: list[list] = []
+
+    def retry_busy(self, run) -> float:
+        """Call ``run()``, retrying while the database is locked. Returns ms waited."""
+        waited = 0.0
+        delay = 0.001
+        while True:
+            try:
+                run()
+                return waited * 1000
+            except sqlite3.OperationalError as e:
+                if not _is_busy(e) or waited * 1000 >= self.busy_timeout_ms:
+                    raise
+            time.sleep(delay)
+            waited += delay
+            delay = min(delay * 2, 0.05)
+
+    def track(self, entry: list):
+        self._tracked.append(entry)
+
+    def flush(self):
+        """Record every statement whose cursor was not reused or closed."""
+        tracked, self._tracked = self._tracked, []
+        for entry in tracked:
+            _record(entry)
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+    def commit(self):
+        function = _caller()
+        start = time.perf_counter()
+        wait = self.retry_busy(super().commit)
+        query_stats.record(function, "COMMIT", (time.perf_counter() - start) * 1000, 0, wait)
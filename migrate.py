@@ -1,57 +1,85 @@
-import sqlite3
-
-DB_PATH = "ticketapp.db"
-
-con = sqlite3.connect(DB_PATH)
-cur = con.cursor()
-
-# Check if the old table uses 'id' instead of 'ticket_id'
-cur.execute("PRAGMA table_info(tickets)")
-cols = [c[1] for c in cur.fetchall()]
-
-if "id" in cols and "ticket_id" not in cols:
-    print("🔧 Migrating old 'tickets' table to new schema...")
-
-    # Rename old table
-    cur.execute("ALTER TABLE tickets RENAME TO tickets_old")
-
-    # Create new schema with ticket_id + foreign keys
-    cur.execute("""
-        CREATE TABLE tickets (
-            ticket_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            subject TEXT NOT NULL,
-            summary TEXT NOT NULL,
-            prerequisites TEXT,
-            steps_to_replicate TEXT,
-            outcome TEXT,
-            expected_outcome TEXT,
-            status TEXT NOT NULL DEFAULT 'Open'
-                CHECK(status IN ('Open','In Progress','Closed')),
-            user_id INTEGER NULL,
-            parent_id INTEGER NULL,
-            created_by TEXT,
-            created_at TEXT NOT NULL DEFAULT (datetime('now')),
-            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL,
-            FOREIGN KEY (parent_id) REFERENCES tickets(ticket_id) ON DELETE SET NULL
-        )
-    """)
-
-    # Copy old data (filling subject from summary if needed)
-    cur.execute("""
-        INSERT INTO tickets (subject, summary, prerequisites, steps_to_replicate,
-                             outcome, expected_outcome, status, user_id, parent_id, created_by, created_at)
-        SELECT
-            COALESCE(summary, 'Untitled') AS subject,
-            summary, prerequisites, steps_to_replicate,
-            outcome, expected_outcome, status, NULL, NULL, created_by, created_at
-        FROM tickets_old
-    """)
-
-    # Drop the old table
-    cur.execute("DROP TABLE tickets_old")
-    con.commit()
-    print("✅ Migration complete.")
-else:
-    print("✅ No migration needed — schema already up to date.")
-
-con.close()
\ No newline at end of file
+"""
+Apply pending schema migrations to the ticket database.
+
+    python migrate.py                  # migrate ticketapp.db
+    python migrate.py --status         # show the schema version and what is pending
+    python migrate.py --db other.db --batch-size 20000
+    python migrate.py --rebuild-search # backfill the full-text search index
+    python migrate.py --check-counters # verify the dashboard counters (add --rebuild-counters to fix)
+    python migrate.py --rebuild-closure # recompute the ticket hierarchy table
+
+Migrations that copy tables commit in batches and resume where they stopped,
+so an interrupted run can simply be started again.
+"""
+import argparse
+
+import db
+from connection import connect
+from migrations import (
+    BATCH_SIZE,
+    check_ticket_counters,
+    current_version,
+    latest_version,
+    migrate,
+    pending,
+    rebuild_search_index,
+    rebuild_ticket_closure,
+    rebuild_ticket_counters,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations.")
+    parser.add_argument("--db", default=db.DB_PATH, help="database file (default: %(default)s)")
+    parser.add_argument("--status", action="store_true", help="only report the schema version")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument(
+        "--rebuild-search", action="store_true", help="rebuild the full-text search index"
+    )
+    parser.add_argument(
+        "--check-counters", action="store_true", help="compare ticket_counters with tickets"
+    )
+    parser.add_argument(
+        "--rebuild-counters", action="store_true", help="recompute ticket_counters"
+    )
+    parser.add_argument(
+        "--rebuild-closure", action="store_true", help="recompute ticket_closure from parent_id"
+    )
+    args = parser.parse_args()
+
+    with connect(args.db) as con:
+        print(f"Schema version: {current_version(con)} (latest {latest_version()})")
+        todo = pending(con)
+        if args.status:
+            for m in todo:
+                print(f"  pending: {m.version} {m.name}")
+            return
+
+        if not todo:
+            print("✅ No migration needed — schema already up to date.")
+        else:
+            for m in migrate(con, batch_size=args.batch_size):
+                print(f"🔧 Applied {m.version} {m.name}")
+            print(f"✅ Migration complete. Schema version: {current_version(con)}")
+
+        if args.rebuild_search:
+            rebuild_search_index(con)
+            print("✅ Search index rebuilt.")
+
+        if args.check_counters:
+            mismatches = check_ticket_counters(con)
+            for status, assignee_id, ticket_type, counted, actual in mismatches:
+                print(f"  ({status}, {assignee_id}, {ticket_type}): counted {counted}, actual {actual}")
+            print(f"{'⚠️' if mismatches else '✅'} {len(mismatches)} counter mismatches.")
+
+        if args.rebuild_counters:
+            rebuild_ticket_counters(con)
+            print("✅ Ticket counters rebuilt.")
+
+        if args.rebuild_closure:
+            rebuild_ticket_closure(con)
+            print("✅ Ticket hierarchy rebuilt.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,711 @@
+import sqlite3
+from dataclasses import dataclass
+from typing import Callable
+
+# =========================================================
+# CONFIGURATION
+# =========================================================
+# Rows copied per transaction when a migration has to rebuild a table.
+BATCH_SIZE = 5000
+
+
+# =========================================================
+# REGISTRY
+# =========================================================
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    apply: Callable
+    # Transactional migrations run inside one BEGIN IMMEDIATE ... COMMIT
+    # together with the user_version bump. Non-transactional ones manage their
+    # own commits (batched copies) and must be safe to re-run after a crash.
+    transactional: bool = True
+
+
+MIGRATIONS: list[Migration] = []
+
+
+def migration(version: int, transactional: bool = True):
+    """Register ``fn(con, batch_size)`` as the migration to schema ``version``."""
+
+    def register(fn):
+        if any(m.version == version for m in MIGRATIONS):
+            raise ValueError(f"Duplicate migration version {version}")
+        MIGRATIONS.append(Migration(version, fn.__name__, fn, transactional))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return fn
+
+    return register
+
+
+# =========================================================
+# HELPERS
+# =========================================================
+def _columns(con: sqlite3.Connection, table: str) -> list[str]:
+    return [r[1] for r in con.execute(f"PRAGMA table_info({table})")]
+
+
+def _table_exists(con: sqlite3.Connection, table: str) -> bool:
+    row = con.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()
+    return row is not None
+
+
+def copy_in_batches(
+    con: sqlite3.Connection,
+    src: str,
+    src_key: str,
+    dst: str,
+    dst_key: str,
+    columns: list[str],
+    select_exprs: list[str],
+    batch_size: int = BATCH_SIZE,
+) -> int:
+    """
+    Copy ``src`` into ``dst`` ordered by key, committing every ``batch_size``
+    rows. Progress is derived from the highest key already in ``dst``, so an
+    interrupted copy resumes where it stopped. Returns the rows copied.
+    """
+    copied = 0
+    while True:
+        last = con.execute(f"SELECT COALESCE(MAX({dst_key}), 0) FROM {dst}").fetchone()[0]
+        cur = con.execute(
+            f"""
+            INSERT INTO {dst} ({', '.join(columns)})
+            SELECT {', '.join(select_exprs)}
+            FROM {src}
+            WHERE {src_key} > ?
+            ORDER BY {src_key}
+            LIMIT ?
+            """,
+            (last, batch_size),
+        )
+        con.commit()
+        if cur.rowcount <= 0:
+            return copied
+        copied += cur.rowcount
+
+
+# =========================================================
+# MIGRATIONS
+# =========================================================
+TICKETS_SCHEMA = """
+    CREATE TABLE {name} (
+        ticket_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ticket_type TEXT NOT NULL DEFAULT 'Bug',
+        subject TEXT NOT NULL,
+        summary TEXT NOT NULL,
+        prerequisites TEXT,
+        steps_to_replicate TEXT,
+        outcome TEXT,
+        expected_outcome TEXT,
+        status TEXT NOT NULL DEFAULT 'New',
+        user_id INTEGER NULL,
+        parent_id INTEGER NULL,
+        created_by TEXT,
+        created_at TEXT NOT NULL DEFAULT (datetime('now')),
+        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL,
+        FOREIGN KEY (parent_id) REFERENCES tickets(ticket_id) ON DELETE SET NULL
+    )
+"""
+
+TICKET_COLUMNS = [
+    "ticket_id", "ticket_type", "subject", "summary", "prerequisites",
+    "steps_to_replicate", "outcome", "expected_outcome", "status",
+    "user_id", "parent_id", "created_by", "created_at",
+]
+
+
+@migration(1)
+def initial_schema(con, batch_size):
+    """Create the users and tickets tables on a fresh database."""
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash BLOB NOT NULL,
+            role TEXT NOT NULL CHECK(role IN ('user', 'admin')),
+            created_at TEXT NOT NULL
+        )
+        """
+    )
+    if not _table_exists(con, "tickets"):
+        con.execute(TICKETS_SCHEMA.format(name="tickets"))
+
+
+@migration(2, transactional=False)
+def legacy_ticket_ids(con, batch_size):
+    """
+    Rebuild very old ``tickets`` tables keyed on ``id`` (formerly migrate.py).
+
+    The old table has a restrictive status CHECK and no foreign keys, so it
+    cannot be fixed with ALTER TABLE; rows are copied in batches instead,
+    keeping their ids.
+    """
+    cols = _columns(con, "tickets")
+    if "ticket_id" in cols or "id" not in cols:
+        return
+
+    fallback = {
+        "ticket_type": "'Bug'",
+        "subject": "COALESCE(summary, 'Untitled')",
+        "created_at": "datetime('now')",
+    }
+    target = [c for c in TICKET_COLUMNS if c != "ticket_id"]
+    exprs = ["id"]
+    for c in target:
+        if c in cols:
+            exprs.append(f"COALESCE({c}, {fallback[c]})" if c in fallback else c)
+        else:
+            exprs.append(fallback.get(c, "NULL"))
+
+    # The new table references "tickets", which is still the legacy table
+    # while copying, so FK checks must be off until the swap is done.
+    con.execute("PRAGMA foreign_keys = OFF")
+    try:
+        if not _table_exists(con, "tickets_new"):
+            con.execute(TICKETS_SCHEMA.format(name="tickets_new"))
+            con.commit()
+        copy_in_batches(
+            con, "tickets", "id", "tickets_new", "ticket_id",
+            ["ticket_id"] + target, exprs, batch_size,
+        )
+        con.execute("BEGIN IMMEDIATE")
+        con.execute("DROP TABLE tickets")
+        con.execute("ALTER TABLE tickets_new RENAME TO tickets")
+        con.commit()
+    finally:
+        con.execute("PRAGMA foreign_keys = ON")
+
+
+@migration(3)
+def ticket_type_column(con, batch_size):
+    """Add ticket_type in place (formerly a full-table copy in migrate_status.py)."""
+    if "ticket_type" not in _columns(con, "tickets"):
+        con.execute("ALTER TABLE tickets ADD COLUMN ticket_type TEXT NOT NULL DEFAULT 'Bug'")
+
+
+@migration(4)
+def ticket_indexes(con, batch_size):
+    """
+    Secondary indexes for the tickets access paths: the status filter + date
+    sort in list_tickets, the unfiltered date sort, and the FK columns that
+    ON DELETE SET NULL has to look up when a user or parent ticket is deleted.
+    """
+    con.execute("CREATE INDEX IF NOT EXISTS idx_tickets_status_created ON tickets(status, created_at)")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_tickets_created_at ON tickets(created_at)")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_tickets_user_id ON tickets(user_id)")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_tickets_parent_id ON tickets(parent_id)")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_tickets_created_by ON tickets(created_by)")
+
+
+SEARCH_COLUMNS = [
+    "subject", "summary", "prerequisites",
+    "steps_to_replicate", "outcome", "expected_outcome",
+]
+
+
+@migration(5)
+def ticket_search_index(con, batch_size):
+    """
+    FTS5 index over all ticket text, stored as an external-content table on
+    top of ``tickets`` and kept in sync by triggers. Existing rows are
+    backfilled with the FTS 'rebuild' command.
+    """
+    cols = ", ".join(SEARCH_COLUMNS)
+    new_vals = ", ".join(f"new.{c}" for c in SEARCH_COLUMNS)
+    old_vals = ", ".join(f"old.{c}" for c in SEARCH_COLUMNS)
+
+    con.execute(
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS tickets_fts USING fts5(
+            {cols},
+            content='tickets',
+            content_rowid='ticket_id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+        """
+    )
+    con.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS tickets_fts_ai AFTER INSERT ON tickets BEGIN
+            INSERT INTO tickets_fts (rowid, {cols}) VALUES (new.ticket_id, {new_vals});
+        END
+        """
+    )
+    con.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS tickets_fts_ad AFTER DELETE ON tickets BEGIN
+            INSERT INTO tickets_fts (tickets_fts, rowid, {cols})
+            VALUES ('delete', old.ticket_id, {old_vals});
+        END
+        """
+    )
+    # only text edits touch the index; status / assignee changes skip it
+    con.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS tickets_fts_au AFTER UPDATE OF {cols} ON tickets BEGIN
+            INSERT INTO tickets_fts (tickets_fts, rowid, {cols})
+            VALUES ('delete', old.ticket_id, {old_vals});
+            INSERT INTO tickets_fts (rowid, {cols}) VALUES (new.ticket_id, {new_vals});
+        END
+        """
+    )
+    rebuild_search_index(con)
+
+
+def rebuild_search_index(con: sqlite3.Connection):
+    """Repopulate tickets_fts from the tickets table."""
+    con.execute("INSERT INTO tickets_fts (tickets_fts) VALUES ('rebuild')")
+
+
+@migration(6)
+def ticket_counters(con, batch_size):
+    """
+    ticket_counters holds the number of tickets per (status, assignee,
+    ticket_type), kept exact by triggers, so dashboard totals are read from a
+    handful of rows instead of aggregating tickets. assignee_id 0 means
+    unassigned (NULL cannot be part of the key).
+    """
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ticket_counters (
+            status TEXT NOT NULL,
+            assignee_id INTEGER NOT NULL,
+            ticket_type TEXT NOT NULL,
+            n INTEGER NOT NULL,
+            PRIMARY KEY (status, assignee_id, ticket_type)
+        ) WITHOUT ROWID
+        """
+    )
+    increment = """
+        INSERT INTO ticket_counters (status, assignee_id, ticket_type, n)
+        VALUES (new.status, COALESCE(new.user_id, 0), new.ticket_type, 1)
+        ON CONFLICT (status, assignee_id, ticket_type) DO UPDATE SET n = n + 1;
+    """
+    decrement = """
+        UPDATE ticket_counters SET n = n - 1
+        WHERE status = old.status
+          AND assignee_id = COALESCE(old.user_id, 0)
+          AND ticket_type = old.ticket_type;
+    """
+    con.execute(
+        f"CREATE TRIGGER IF NOT EXISTS ticket_counters_ai AFTER INSERT ON tickets BEGIN {increment} END"
+    )
+    con.execute(
+        f"CREATE TRIGGER IF NOT EXISTS ticket_counters_ad AFTER DELETE ON tickets BEGIN {decrement} END"
+    )
+    # also fires for ON DELETE SET NULL when an assignee is deleted
+    con.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS ticket_counters_au
+        AFTER UPDATE OF status, user_id, ticket_type ON tickets
+        WHEN old.status IS NOT new.status
+          OR old.user_id IS NOT new.user_id
+          OR old.ticket_type IS NOT new.ticket_type
+        BEGIN {decrement} {increment} END
+        """
+    )
+    rebuild_ticket_counters(con)
+
+
+def rebuild_ticket_counters(con: sqlite3.Connection):
+    """Recompute ticket_counters from the tickets table."""
+    con.execute("DELETE FROM ticket_counters")
+    con.execute(
+        """
+        INSERT INTO ticket_counters (status, assignee_id, ticket_type, n)
+        SELECT status, COALESCE(user_id, 0), ticket_type, COUNT(*)
+        FROM tickets
+        GROUP BY 1, 2, 3
+        """
+    )
+
+
+def check_ticket_counters(con: sqlite3.Connection) -> list:
+    """
+    Compare ticket_counters with a live aggregate of tickets. Returns
+    (status, assignee_id, ticket_type, counted, actual) for every mismatch.
+    """
+    return con.execute(
+        """
+        WITH actual AS (
+            SELECT status, COALESCE(user_id, 0) AS assignee_id, ticket_type, COUNT(*) AS n
+            FROM tickets
+            GROUP BY 1, 2, 3
+        ),
+        keys AS (
+            SELECT status, assignee_id, ticket_type FROM actual
+            UNION
+            SELECT status, assignee_id, ticket_type FROM ticket_counters
+        )
+        SELECT k.status, k.assignee_id, k.ticket_type,
+               COALESCE(c.n, 0) AS counted, COALESCE(a.n, 0) AS actual
+        FROM keys k
+        LEFT JOIN ticket_counters c USING (status, assignee_id, ticket_type)
+        LEFT JOIN actual a USING (status, assignee_id, ticket_type)
+        WHERE COALESCE(c.n, 0) != COALESCE(a.n, 0)
+        """
+    ).fetchall()
+
+
+# Rows kept in the data_changes log; caches lagging further behind drop
+# everything instead of replaying it.
+CHANGE_LOG_KEEP = 10000
+
+
+@migration(7)
+def data_change_log(con, batch_size):
+    """
+    data_changes is an append-only log of changed ticket and user ids,
+    written by triggers in the same transaction as the change. In-process
+    caches read the entries after their last seen seq to invalidate exactly
+    the rows another process (or connection) modified. The log prunes itself.
+    """
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS data_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            entity TEXT NOT NULL,
+            entity_id INTEGER NOT NULL
+        )
+        """
+    )
+    for table, entity, key in (("tickets", "ticket", "ticket_id"), ("users", "user", "id")):
+        for suffix, event, row in (("ai", "INSERT", "new"), ("au", "UPDATE", "new"), ("ad", "DELETE", "old")):
+            con.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS data_changes_{table}_{suffix}
+                AFTER {event} ON {table} BEGIN
+                    INSERT INTO data_changes (entity, entity_id) VALUES ('{entity}', {row}.{key});
+                END
+                """
+            )
+    con.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS data_changes_prune
+        AFTER INSERT ON data_changes WHEN new.seq % 1000 = 0 BEGIN
+            DELETE FROM data_changes WHERE seq <= new.seq - {CHANGE_LOG_KEEP};
+        END
+        """
+    )
+
+
+
+@migration(8)
+def login_sessions(con, batch_size):
+    """
+    Persistent sign-in sessions. Only a SHA-256 of each random token is
+    stored, so the table is useless to someone who can read the database;
+    lookups are a single primary-key probe on that hash.
+    """
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sessions (
+            token_hash BLOB PRIMARY KEY,
+            user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            created_at INTEGER NOT NULL,
+            expires_at INTEGER NOT NULL
+        ) WITHOUT ROWID
+        """
+    )
+    con.execute("CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON sessions(user_id)")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions(expires_at)")
+
+
+@migration(9)
+def ticket_closure(con, batch_size):
+    """
+    ticket_closure holds one row per (ancestor, descendant) pair of the
+    parent_id hierarchy, including each ticket paired with itself at depth
+    0, so ancestors, descendants and cycle checks are single indexed
+    lookups. Triggers keep it in step on insert, reparent and delete, and
+    refuse an update that would make a ticket its own ancestor.
+    """
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ticket_closure (
+            ancestor_id INTEGER NOT NULL,
+            descendant_id INTEGER NOT NULL,
+            depth INTEGER NOT NULL,
+            PRIMARY KEY (ancestor_id, descendant_id)
+        ) WITHOUT ROWID
+        """
+    )
+    con.execute(
+        "CREATE INDEX IF NOT EXISTS idx_ticket_closure_descendant ON ticket_closure(descendant_id, depth)"
+    )
+    rebuild_ticket_closure(con)
+
+    con.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS ticket_closure_ai AFTER INSERT ON tickets BEGIN
+            INSERT INTO ticket_closure (ancestor_id, descendant_id, depth)
+            VALUES (new.ticket_id, new.ticket_id, 0);
+            INSERT INTO ticket_closure (ancestor_id, descendant_id, depth)
+            SELECT ancestor_id, new.ticket_id, depth + 1
+            FROM ticket_closure WHERE descendant_id = new.parent_id;
+        END
+        """
+    )
+    con.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS ticket_closure_bu
+        BEFORE UPDATE OF parent_id ON tickets
+        WHEN new.parent_id IS NOT NULL AND old.parent_id IS NOT new.parent_id
+        BEGIN
+            SELECT RAISE(ABORT, 'ticket hierarchy cycle')
+            WHERE EXISTS (
+                SELECT 1 FROM ticket_closure
+                WHERE ancestor_id = new.ticket_id AND descendant_id = new.parent_id
+            );
+        END
+        """
+    )
+    # also fires for ON DELETE SET NULL when a parent is deleted
+    con.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS ticket_closure_au
+        AFTER UPDATE OF parent_id ON tickets
+        WHEN old.parent_id IS NOT new.parent_id
+        BEGIN
+            DELETE FROM ticket_closure
+            WHERE descendant_id IN (SELECT descendant_id FROM ticket_closure WHERE ancestor_id = new.ticket_id)
+              AND ancestor_id NOT IN (SELECT descendant_id FROM ticket_closure WHERE ancestor_id = new.ticket_id);
+            INSERT INTO ticket_closure (ancestor_id, descendant_id, depth)
+            SELECT a.ancestor_id, d.descendant_id, a.depth + d.depth + 1
+            FROM ticket_closure a, ticket_closure d
+            WHERE a.descendant_id = new.parent_id AND d.ancestor_id = new.ticket_id;
+        END
+        """
+    )
+    con.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS ticket_closure_ad AFTER DELETE ON tickets BEGIN
+            DELETE FROM ticket_closure WHERE descendant_id = old.ticket_id;
+            DELETE FROM ticket_closure WHERE ancestor_id = old.ticket_id;
+        END
+        """
+    )
+
+
+def rebuild_ticket_closure(con: sqlite3.Connection):
+    """
+    Recompute ticket_closure from parent_id with a recursive CTE. A walk
+    stops when it comes back to where it started, so parent_id cycles left
+    over from before the triggers existed cannot make it loop forever.
+    """
+    con.execute("DELETE FROM ticket_closure")
+    con.execute(
+        """
+        INSERT OR IGNORE INTO ticket_closure (ancestor_id, descendant_id, depth)
+        WITH RECURSIVE walk(ancestor_id, descendant_id, depth) AS (
+            SELECT ticket_id, ticket_id, 0 FROM tickets
+            UNION ALL
+            SELECT w.ancestor_id, t.ticket_id, w.depth + 1
+            FROM walk w JOIN tickets t ON t.parent_id = w.descendant_id
+            WHERE t.ticket_id <> w.ancestor_id
+        )
+        SELECT ancestor_id, descendant_id, depth FROM walk
+        """
+    )
+
+
+# Parse a stored TEXT timestamp (either format the app has written, or ISO
+# 8601 with an offset) to epoch seconds; unparseable values fall back to now.
+_EPOCH_NOW = "CAST(strftime('%s', 'now') AS INTEGER)"
+_EPOCH_OF_CREATED_AT = f"COALESCE(CAST(strftime('%s', created_at) AS INTEGER), {_EPOCH_NOW})"
+
+
+@migration(10, transactional=False)
+def epoch_timestamps(con, batch_size):
+    """
+    Integer epoch columns for time-window queries: created_ts and updated_ts
+    on tickets, backfilled from created_at in resumable batches. created_at
+    on tickets and users is normalised to 'YYYY-MM-DD HH:MM:SS' (UTC) on the
+    way. The app sets both columns on every write; triggers fill them in for
+    anything else (older processes, ON DELETE SET NULL, manual SQL).
+    """
+    # checked under the write lock: another process may be adding the
+    # columns at the same moment
+    con.execute("BEGIN IMMEDIATE")
+    if "created_ts" not in _columns(con, "tickets"):
+        con.execute("ALTER TABLE tickets ADD COLUMN created_ts INTEGER")
+        con.execute("ALTER TABLE tickets ADD COLUMN updated_ts INTEGER")
+        con.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS tickets_created_ts
+            AFTER INSERT ON tickets WHEN new.created_ts IS NULL BEGIN
+                UPDATE tickets
+                SET created_ts = {_EPOCH_OF_CREATED_AT},
+                    updated_ts = COALESCE(new.updated_ts, {_EPOCH_OF_CREATED_AT})
+                WHERE ticket_id = new.ticket_id;
+            END
+            """
+        )
+        con.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS tickets_updated_ts
+            AFTER UPDATE ON tickets
+            WHEN new.updated_ts IS old.updated_ts
+             AND (new.updated_ts IS NULL OR new.updated_ts < {_EPOCH_NOW})
+            BEGIN
+                UPDATE tickets SET updated_ts = {_EPOCH_NOW} WHERE ticket_id = new.ticket_id;
+            END
+            """
+        )
+    con.commit()
+
+    last = 0
+    while True:
+        upper = con.execute(
+            "SELECT MAX(ticket_id) FROM (SELECT ticket_id FROM tickets WHERE ticket_id > ? ORDER BY ticket_id LIMIT ?)",
+            (last, batch_size),
+        ).fetchone()[0]
+        if upper is None:
+            break
+        con.execute(
+            f"""
+            UPDATE tickets
+            SET created_ts = {_EPOCH_OF_CREATED_AT},
+                updated_ts = COALESCE(updated_ts, {_EPOCH_OF_CREATED_AT}),
+                created_at = COALESCE(datetime(created_at), created_at)
+            WHERE ticket_id > ? AND ticket_id <= ? AND created_ts IS NULL
+            """,
+            (last, upper),
+        )
+        con.commit()
+        last = upper
+
+    con.execute("BEGIN IMMEDIATE")
+    con.execute(
+        "UPDATE users SET created_at = datetime(created_at) WHERE created_at IS NOT datetime(created_at) AND datetime(created_at) IS NOT NULL"
+    )
+    # the TEXT created_at indexes from migration 4 are replaced, not kept
+    con.execute("DROP INDEX IF EXISTS idx_tickets_status_created")
+    con.execute("DROP INDEX IF EXISTS idx_tickets_created_at")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_tickets_status_created_ts ON tickets(status, created_ts)")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_tickets_created_ts ON tickets(created_ts)")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_tickets_updated_ts ON tickets(updated_ts)")
+    con.commit()
+
+
+@migration(11)
+def ticket_version(con, batch_size):
+    """
+    A version counter on tickets for optimistic concurrency: every change to
+    a ticket raises it by one, so a write can require the version it was
+    based on. The app bumps it itself; the trigger covers every other
+    update (ON DELETE SET NULL, older processes, manual SQL).
+    """
+    if "version" not in _columns(con, "tickets"):
+        con.execute("ALTER TABLE tickets ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+    # tickets_updated_ts must ignore the version trigger's own bump, or an
+    # explicit updated_ts (e.g. a backfill) would be overwritten with now
+    con.execute("DROP TRIGGER IF EXISTS tickets_updated_ts")
+    con.execute(
+        f"""
+        CREATE TRIGGER tickets_updated_ts
+        AFTER UPDATE ON tickets
+        WHEN new.updated_ts IS old.updated_ts
+         AND new.version IS old.version
+         AND (new.updated_ts IS NULL OR new.updated_ts < {_EPOCH_NOW})
+        BEGIN
+            UPDATE tickets SET updated_ts = {_EPOCH_NOW} WHERE ticket_id = new.ticket_id;
+        END
+        """
+    )
+    con.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS tickets_version
+        AFTER UPDATE ON tickets WHEN new.version IS old.version BEGIN
+            UPDATE tickets SET version = old.version + 1 WHERE ticket_id = new.ticket_id;
+        END
+        """
+    )
+
+
+
+@migration(12)
+def ticket_history(con, batch_size):
+    """
+    Append-only change history: one row per ticket write made through the
+    app, holding only the fields it changed, as the values they had before
+    (long text as a line diff, see history.py). Keyed and clustered by
+    (ticket_id, version) so a ticket's history is read newest first from
+    one index range. Rows outlive the ticket, like an audit log.
+    """
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ticket_history (
+            ticket_id INTEGER NOT NULL,
+            version INTEGER NOT NULL,
+            changed_ts INTEGER NOT NULL,
+            changed_by TEXT,
+            changes TEXT NOT NULL,
+            PRIMARY KEY (ticket_id, version)
+        ) WITHOUT ROWID
+        """
+    )
+
+
+@migration(13)
+def session_resume_tokens(con, batch_size):
+    """
+    A second, one-time token per session for the browser URL (see
+    auth.issue_resume_token), so the session token itself never leaves the
+    server. NULLs are not unique, so sessions without one don't collide.
+    """
+    if "resume_hash" not in _columns(con, "sessions"):
+        con.execute("ALTER TABLE sessions ADD COLUMN resume_hash BLOB")
+    con.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_sessions_resume_hash ON sessions(resume_hash)")
+
+# =========================================================
+# RUNNER
+# =========================================================
+def current_version(con: sqlite3.Connection) -> int:
+    return con.execute("PRAGMA user_version").fetchone()[0]
+
+
+def latest_version() -> int:
+    return MIGRATIONS[-1].version if MIGRATIONS else 0
+
+
+def pending(con: sqlite3.Connection) -> list[Migration]:
+    """Return migrations newer than the database's user_version."""
+    version = current_version(con)
+    return [m for m in MIGRATIONS if m.version > version]
+
+
+def migrate(con: sqlite3.Connection, batch_size: int = BATCH_SIZE) -> list[Migration]:
+    """Apply all pending migrations in order and return the ones applied."""
+    applied = []
+    for m in pending(con):
+        if m.transactional:
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                # another process may have migrated while we waited for the lock
+                if current_version(con) >= m.version:
+                    con.rollback()
+                    continue
+                m.apply(con, batch_size)
+                con.execute(f"PRAGMA user_version = {m.version}")
+                con.commit()
+            except BaseException:
+                con.rollback()
+                raise
+        else:
+            if current_version(con) >= m.version:
+                continue
+            m.apply(con, batch_size)
+            # never move user_version back past what another process applied
+            con.execute("BEGIN IMMEDIATE")
+            if current_version(con) < m.version:
+                con.execute(f"PRAGMA user_version = {m.version}")
+            con.commit()
+        applied.append(m)
+    return applied
@@ -1,12 +1,23 @@
 # pages/Admin.py
+import contextlib
+import os
+
+import pandas as pd
 import streamlit as st
+
+import instrumentation
+import profiler
 from db import (
     init_db,
     list_users_full,
     create_user,
     update_user_role,
     delete_user,
+    export_tickets,
+    new_export_file,
+    OPEN_STATUSES,
 )
+from auth import active_session_counts, revoke_user_sessions
 from sidebar import require_admin, hide_login_link_if_logged_in, get_current_user
 
 st.set_page_config(page_title="User Administration", page_icon="🛠️", layout="wide")
@@ -15,7 +26,7 @@ init_db()
 # -------------------------------------------------
 # Auth & role check
 # -------------------------------------------------
-current_user = st.session_state.get("user")
+current_user = get_current_user()
 if not current_user:
     st.switch_page("pages/Login.py")
 
@@ -71,13 +82,15 @@ if not users:
     st.info("No users found.")
 else:
     # Display users in a table-like layout with controls
-    header_cols = st.columns([1, 3, 2, 3, 2, 2])
+    sessions = active_session_counts()
+    header_cols = st.columns([1, 3, 2, 3, 2, 2, 2])
     header_cols[0].markdown("**ID**")
     header_cols[1].markdown("**Username**")
     header_cols[2].markdown("**Role**")
     header_cols[3].markdown("**Created at**")
     header_cols[4].markdown("**Change role**")
-    header_cols[5].markdown("**Delete**")
+    header_cols[5].markdown("**Sessions**")
+    header_cols[6].markdown("**Delete**")
 
     st.write("---")
 
@@ -87,7 +100,7 @@ else:
         urole = u["role"]
         ucreated = u["created_at"]
 
-        cols = st.columns([1, 3, 2, 3, 2, 2])
+        cols = st.columns([1, 3, 2, 3, 2, 2, 2])
         cols[0].write(uid)
         cols[1].write(uname)
         cols[2].write(urole)
@@ -107,8 +120,17 @@ else:
                     st.success(f"Updated role for '{uname}' to '{new_role_sel}'.")
                     st.rerun()
 
-        # Delete user (but not yourself)
+        # Active sign-ins + revoke them all
         with cols[5]:
+            n_sessions = sessions.get(uid, 0)
+            st.caption(f"{n_sessions} active")
+            if n_sessions and st.button("Sign out", key=f"revoke_{uid}", use_container_width=True):
+                revoke_user_sessions(uid)
+                st.success(f"Signed '{uname}' out of {n_sessions} session(s).")
+                st.rerun()
+
+        # Delete user (but not yourself)
+        with cols[6]:
             if uid == current_user["id"]:
                 st.caption("Cannot delete yourself")
             else:
@@ -129,4 +151,154 @@ else:
         with c2:
             if st.button("❌ Cancel"):
                 st.session_state["confirm_delete_user"] = None
-                st.rerun()
\ No newline at end of file
+                st.rerun()
+
+st.divider()
+
+# -------------------------------------------------
+# Section 3: Export tickets
+# -------------------------------------------------
+st.subheader("Export tickets")
+
+with st.form("export_form"):
+    exp_format = st.selectbox("Format", ["csv", "jsonl"])
+    exp_open_only = st.checkbox("Open tickets only", value=False)
+    exp_submitted = st.form_submit_button("📦 Prepare export")
+
+if exp_submitted:
+    # Written batch by batch to a file in the app's export directory, so
+    # building the export does not hold all tickets in memory. Only the
+    # latest export of this session is kept; the previous file is removed
+    # first, and files abandoned by other sessions are aged out.
+    previous = st.session_state.pop("export_file", None)
+    if previous:
+        with contextlib.suppress(OSError):
+            os.remove(previous[0])
+    with new_export_file(exp_format) as out:
+        count = export_tickets(
+            out,
+            exp_format,
+            statuses=sorted(OPEN_STATUSES) if exp_open_only else None,
+        )
+    st.session_state["export_file"] = (out.name, exp_format, count)
+
+export_file = st.session_state.get("export_file")
+if export_file and not os.path.exists(export_file[0]):
+    # aged out while this session was idle
+    del st.session_state["export_file"]
+    export_file = None
+if export_file:
+    path, fmt, count = export_file
+    st.caption(f"{count} tickets ready.")
+    with open(path, "rb") as f:
+        st.download_button(
+            f"⬇ Download tickets.{fmt}",
+            data=f,
+            file_name=f"tickets.{fmt}",
+            mime="text/csv" if fmt == "csv" else "application/x-ndjson",
+        )
+
+st.divider()
+
+# -------------------------------------------------
+# Section 4: Query diagnostics
+# -------------------------------------------------
+st.subheader("Query diagnostics")
+
+if not instrumentation.ENABLED:
+    st.caption(
+        "Query instrumentation is off. Turn it on to record every statement "
+        "(set TICKETAPP_QUERY_STATS=1 to have it on from startup)."
+    )
+    if st.button("▶ Start recording"):
+        instrumentation.enable()  # pooled connections switch over as they are reused
+        st.rerun()
+else:
+    d1, d2, d3 = st.columns([1, 1, 4])
+    with d1:
+        if st.button("🔄 Reset stats"):
+            instrumentation.query_stats.reset()
+            st.rerun()
+    with d2:
+        if st.button("⏹ Stop recording"):
+            instrumentation.disable()
+            st.rerun()
+
+    order = st.selectbox("Top queries by", ["total_ms", "p95_ms", "calls", "max_ms", "lock_wait_ms"])
+    top = instrumentation.query_stats.top(20, by=order)
+    if top:
+        st.dataframe(pd.DataFrame(top), use_container_width=True, hide_index=True)
+    else:
+        st.info("No queries recorded yet.")
+
+    st.markdown(
+        f"**Slow queries** (≥ {instrumentation.query_stats.slow_ms:g} ms, "
+        f"logged to `{instrumentation.query_stats.slow_log}`)"
+    )
+    slow = instrumentation.read_slow_log(50)
+    if slow:
+        st.dataframe(pd.DataFrame(slow), use_container_width=True, hide_index=True)
+    else:
+        st.caption("None so far.")
+
+st.divider()
+
+# -------------------------------------------------
+# Section 5: Page profiler
+# -------------------------------------------------
+st.subheader("Page profiler")
+
+if not profiler.ENABLED:
+    st.caption(
+        "Page profiling is off. Turn it on to time every rerun of Home, Tickets "
+        "and View Ticket phase by phase (TICKETAPP_PROFILE=1 turns it on at startup)."
+    )
+    p_memory = st.checkbox(
+        "Also trace memory allocations (slower; counts every session in the process)"
+    )
+    if st.button("▶ Start profiling"):
+        profiler.enable(memory=p_memory)
+        st.rerun()
+else:
+    p1, p2, p3 = st.columns([1, 1, 4])
+    with p1:
+        if st.button("🔄 Reset profile"):
+            profiler.page_stats.reset()
+            st.rerun()
+    with p2:
+        if st.button("⏹ Stop profiling"):
+            profiler.disable()
+            st.rerun()
+
+    if profiler.TRACE_MEMORY:
+        st.caption(
+            "Memory figures (alloc_kb, peak_kb) come from tracemalloc, which sees the "
+            "whole process: they include anything other sessions allocated at the same "
+            "time, so they are only exact while a single session is active."
+        )
+    summary = profiler.page_stats.summary()
+    if summary:
+        st.dataframe(pd.DataFrame(summary), use_container_width=True, hide_index=True)
+    else:
+        st.info("No page reruns recorded yet.")
+
+    st.markdown(f"**Recent reruns** (logged to `{profiler.page_stats.log_path}`)")
+    recent = profiler.page_stats.recent(50)
+    if recent:
+        st.dataframe(
+            pd.DataFrame(
+                {
+                    "at": r["at"],
+                    "page": r["page"],
+                    "total_ms": r["total_ms"],
+                    "interrupted": r["interrupted"],
+                    "phases": ", ".join(f"{p['name']} {p['ms']:.1f}" for p in r["phases"]),
+                    "peak_kb": r.get("peak_kb"),
+                }
+                for r in recent
+            ),
+            use_container_width=True,
+            hide_index=True,
+        )
+    else:
+        st.caption("None so far.")
@@ -1,7 +1,7 @@
 import streamlit as st
 from db import init_db
-from auth import verify_user
-from sidebar import is_logged_in, hide_other_pages_on_login
+from auth import HashingBusyError, verify_user
+from sidebar import is_logged_in, hide_other_pages_on_login, sign_in
 
 st.set_page_config(page_title="Sign in", page_icon="🔐", layout="centered")
 init_db()
@@ -24,9 +24,13 @@ if submitted:
     if not username.strip() or not password:
         st.warning("Please enter both username and password.")
     else:
-        user = verify_user(username.strip(), password)
+        try:
+            user = verify_user(username.strip(), password)
+        except HashingBusyError as e:
+            st.warning(str(e))
+            st.stop()
         if user:
-            st.session_state.user = user
+            sign_in(user)
             st.success(f"Welcome, {user['username']}!")
             st.switch_page("Home.py")
         else:
@@ -4,39 +4,32 @@ from db import (
     init_db,
     list_users,
     create_ticket,
-    list_tickets,
-    get_ticket,          # still used for detail in future if needed
-    update_ticket_status,
+    list_tickets_page,
+    missing_required_fields,
+    bulk_update_status,
+    bulk_assign,
+    bulk_set_parent,
+    bulk_delete,
+    RELEVANCE,
+    SORT_COLUMNS,
+    STATUS_CHOICES,
+    TICKET_TYPES,
 )
 
-from sidebar import require_login, hide_login_link_if_logged_in, hide_admin_page_for_non_admin, get_current_user
-
-# ---- Status options (for browsing/updating only) ----
-STATUS_CHOICES = [
-    "New",
-    "Product Backlog - Pending (B)",
-    "Test: Sprint Test",
-    "Test: Build Ready",
-    "Test: Regression",
-    "Released",
-    "Open",
-    "In Progress",
-    "Closed",
-]
-
-# ---- Ticket types ----
-TICKET_TYPES = [
-    "Bug",
-    "Test Case",
-]
+from sidebar import require_login, hide_login_link_if_logged_in, hide_admin_page_for_non_admin, get_current_user, is_admin
+import profiler
+from writer import WriterBusyError
+from ticket_list import CARD_PAGE_SIZE, TABLE_PAGE_SIZE, open_ticket, render_cards, render_table
 
 # -------------------------------------------------
 # Boot
 # -------------------------------------------------
 st.set_page_config(page_title="Tickets", page_icon="📋", layout="wide")
 init_db()
+profiler.start("Tickets", st.session_state)
 
 # Auth and SAidebar clean up
+profiler.phase("auth")
 require_login()
 hide_login_link_if_logged_in()
 hide_admin_page_for_non_admin()
@@ -72,7 +65,22 @@ if not st.session_state.show_form:
             STATUS_CHOICES,
             default=["New", "Open", "In Progress"],
         )
-        f_search = st.text_input("Search", placeholder="subject, summary, expected outcome…")
+        f_search = st.text_input("Search", placeholder="words or prefixes in any ticket field…")
+        f_created = st.date_input("Created between", value=(), format="YYYY-MM-DD")
+        f_updated = st.date_input("Updated between", value=(), format="YYYY-MM-DD")
+        st.divider()
+        st.subheader("View")
+        f_layout = st.radio("Layout", ["Table", "Cards"], horizontal=True)
+        # while searching, results are ranked by relevance unless another order is picked
+        f_sort = st.selectbox(
+            "Sort by",
+            ([RELEVANCE] if f_search.strip() else []) + list(SORT_COLUMNS),
+            format_func=lambda k: {"id": "Ticket ID"}.get(k, k.capitalize()),
+        )
+        f_descending = st.toggle("Descending", value=True)
+        f_multi = f_layout == "Table" and st.toggle(
+            "Select rows for bulk actions", help="Off: clicking a row opens the ticket."
+        )
         st.divider()
         if st.button("➕ New Ticket", use_container_width=True):
             st.session_state.show_form = True
@@ -89,42 +97,108 @@ else:
 if not st.session_state.show_form:
     st.title("📋 Tickets")
 
-    rows = list_tickets(statuses=f_status, search=f_search)
+    # Keyset pagination: keep the cursor of every page visited so far so
+    # "Previous" can step back. Changing the filters starts again at page 1.
+    # date_input yields () / (start,) / (start, end) while a range is picked
+    created_from, created_to = (tuple(f_created) + (None, None))[:2]
+    updated_from, updated_to = (tuple(f_updated) + (None, None))[:2]
+    date_filters = dict(
+        created_from=created_from,
+        created_to=created_to,
+        updated_from=updated_from,
+        updated_to=updated_to,
+    )
+
+    filter_key = (tuple(f_status), f_search, tuple(date_filters.values()), f_layout, f_sort, f_descending)
+    if st.session_state.get("tickets_filter_key") != filter_key:
+        st.session_state.tickets_filter_key = filter_key
+        st.session_state.tickets_cursors = [None]
+    cursors = st.session_state.tickets_cursors
+
+    profiler.phase("db")
+    rows, next_cursor = list_tickets_page(
+        statuses=f_status,
+        search=f_search,
+        after=cursors[-1],
+        limit=TABLE_PAGE_SIZE if f_layout == "Table" else CARD_PAGE_SIZE,
+        sort=f_sort,
+        descending=f_descending,
+        **date_filters,
+    )
+    profiler.phase("render")
+    # one table key per page, filter set and selection mode, so a selection
+    # never carries over to rows it was not made on
+    table_key = f"tickets_table_{abs(hash((filter_key, f_multi, len(cursors))))}"
+    selected = []
     if not rows:
         st.info("No tickets match your filters.")
+    elif f_layout == "Table":
+        st.caption(
+            f"Page {len(cursors)} — "
+            + ("tick rows for the bulk actions below." if f_multi else "click a row to open the ticket.")
+        )
+        selected = render_table(rows, key=table_key, multi_select=f_multi)
+        if selected and not f_multi:
+            st.session_state.pop(table_key, None)
+            open_ticket(selected[0])
     else:
-        st.caption("Click ‘View’ to open a ticket in a detailed view page.")
-
-        for row in rows:
-            tid = row["ticket_id"]
-            ticket_type = row["ticket_type"]
-            subject = row["subject"]
-            status = row["status"]
-            created_by = row["created_by"]
-            created_at = row["created_at"]
-            assigned_to = row["assigned_to"]
-
-            with st.container():
-                c1, c2, c3, c4, c5 = st.columns([4, 2, 2, 2, 1])
-
-                with c1:
-                    st.markdown(
-                        f"**[{ticket_type}] #{tid} — {subject}**  \n"
-                        f"<small>by {created_by or '—'}</small>",
-                        unsafe_allow_html=True,
-                    )
-                with c2:
-                    st.markdown(f"**Status:** `{status}`")
-                with c3:
-                    st.markdown(f"**Assigned:** {assigned_to or '—'}")
-                with c4:
-                    st.markdown(f"**Created:** {created_at}")
-                with c5:
-                    if st.button("View", key=f"view_{tid}"):
-                        st.session_state.view_ticket_id = tid
-                        st.switch_page("pages/View_Ticket.py")
-
-                st.markdown("---")
+        st.caption(f"Page {len(cursors)} — click ‘View’ to open a ticket in a detailed view page.")
+        selected = render_cards(rows)
+
+    # ---- Bulk actions: selected rows on this page, or everything matching the filters ----
+    with st.expander(f"Bulk actions ({len(selected)} selected)"):
+        apply_to_filter = st.checkbox("Apply to all tickets matching the current filters")
+        actions = ["Set status", "Assign to", "Set parent"] + (["Delete"] if is_admin() else [])
+        action = st.selectbox("Action", actions)
+
+        if action == "Set status":
+            bulk_status = st.selectbox("New status", STATUS_CHOICES)
+        elif action == "Assign to":
+            users = list_users()
+            bulk_user_names = ["— Unassigned —"] + [u["username"] for u in users]
+            bulk_user_ids = [None] + [u["id"] for u in users]
+            bulk_user = st.selectbox("Assignee", bulk_user_names)
+        elif action == "Set parent":
+            bulk_parent_input = st.text_input("Parent ticket ID (blank to detach)", placeholder="e.g., 42")
+
+        if st.button("Apply", type="primary", disabled=not (selected or apply_to_filter)):
+            target = (
+                {"statuses": f_status, "search": f_search, **date_filters}
+                if apply_to_filter
+                else selected
+            )
+            changed_by = (current_user or {}).get("username")
+            try:
+                if action == "Set status":
+                    count = bulk_update_status(target, bulk_status, changed_by=changed_by)
+                elif action == "Assign to":
+                    count = bulk_assign(target, bulk_user_ids[bulk_user_names.index(bulk_user)], changed_by=changed_by)
+                elif action == "Set parent":
+                    parent = bulk_parent_input.strip()
+                    # only a blank field detaches; a typo must not clear every parent
+                    if parent and not parent.isdigit():
+                        raise ValueError(f"'{parent}' is not a ticket ID. Leave the field blank to detach.")
+                    count = bulk_set_parent(target, int(parent) if parent else None, changed_by=changed_by)
+                else:
+                    count = bulk_delete(target)
+            except (ValueError, WriterBusyError) as e:
+                st.error(str(e))
+            else:
+                for tid in selected:
+                    st.session_state.pop(f"select_{tid}", None)
+                st.session_state.pop(table_key, None)
+                st.toast(f"{action}: {count} ticket(s) updated.")
+                st.rerun()
+
+    prev_col, next_col = st.columns(2)
+    with prev_col:
+        if len(cursors) > 1 and st.button("⬅ Previous", use_container_width=True):
+            cursors.pop()
+            st.rerun()
+    with next_col:
+        if next_cursor and st.button("Next ➡", use_container_width=True):
+            cursors.append(next_cursor)
+            st.rerun()
 
 # -------------------------------------------------
 # MODE 2: Create
@@ -237,43 +311,41 @@ else:
 
     if submitted:
         # Validate required fields depending on ticket type
-        if ticket_type == "Test Case":
-            required_map = {
-                "Subject": subject,
-                "Preconditions / Requirements": prerequisites,
-                "Test Steps": steps_to_replicate,
-                "Pass Criteria": expected_outcome,
-            }
-        else:  # Bug
-            required_map = {
-                "Subject": subject,
-                "Summary": summary,
-                "Prerequisites": prerequisites,
-                "Steps to replicate": steps_to_replicate,
-                "Outcome": outcome,
-                "Expected Outcome": expected_outcome,
-            }
-
-        missing = [name for name, val in required_map.items() if not val.strip()]
+        missing = missing_required_fields(
+            ticket_type,
+            {
+                "subject": subject,
+                "summary": summary,
+                "prerequisites": prerequisites,
+                "steps_to_replicate": steps_to_replicate,
+                "outcome": outcome,
+                "expected_outcome": expected_outcome,
+            },
+        )
 
         if missing:
             st.error("Please fill in: " + ", ".join(missing))
         else:
             # Always set status to "New" on creation
-            new_id = create_ticket(
-                ticket_type=ticket_type,
-                subject=subject.strip(),
-                summary=summary.strip(),
-                prerequisites=prerequisites.strip(),
-                steps_to_replicate=steps_to_replicate.strip(),
-                outcome=outcome.strip(),
-                expected_outcome=expected_outcome.strip(),
-                created_by=created_by,
-                user_id=assigned_user_id,
-                parent_id=parent_id,
-                status="New",
-            )
-
-            st.success(f"{ticket_type} #{new_id} created successfully.")
-            st.session_state.show_form = False
-            st.rerun()
\ No newline at end of file
+            try:
+                new_id = create_ticket(
+                    ticket_type=ticket_type,
+                    subject=subject.strip(),
+                    summary=summary.strip(),
+                    prerequisites=prerequisites.strip(),
+                    steps_to_replicate=steps_to_replicate.strip(),
+                    outcome=outcome.strip(),
+                    expected_outcome=expected_outcome.strip(),
+                    created_by=created_by,
+                    user_id=assigned_user_id,
+                    parent_id=parent_id,
+                    status="New",
+                )
+            except (ValueError, WriterBusyError) as e:
+                st.error(str(e))
+            else:
+                st.success(f"{ticket_type} #{new_id} created successfully.")
+                st.session_state.show_form = False
+                st.rerun()
+
+profiler.finish()
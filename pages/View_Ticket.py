@@ -1,11 +1,18 @@
+import difflib
+
 import streamlit as st
 from db import (
     init_db,
     get_ticket,
-    update_ticket_status,
-    update_ticket,
+    patch_ticket,
     delete_ticket,
     list_users,
+    get_ticket_tree,
+    list_ticket_history,
+    STATUS_CHOICES,
+    TICKET_TYPES,
+    PATCHABLE_FIELDS,
+    TicketConflictError,
 )
 
 from sidebar import (
@@ -15,33 +22,20 @@ from sidebar import (
     get_current_user,
     is_admin,  # imported but then shadowed by a bool below
 )
+import profiler
+from writer import WriterBusyError
 
-# -------------------------------------------------
-# Config / constants
-# -------------------------------------------------
-STATUS_CHOICES = [
-    "New",
-    "Product Backlog - Pending (B)",
-    "Test: Sprint Test",
-    "Test: Build Ready",
-    "Test: Regression",
-    "Released",
-    "Open",
-    "In Progress",
-    "Closed",
-]
-
-TICKET_TYPES = [
-    "Bug",
-    "Test Case",
-]
+# Hierarchy nodes shown as buttons; each is a widget, so a huge tree is cut short.
+HIERARCHY_NODES = 50
 
 st.set_page_config(page_title="View Ticket", page_icon="🔍", layout="wide")
 init_db()
+profiler.start("View_Ticket", st.session_state)
 
 # -------------------------------------------------
 # Auth + role helpers
 # -------------------------------------------------
+profiler.phase("auth")
 require_login()
 hide_login_link_if_logged_in()
 hide_admin_page_for_non_admin()
@@ -64,6 +58,7 @@ st.markdown(
 # -------------------------------------------------
 # Get current ticket
 # -------------------------------------------------
+profiler.phase("db")
 tid = st.session_state.get("view_ticket_id")
 if not tid:
     st.error("No ticket selected.")
@@ -95,6 +90,7 @@ is_assigned = (
 
 can_edit = is_admin or is_creator or is_assigned
 
+profiler.phase("render")
 st.title(f"[{ticket_type}] Ticket #{tid}")
 st.caption(f"Created by {t['created_by'] or '—'} on {t['created_at']}")
 
@@ -118,10 +114,12 @@ with top_c2:
         if st.session_state.edit_mode:
             if st.button("🔒 View only", use_container_width=True):
                 st.session_state.edit_mode = False
+                st.session_state.pop("edit_base", None)
                 st.rerun()
         else:
             if st.button("✏️ Edit ticket", use_container_width=True):
                 st.session_state.edit_mode = True
+                st.session_state.pop("edit_base", None)
                 st.rerun()
     else:
         st.caption("You can view this ticket but not edit it.")
@@ -157,14 +155,30 @@ if not (st.session_state.edit_mode and can_edit):
             st.write(current_status)
             new_status = current_status
 
+    # the version this status box was rendered from, so a save after
+    # someone else's change is rejected instead of overwriting it
+    seen_version_key = f"seen_version_{tid}"
     with cs2:
         if can_edit:
             if st.button("💾 Save Status"):
-                update_ticket_status(tid, new_status)
-                st.success("Status updated.")
-                st.rerun()
+                try:
+                    patch_ticket(
+                        tid,
+                        {"status": new_status},
+                        st.session_state.get(seen_version_key, t["version"]),
+                        changed_by=username,
+                    )
+                except TicketConflictError as e:
+                    st.error(f"{e} The latest version is shown below; check it and save again.")
+                except WriterBusyError as e:
+                    st.error(str(e))
+                else:
+                    st.success("Status updated.")
+                    st.session_state.pop(seen_version_key, None)
+                    st.rerun()
         else:
             st.caption("Only the creator, assignee, or an admin can change the status.")
+    st.session_state[seen_version_key] = t["version"]
 
     st.divider()
 
@@ -174,6 +188,21 @@ if not (st.session_state.edit_mode and can_edit):
 if st.session_state.edit_mode and can_edit:
     st.subheader("Edit ticket")
 
+    # The form edits the ticket as it was when editing began; saving sends
+    # only the fields changed since then, checked against its version.
+    base = st.session_state.get("edit_base")
+    if base is None or base["ticket_id"] != tid:
+        base = st.session_state.edit_base = {name: t[name] for name in ("ticket_id", "version") + PATCHABLE_FIELDS}
+        st.session_state.pop("edit_conflict", None)
+
+    if st.session_state.get("edit_conflict"):
+        st.error(st.session_state.edit_conflict)
+        if st.button("🔄 Reload latest version"):
+            st.session_state.pop("edit_base", None)
+            st.session_state.pop("edit_conflict", None)
+            st.session_state.pop("edit_ticket_type", None)
+            st.rerun()
+
     # highlight only mandatory fields when empty (for Bug; still fine for Test Case)
     st.markdown(
         """
@@ -203,7 +232,7 @@ if st.session_state.edit_mode and can_edit:
     user_ids = [None] + [u["id"] for u in users]
 
     # Current assignee -> dropdown index
-    current_assignee_id = t["user_id"]
+    current_assignee_id = base["user_id"]
     if current_assignee_id in user_ids:
         current_assignee_index = user_ids.index(current_assignee_id)
     else:
@@ -211,7 +240,7 @@ if st.session_state.edit_mode and can_edit:
 
     # ---- Ticket type selector OUTSIDE the form so layout switches immediately ----
     if "edit_ticket_type" not in st.session_state:
-        st.session_state.edit_ticket_type = ticket_type
+        st.session_state.edit_ticket_type = base["ticket_type"]
 
     et_ticket_type = st.selectbox(
         "Ticket type",
@@ -231,7 +260,7 @@ if st.session_state.edit_mode and can_edit:
             et_status = st.selectbox(
                 "Status",
                 STATUS_CHOICES,
-                index=status_idx,
+                index=STATUS_CHOICES.index(base["status"]) if base["status"] in STATUS_CHOICES else 0,
             )
 
         with hdr2:
@@ -244,7 +273,7 @@ if st.session_state.edit_mode and can_edit:
         with hdr3:
             et_parent = st.text_input(
                 "Parent ticket ID (optional)",
-                value=str(t["parent_id"] or ""),
+                value=str(base["parent_id"] or ""),
             )
 
         # Turn selected assignee/parent into IDs
@@ -256,23 +285,23 @@ if st.session_state.edit_mode and can_edit:
         # ---- Use ticket type selected outside the form ----
         et_ticket_type = st.session_state.edit_ticket_type
 
-        et_subject = st.text_input("Subject", value=t["subject"] or "")
+        et_subject = st.text_input("Subject", value=base["subject"] or "")
 
         if et_ticket_type == "Test Case":
             # Test Case: only these fields; summary & outcome not used
             et_prereq = st.text_area(
                 "Preconditions / Requirements",
-                value=t["prerequisites"] or "",
+                value=base["prerequisites"] or "",
                 height=160,
             )
             et_steps = st.text_area(
                 "Test Steps",
-                value=t["steps_to_replicate"] or "",
+                value=base["steps_to_replicate"] or "",
                 height=200,
             )
             et_expected = st.text_area(
                 "Pass Criteria",
-                value=t["expected_outcome"] or "",
+                value=base["expected_outcome"] or "",
                 height=100,
             )
             et_summary = None
@@ -281,26 +310,26 @@ if st.session_state.edit_mode and can_edit:
             # Bug ticket
             et_summary = st.text_input(
                 "Summary",
-                value=t["summary"] or "",
+                value=base["summary"] or "",
             )
             et_prereq = st.text_area(
                 "Prerequisites",
-                value=t["prerequisites"] or "",
+                value=base["prerequisites"] or "",
                 height=160,
             )
             et_steps = st.text_area(
                 "Steps to replicate",
-                value=t["steps_to_replicate"] or "",
+                value=base["steps_to_replicate"] or "",
                 height=200,
             )
             et_outcome = st.text_area(
                 "Outcome",
-                value=t["outcome"] or "",
+                value=base["outcome"] or "",
                 height=100,
             )
             et_expected = st.text_area(
                 "Expected Outcome",
-                value=t["expected_outcome"] or "",
+                value=base["expected_outcome"] or "",
                 height=100,
             )
 
@@ -316,6 +345,7 @@ if st.session_state.edit_mode and can_edit:
 
     if cancel_edit:
         st.session_state.edit_mode = False
+        st.session_state.pop("edit_base", None)
         st.rerun()
 
     if save_changes:
@@ -342,22 +372,40 @@ if st.session_state.edit_mode and can_edit:
                 summary_val = (et_summary or "").strip()
                 outcome_val = (et_outcome or "").strip()
 
-            update_ticket(
-                ticket_id=tid,
-                ticket_type=et_ticket_type,
-                subject=et_subject.strip(),
-                summary=summary_val,
-                prerequisites=(et_prereq or "").strip(),
-                steps_to_replicate=(et_steps or "").strip(),
-                outcome=outcome_val,
-                expected_outcome=(et_expected or "").strip(),
-                status=et_status,      # status from header row
-                user_id=et_user_id,    # assignee from header row
-                parent_id=et_parent_id,
-            )
-            st.success("Ticket updated successfully.")
-            st.session_state.edit_mode = False
-            st.rerun()
+            edited = {
+                "ticket_type": et_ticket_type,
+                "subject": et_subject.strip(),
+                "summary": summary_val,
+                "prerequisites": (et_prereq or "").strip(),
+                "steps_to_replicate": (et_steps or "").strip(),
+                "outcome": outcome_val,
+                "expected_outcome": (et_expected or "").strip(),
+                "status": et_status,      # status from header row
+                "user_id": et_user_id,    # assignee from header row
+                "parent_id": et_parent_id,
+            }
+            # NULL and "" are the same to the form
+            changes = {
+                name: value
+                for name, value in edited.items()
+                if (value if value is not None else "") != (base[name] if base[name] is not None else "")
+            }
+
+            try:
+                if changes:
+                    patch_ticket(tid, changes, base["version"], changed_by=username)
+            except TicketConflictError as e:
+                st.session_state.edit_conflict = (
+                    f"{e} Your edits were not saved. Reload the latest version and apply them again."
+                )
+                st.rerun()
+            except (ValueError, WriterBusyError) as e:  # bad parent, or too many saves at once
+                st.error(str(e))
+            else:
+                st.success("Ticket updated successfully." if changes else "No changes to save.")
+                st.session_state.edit_mode = False
+                st.session_state.pop("edit_base", None)
+                st.rerun()
 
 # -------------------------------------------------
 # VIEW MODE (read-only details)
@@ -399,6 +447,67 @@ else:
     if t["user_id"]:
         st.markdown(f"**Assigned User ID:** {t['user_id']}")
 
+    # ---- Hierarchy: the whole tree this ticket belongs to ----
+    with profiler.span("load hierarchy"):
+        tree = get_ticket_tree(tid)
+    if len(tree) > 1:
+        with st.expander(f"Ticket hierarchy ({len(tree)} tickets)", expanded=tree[0]["ticket_id"] != tid):
+            for node in tree[:HIERARCHY_NODES]:
+                label = (
+                    "· " * node["depth"]
+                    + f"#{node['ticket_id']} [{node['ticket_type']}] {node['subject']} — {node['status']}"
+                )
+                if st.button(label, key=f"tree_{node['ticket_id']}", disabled=node["ticket_id"] == tid):
+                    st.session_state.view_ticket_id = node["ticket_id"]
+                    st.rerun()
+            if len(tree) > HIERARCHY_NODES:
+                st.caption(f"… {len(tree) - HIERARCHY_NODES} more")
+
+    # ---- History: who changed what, newest first, a page at a time ----
+    history_key = f"history_cursors_{tid}"
+    history_cursors = st.session_state.setdefault(history_key, [None])
+    with profiler.span("load history"):
+        entries, next_history = list_ticket_history(tid, before=history_cursors[-1])
+    if entries or len(history_cursors) > 1:
+        user_lookup = {u["id"]: u["username"] for u in list_users()}
+
+        def show_value(name, value):
+            if value is None or value == "":
+                return "—"
+            if name == "user_id":
+                return user_lookup.get(value, f"user {value}")
+            if name == "parent_id":
+                return f"#{value}"
+            return str(value)
+
+        with st.expander("Change history"):
+            for entry in entries:
+                st.markdown(
+                    f"**Version {entry['version']}** · {entry['changed_at']} UTC · "
+                    f"{entry['changed_by'] or 'unknown user'}"
+                )
+                for name, (before, after) in entry["changes"].items():
+                    label = name.replace("_", " ").capitalize()
+                    before_text, after_text = show_value(name, before), show_value(name, after)
+                    if "\n" in before_text + after_text or len(before_text + after_text) > 120:
+                        diff = difflib.unified_diff(
+                            (before or "").splitlines(), (after or "").splitlines(), lineterm="", n=1
+                        )
+                        st.markdown(f"- {label}:")
+                        st.code("\n".join(list(diff)[2:]), language="diff")
+                    else:
+                        st.markdown(f"- {label}: {before_text} → {after_text}")
+
+            older_col, newer_col = st.columns(2)
+            with newer_col:
+                if len(history_cursors) > 1 and st.button("Newer changes", use_container_width=True):
+                    history_cursors.pop()
+                    st.rerun()
+            with older_col:
+                if next_history and st.button("Older changes", use_container_width=True):
+                    history_cursors.append(next_history)
+                    st.rerun()
+
 # -------------------------------------------------
 # Admin-only Delete
 # -------------------------------------------------
@@ -424,4 +533,6 @@ if is_admin:
                 st.session_state.confirm_delete = False
                 st.rerun()
 else:
-    st.caption("You do not have permission to delete this ticket.")
\ No newline at end of file
+    st.caption("You do not have permission to delete this ticket.")
+
+profiler.finish()
@@ -0,0 +1,229 @@
+import contextlib
+import json
+import os
+import statistics
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+# =========================================================
+# CONFIGURATION
+# =========================================================
+# Off by default: TICKETAPP_PROFILE=1 (or enable()) records every page rerun.
+ENABLED = os.environ.get("TICKETAPP_PROFILE", "0") == "1"
+# Also record tracemalloc allocation deltas per phase (slows pages down)
+TRACE_MEMORY = os.environ.get("TICKETAPP_PROFILE_MEMORY", "0") == "1"
+PROFILE_LOG = os.environ.get("TICKETAPP_PROFILE_LOG", "page_profile.jsonl")
+# Reruns kept per page for the aggregated view
+SAMPLE_WINDOW = int(os.environ.get("TICKETAPP_PROFILE_SAMPLES", "200"))
+
+
+def enable(memory: bool = False):
+    global ENABLED, TRACE_MEMORY
+    ENABLED = True
+    TRACE_MEMORY = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable():
+    global ENABLED, TRACE_MEMORY
+    ENABLED = False
+    if TRACE_MEMORY and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    TRACE_MEMORY = False
+
+
+# =========================================================
+# RERUN RECORDING
+# =========================================================
+# Streamlit runs a session's script on its own thread, so the rerun in
+# progress is thread-local. A page calls start() at the top, phase() at
+# each major step and finish() at the bottom:
+#
+#     profiler.start("Home", st.session_state)
+#     profiler.phase("auth")
+#     ...
+#     profiler.phase("render")
+#     ...
+#     profiler.finish()
+#
+# st.switch_page / st.rerun / st.stop end a script early by raising, so
+# finish() is never reached. The rerun is also parked in the session state
+# passed to start(), and the session's next start() (on whichever thread
+# Streamlit picks for it) records the abandoned rerun as interrupted, up to
+# its last phase boundary.
+_local = threading.local()
+_STATE_KEY = "_profiler_rerun"
+
+
+class _Rerun:
+    def __init__(self, page: str, state: dict):
+        self.page = page
+        self.state = state
+        self.started = time.perf_counter()
+        self.phases: list[dict] = []
+        self.spans: list[dict] = []
+        self._phase = None
+        self._phase_start = self.started
+        self._phase_mem = _memory()
+        self.last_mark = self.started
+        if TRACE_MEMORY:
+            tracemalloc.reset_peak()
+
+    def mark(self, name: str | None):
+        now = time.perf_counter()
+        if self._phase is not None:
+            entry = {"name": self._phase, "ms": round((now - self._phase_start) * 1000, 3)}
+            if TRACE_MEMORY:
+                entry["alloc_kb"] = round((_memory() - self._phase_mem) / 1024, 1)
+            self.phases.append(entry)
+        self._phase, self._phase_start, self._phase_mem = name, now, _memory()
+        self.last_mark = now
+
+    def record(self, interrupted: bool = False) -> dict:
+        if not interrupted:
+            self.mark(None)
+        sample = {
+            "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "page": self.page,
+            "total_ms": round((self.last_mark - self.started) * 1000, 3),
+            "interrupted": interrupted,
+            "phases": self.phases,
+            "spans": self.spans,
+        }
+        if TRACE_MEMORY:
+            sample["peak_kb"] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        return sample
+
+
+def _memory() -> int:
+    return tracemalloc.get_traced_memory()[0] if TRACE_MEMORY and tracemalloc.is_tracing() else 0
+
+
+def start(page: str, state: dict | None = None):
+    """
+    Begin profiling a rerun of ``page`` on this thread (phase 'setup').
+    ``state`` is where the rerun outlives an early exit, normally
+    st.session_state; without it, only a later start() on this same thread
+    notices that the rerun never finished.
+    """
+    if state is None:
+        state = _local.__dict__.setdefault("state", {})
+    stale = state.pop(_STATE_KEY, None)
+    if not ENABLED:
+        _local.rerun = None
+        return
+    if stale is not None:
+        page_stats.add(stale.record(interrupted=True))
+    _local.rerun = state[_STATE_KEY] = _Rerun(page, state)
+    _local.rerun.mark("setup")
+
+
+def phase(name: str):
+    """End the current phase of this rerun and start ``name``."""
+    rerun = getattr(_local, "rerun", None)
+    if rerun is not None:
+        rerun.mark(name)
+
+
+def finish():
+    """End the rerun and record it."""
+    rerun = getattr(_local, "rerun", None)
+    if rerun is not None:
+        _local.rerun = None
+        rerun.state.pop(_STATE_KEY, None)
+        page_stats.add(rerun.record())
+
+
+class span(contextlib.ContextDecorator):
+    """
+    Time a block or function inside the current phase, as a context manager
+    (``with span("load tickets"):``) or decorator (``@span("render row")``).
+    Does nothing when no rerun is being profiled.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def _recreate_cm(self):
+        # a fresh instance per decorated call, so calls on other threads
+        # (other sessions) do not share timing state
+        return span(self.name)
+
+    def __enter__(self):
+        self._rerun = getattr(_local, "rerun", None)
+        if self._rerun is not None:
+            self._mem = _memory()
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self._rerun is not None:
+            entry = {"name": self.name, "ms": round((time.perf_counter() - self._start) * 1000, 3)}
+            if TRACE_MEMORY:
+                entry["alloc_kb"] = round((_memory() - self._mem) / 1024, 1)
+            self._rerun.spans.append(entry)
+            self._rerun.last_mark = time.perf_counter()
+        return False
+
+
+# =========================================================
+# AGGREGATION
+# =========================================================
+class PageStats:
+    """Recent rerun samples per page, appended to PROFILE_LOG as JSON lines."""
+
+    def __init__(self, log_path: str | None = PROFILE_LOG):
+        self.log_path = log_path
+        self._samples: dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def add(self, sample: dict):
+        with self._lock:
+            self._samples.setdefault(sample["page"], deque(maxlen=SAMPLE_WINDOW)).append(sample)
+            if self.log_path:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(sample) + "\n")
+
+    def recent(self, limit: int = 50) -> list[dict]:
+        with self._lock:
+            samples = [s for page in self._samples.values() for s in page]
+        return sorted(samples, key=lambda s: s["at"], reverse=True)[:limit]
+
+    def summary(self) -> list[dict]:
+        """One row per (page, phase or span) with call count and timing percentiles."""
+        with self._lock:
+            pages = {page: list(samples) for page, samples in self._samples.items()}
+        rows = []
+        for page, samples in sorted(pages.items()):
+            timings: dict[str, list] = {"(total)": [s["total_ms"] for s in samples]}
+            allocs: dict[str, list] = {}
+            for s in samples:
+                for entry in s["phases"] + [dict(e, name=f"span: {e['name']}") for e in s["spans"]]:
+                    timings.setdefault(entry["name"], []).append(entry["ms"])
+                    if "alloc_kb" in entry:
+                        allocs.setdefault(entry["name"], []).append(entry["alloc_kb"])
+            for name, ms in timings.items():
+                ms.sort()
+                rows.append({
+                    "page": page,
+                    "phase": name,
+                    "samples": len(ms),
+                    "mean_ms": round(statistics.fmean(ms), 3),
+                    "p50_ms": round(statistics.median(ms), 3),
+                    "p95_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 3),
+                    "mean_alloc_kb": round(statistics.fmean(allocs[name]), 1) if name in allocs else None,
+                })
+        return rows
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+
+page_stats = PageStats()
+
+if ENABLED and TRACE_MEMORY:
+    tracemalloc.start()
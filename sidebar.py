@@ -1,10 +1,27 @@
 import streamlit as st
 
+from auth import issue_resume_token, issue_session, redeem_resume_token, resolve_session, revoke_session
+
+SESSION_PARAM = "sid"
+
 # ---------- Basic user helpers ----------
 
 def get_current_user():
-    """Return the current user dict from session, or None."""
-    return st.session_state.get("user")
+    """
+    Return the current user dict from session, or None.
+    After a refresh the session state is empty, so the one-time ?sid=
+    resume token is swapped for the session (see auth.py) and dropped from
+    the URL; require_login() puts a fresh one back.
+    """
+    user = st.session_state.get("user")
+    if user is None and SESSION_PARAM in st.query_params:
+        token = redeem_resume_token(st.query_params[SESSION_PARAM])
+        del st.query_params[SESSION_PARAM]
+        user = resolve_session(token) if token else None
+        if user:
+            st.session_state.user = user
+            st.session_state.session_token = token
+    return user
 
 
 def is_logged_in() -> bool:
@@ -22,6 +39,53 @@ def is_admin() -> bool:
     return get_role() == "admin"
 
 
+# ---------- Session tokens ----------
+
+def sign_in(user: dict):
+    """Store a verified user in the session and issue a persistent token."""
+    st.session_state.user = user
+    st.session_state.session_token = issue_session(user["id"])
+    st.session_state.pop("resume_token", None)
+
+
+def sign_out():
+    token = st.session_state.pop("session_token", None)
+    if token:
+        revoke_session(token)
+    st.session_state.pop("resume_token", None)
+    st.session_state.user = None
+    if SESSION_PARAM in st.query_params:
+        del st.query_params[SESSION_PARAM]
+
+
+def _revalidate_session():
+    """
+    Check the session token against the database again (one primary-key
+    lookup), so a session revoked from the Admin page, or a user who was
+    demoted or deleted, loses access on the next rerun of an open page.
+    """
+    token = st.session_state.get("session_token")
+    user = resolve_session(token) if token else None
+    if user:
+        st.session_state.user = user
+    else:
+        st.session_state.user = None
+        st.session_state.pop("session_token", None)
+        st.session_state.pop("resume_token", None)
+
+
+def _keep_session_param():
+    # only the one-time resume token goes in the URL, never the session
+    # token; page switches drop query params, so put it back for a refresh
+    token = st.session_state.get("session_token")
+    if not token:
+        return
+    resume = st.session_state.get("resume_token") or issue_resume_token(token)
+    if resume and st.query_params.get(SESSION_PARAM) != resume:
+        st.session_state.resume_token = resume
+        st.query_params[SESSION_PARAM] = resume
+
+
 # ---------- Access control guards ----------
 
 def require_login():
@@ -29,8 +93,10 @@ def require_login():
     Redirect to Login page if no user in session.
     Use this at the top of every page except Login.
     """
+    _revalidate_session()
     if not is_logged_in():
         st.switch_page("pages/Login.py")
+    _keep_session_param()
 
 
 def require_admin():
@@ -39,9 +105,12 @@ def require_admin():
     If not logged in -> send to Login.
     If logged in but not admin -> show error and stop.
     """
+    _revalidate_session()
     if not is_logged_in():
         st.switch_page("pages/Login.py")
 
+    _keep_session_param()
+
     if not is_admin():
         st.error("You do not have permission to view this page.")
         st.page_link("Home.py", label="⬅ Back to Home")
@@ -10,6 +10,9 @@ if PROJECT_ROOT not in sys.path:
 
 import db 
 import auth
+import connection
+import cache
+import writer
 
 
 @pytest.fixture(autouse=True)
@@ -27,4 +30,11 @@ def use_temp_db(tmp_path, monkeypatch):
     # create tables in that temp file
     db.init_db()
 
-    yield
\ No newline at end of file
+    yield
+
+    # drop pooled connections to the temp file before it is removed
+    writer.close_writers()
+    connection.close_all()
+    cache.close_monitors()
+    cache.object_cache.clear()
+    cache.read_cache.clear()
\ No newline at end of file
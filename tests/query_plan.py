@@ -0,0 +1,61 @@
+"""
+Helpers for guarding query plans against full table scans.
+
+``capture_queries`` records every statement a db.py call executes (with its
+parameters expanded, via the connection's trace callback) and ``full_scans``
+runs EXPLAIN QUERY PLAN on each one, returning those that scan a table
+rather than search it through an index.
+"""
+import re
+from contextlib import contextmanager
+
+import db
+from cache import object_cache, read_cache
+
+_QUERY_PREFIXES = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+
+@contextmanager
+def capture_queries():
+    """Collect the SQL executed through db._connect() inside the block."""
+    statements: list[str] = []
+    # cached reads would never reach the database
+    read_cache.clear()
+    object_cache.clear()
+    with db._connect() as con:
+        con.set_trace_callback(statements.append)
+        try:
+            yield statements
+        finally:
+            con.set_trace_callback(None)
+
+
+def full_scans(statements, table: str = "tickets"):
+    """Return (sql, plan detail) for statements that fully scan ``table``."""
+    # "SCAN x USING INDEX ..." still visits every row, only in index order
+    scan = re.compile(r"^SCAN (\w+)")
+    offenders = []
+    with db._connect() as con:
+        aliases = {table}
+        for sql in statements:
+            if not sql.lstrip().upper().startswith(_QUERY_PREFIXES):
+                continue
+            aliases |= set(re.findall(rf"\b{table}\s+(?:AS\s+)?(\w+)", sql, re.I))
+            for row in con.execute(f"EXPLAIN QUERY PLAN {sql}"):
+                detail = row["detail"]
+                m = scan.match(detail)
+                if m and m.group(1) in aliases:
+                    offenders.append((" ".join(sql.split()), detail))
+    return offenders
+
+
+def unindexed_foreign_keys(table: str = "tickets"):
+    """Return FK child columns of ``table`` that no index leads with."""
+    with db._connect() as con:
+        leading = set()
+        for idx in con.execute(f"PRAGMA index_list({table})"):
+            cols = con.execute(f"PRAGMA index_info({idx['name']})").fetchall()
+            if cols:
+                leading.add(cols[0]["name"])
+        fks = {fk["from"] for fk in con.execute(f"PRAGMA foreign_key_list({table})")}
+    return sorted(fks - leading)
@@ -1,5 +1,25 @@
-from auth import create_user, verify_user
-from db import list_users
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import auth
+from auth import (
+    HashingBusyError,
+    active_session_counts,
+    create_user,
+    get_user,
+    hash_cost,
+    issue_session,
+    issue_resume_token,
+    purge_expired_sessions,
+    redeem_resume_token,
+    resolve_session,
+    revoke_session,
+    revoke_user_sessions,
+    verify_user,
+)
+from db import authenticate_user, delete_user, list_users
 
 def test_user_creation_and_login():
     # Create a user
@@ -25,4 +45,91 @@ def test_duplicate_user_not_created():
     create_user("bob", "456", "admin")   # duplicate username
 
     users = list_users()
-    assert len(users) == 1  # still only one Bob
\ No newline at end of file
+    assert len(users) == 1  # still only one Bob
+
+def test_login_rehashes_when_cost_factor_changes(monkeypatch):
+    monkeypatch.setattr(auth, "BCRYPT_ROUNDS", 4)
+    create_user("carol", "pw", "user")
+    assert hash_cost(get_user("carol")["password_hash"]) == 4
+
+    monkeypatch.setattr(auth, "BCRYPT_ROUNDS", 5)
+    assert verify_user("carol", "wrong") is None
+    assert hash_cost(get_user("carol")["password_hash"]) == 4
+
+    assert verify_user("carol", "pw") is not None
+    assert hash_cost(get_user("carol")["password_hash"]) == 5
+    assert authenticate_user("carol", "pw")["username"] == "carol"
+
+def test_hashing_queue_limit_fails_fast(monkeypatch):
+    monkeypatch.setattr(auth, "_slots", threading.BoundedSemaphore(1))
+    auth._slots.acquire()  # an in-flight check holds the only slot
+    try:
+        with pytest.raises(HashingBusyError):
+            auth.hash_password("pw", 4)
+    finally:
+        auth._slots.release()
+    assert hash_cost(auth.hash_password("pw", 4)) == 4
+
+def test_hashing_timeout_is_reported_as_busy(monkeypatch):
+    monkeypatch.setattr(auth, "_executor", ThreadPoolExecutor(max_workers=1))
+    monkeypatch.setattr(auth, "HASH_TIMEOUT", 0.05)
+    monkeypatch.setattr(auth, "_slots", threading.BoundedSemaphore(1))
+    release = threading.Event()
+    auth._executor.submit(release.wait)  # the only worker is busy
+    try:
+        with pytest.raises(HashingBusyError):
+            auth.hash_password("pw", 4)
+    finally:
+        release.set()
+    # the timed-out check was cancelled and gave its slot back
+    monkeypatch.setattr(auth, "HASH_TIMEOUT", 30)
+    assert hash_cost(auth.hash_password("pw", 4)) == 4
+    auth._executor.shutdown()
+
+
+def test_session_tokens_resolve_until_revoked_or_expired():
+    create_user("dave", "pw", "admin")
+    dave = get_user("dave")["id"]
+
+    token = issue_session(dave)
+    other = issue_session(dave)
+    expired = issue_session(dave, ttl=-1)
+    assert resolve_session(issue_session(dave, ttl=0)) is None  # not the default TTL
+    assert resolve_session(token) == {"id": dave, "username": "dave", "role": "admin"}
+    assert resolve_session(expired) is None
+    assert resolve_session("not-a-token") is None
+    assert active_session_counts() == {dave: 2}
+
+    assert purge_expired_sessions() == 2
+    assert revoke_session(token)
+    assert resolve_session(token) is None
+    assert revoke_user_sessions(dave) == 1
+    assert resolve_session(other) is None
+
+    # sessions go with their user
+    issue_session(dave)
+    delete_user(dave)
+    assert active_session_counts() == {}
+
+
+def test_resume_tokens_swap_for_a_new_session_token_once():
+    create_user("erin", "pw")
+    erin = get_user("erin")["id"]
+    token = issue_session(erin)
+
+    resume = issue_resume_token(token)
+    assert resume != token
+    assert resolve_session(resume) is None  # not a session token itself
+    assert issue_resume_token("not-a-token") is None
+
+    renewed = redeem_resume_token(resume)
+    assert resolve_session(renewed)["username"] == "erin"
+    assert resolve_session(token) is None
+    assert redeem_resume_token(resume) is None
+    assert active_session_counts() == {erin: 1}
+
+    # issuing again voids the previous resume token
+    first = issue_resume_token(renewed)
+    second = issue_resume_token(renewed)
+    assert redeem_resume_token(first) is None
+    assert redeem_resume_token(second) is not None
@@ -0,0 +1,27 @@
+import db
+from benchmarks.generate import generate
+from benchmarks.run import compare, run
+
+
+def test_generated_data_is_realistic_and_scenarios_run(tmp_path, monkeypatch):
+    monkeypatch.setattr("auth.BCRYPT_ROUNDS", 4)
+    summary = generate(str(tmp_path / "bench.db"), users=5, tickets=300, seed=1)
+    assert summary["tickets"] == 300
+
+    with db._connect() as con:
+        statuses = {r[0] for r in con.execute("SELECT DISTINCT status FROM tickets")}
+        children = con.execute("SELECT COUNT(*) FROM tickets WHERE parent_id IS NOT NULL").fetchone()[0]
+        deepest = con.execute("SELECT MAX(depth) FROM ticket_closure").fetchone()[0]
+    assert statuses <= set(db.STATUS_CHOICES) and len(statuses) > 5
+    assert 50 < children < 150 and deepest >= 2
+
+    results = run(db.DB_PATH, ["get_ticket", "create_ticket", "login"])
+    assert results["meta"]["tickets"] == 300
+    assert set(results["scenarios"]) == {"get_ticket", "create_ticket", "login"}
+    assert all(r["median_ms"] > 0 for r in results["scenarios"].values())
+
+
+def test_compare_flags_only_slowdowns_past_the_threshold():
+    baseline = {"scenarios": {"a": {"median_ms": 1.0}, "b": {"median_ms": 1.0}, "gone": {"median_ms": 1.0}}}
+    results = {"scenarios": {"a": {"median_ms": 1.1}, "b": {"median_ms": 1.5}, "new": {"median_ms": 9.0}}}
+    assert compare(results, baseline, threshold=0.2) == [("b", 1.0, 1.5, 1.5)]
@@ -0,0 +1,124 @@
+import sqlite3
+
+import pytest
+
+import db
+from auth import create_user, get_user
+from cache import LRUCache, cached_object, object_cache
+from db import create_ticket, get_ancestors, get_ticket, list_tickets, list_users, update_ticket_status
+
+
+def test_reads_are_served_from_cache_until_data_changes(monkeypatch):
+    tid = create_ticket("Bug", "Crash", "s", "p", "s", "o", "e", "alice")
+    assert get_ticket(tid)["status"] == "New"
+    assert len(list_tickets(statuses=["New"])) == 1
+
+    real_connect = db._connect
+    monkeypatch.setattr(db, "_connect", lambda: pytest.fail("unexpected query"))
+    assert get_ticket(tid)["status"] == "New"
+    assert len(list_tickets(statuses=["New"])) == 1
+
+    monkeypatch.setattr(db, "_connect", real_connect)
+    update_ticket_status(tid, "Closed")
+    assert get_ticket(tid)["status"] == "Closed"
+    assert list_tickets(statuses=["New"]) == []
+
+
+def test_user_writes_in_auth_invalidate_user_lists():
+    assert list_users() == []
+    create_user("alice", "pw", "user")
+    assert [u["username"] for u in list_users()] == ["alice"]
+
+
+def test_cached_lists_are_copies():
+    create_ticket("Bug", "Crash", "s", "p", "s", "o", "e", "alice")
+    list_tickets().clear()
+    assert len(list_tickets()) == 1
+
+
+def test_lru_cache_evicts_least_recently_used():
+    lru = LRUCache(2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    lru.get("a")
+    lru.set("c", 3)
+
+    assert lru.get("b") is None
+    assert lru.get("a") == 1 and lru.get("c") == 3
+    assert len(lru) == 2
+
+
+def _other_process():
+    """A separate connection behaves like another server process."""
+    con = sqlite3.connect(db.DB_PATH, isolation_level=None)
+    con.execute("PRAGMA foreign_keys = ON")
+    return con
+
+
+def test_external_commit_invalidates_only_changed_tickets():
+    a = create_ticket("Bug", "A", "s", "p", "s", "o", "e", "alice")
+    b = create_ticket("Bug", "B", "s", "p", "s", "o", "e", "alice")
+    get_ticket(a), get_ticket(b), list_tickets()
+
+    other = _other_process()
+    other.execute("UPDATE tickets SET status = 'Closed' WHERE ticket_id = ?", (a,))
+    other.close()
+
+    assert (db.DB_PATH, "ticket", b) in object_cache
+    assert get_ticket(a)["status"] == "Closed"
+    assert [r["status"] for r in list_tickets()] == ["New", "Closed"]
+    assert (db.DB_PATH, "ticket", b) in object_cache
+
+
+def test_external_user_change_invalidates_cached_user():
+    create_user("alice", "pw", "user")
+    assert get_user("alice")["role"] == "user"
+
+    other = _other_process()
+    other.execute("UPDATE users SET role = 'admin' WHERE username = 'alice'")
+    other.close()
+
+    assert get_user("alice")["role"] == "admin"
+
+
+def test_pruned_change_log_drops_everything():
+    a = create_ticket("Bug", "A", "s", "p", "s", "o", "e", "alice")
+    b = create_ticket("Bug", "B", "s", "p", "s", "o", "e", "alice")
+    get_ticket(a), get_ticket(b)
+
+    other = _other_process()
+    other.execute("UPDATE tickets SET status = 'Closed' WHERE ticket_id = ?", (a,))
+    other.execute("DELETE FROM data_changes")  # this process missed part of the log
+    other.execute("UPDATE tickets SET status = 'Open' WHERE ticket_id = ?", (a,))
+    other.close()
+
+    get_ticket(a)
+    assert (db.DB_PATH, "ticket", b) not in object_cache
+
+
+def test_row_loaded_across_a_commit_is_not_cached():
+    tid = create_ticket("Bug", "A", "s", "p", "s", "o", "e", "alice")
+
+    def load_then_commit():
+        row = db._load_ticket(tid)
+        other = _other_process()
+        other.execute("UPDATE tickets SET status = 'Closed' WHERE ticket_id = ?", (tid,))
+        other.close()
+        return row
+
+    stale = cached_object(db.DB_PATH, "ticket", tid, load_then_commit)
+    assert stale["status"] == "New"
+    assert (db.DB_PATH, "ticket", tid) not in object_cache
+    assert get_ticket(tid)["status"] == "Closed"
+
+
+def test_commits_to_untracked_tables_invalidate_reads():
+    a = create_ticket("Bug", "A", "s", "p", "s", "o", "e", "alice")
+    b = create_ticket("Bug", "B", "s", "p", "s", "o", "e", "alice", parent_id=a)
+    assert [r["ticket_id"] for r in get_ancestors(b)] == [a]
+
+    other = _other_process()
+    other.execute("DELETE FROM ticket_closure WHERE depth > 0")  # no data_changes entry
+    other.close()
+
+    assert get_ancestors(b) == []
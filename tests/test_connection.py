@@ -0,0 +1,140 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import connection
+import db
+import instrumentation
+from db import create_ticket, get_dashboard_stats, list_tickets, update_ticket_status
+
+
+def test_pooled_connection_is_configured_and_reused():
+    with db._connect() as con:
+        first = con
+        assert con.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert con.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+        assert con.execute("PRAGMA busy_timeout").fetchone()[0] == connection.BUSY_TIMEOUT_MS
+
+    with db._connect() as con:
+        assert con is first
+
+
+def test_nested_use_shares_connection_and_rolls_back_on_error():
+    with pytest.raises(RuntimeError):
+        with db._connect() as outer:
+            create_ticket("Bug", "Rolled back", "s", "p", "s", "o", "e", "alice")
+            with db._connect() as inner:
+                assert inner is outer
+            raise RuntimeError("boom")
+
+    assert list_tickets() == []
+
+
+def test_toggling_instrumentation_swaps_connections_only_when_returned(monkeypatch):
+    with db._connect() as con:
+        first = con
+        monkeypatch.setattr(instrumentation, "ENABLED", True)
+        # the connection in use stays open and nested use still shares it
+        assert connection.holds_connection(db.DB_PATH)
+        with db._connect() as inner:
+            assert inner is first
+        assert con.execute("SELECT 1").fetchone()[0] == 1
+
+    with db._connect() as con:
+        assert isinstance(con, instrumentation.InstrumentedConnection)
+    monkeypatch.setattr(instrumentation, "ENABLED", False)
+    with db._connect() as con:
+        assert not isinstance(con, instrumentation.InstrumentedConnection)
+
+
+def test_concurrent_writers_do_not_hit_lock_errors():
+    errors = []
+
+    def worker(n):
+        try:
+            for i in range(20):
+                create_ticket("Bug", f"T{n}-{i}", "s", "p", "s", "o", "e", "alice")
+        except Exception as exc:  # pragma: no cover - reported below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert len(list_tickets()) == 160
+
+
+def test_read_only_pool_cannot_write():
+    with connection.connect(db.DB_PATH, readonly=True) as con:
+        assert con.execute("PRAGMA query_only").fetchone()[0] == 1
+        with pytest.raises(sqlite3.OperationalError):
+            con.execute("DELETE FROM tickets")
+
+    with db._connect() as rw, connection.connect(db.DB_PATH, readonly=True) as ro:
+        assert ro is not rw
+
+
+def test_snapshot_is_consistent_and_does_not_block_writers():
+    create_ticket("Bug", "Before", "s", "p", "s", "o", "e", "alice")
+
+    def write():
+        for i in range(5):
+            create_ticket("Bug", f"During {i}", "s", "p", "s", "o", "e", "alice")
+
+    with db._snapshot() as con:
+        assert con.execute("SELECT COUNT(*) FROM tickets").fetchone()[0] == 1
+        writer = threading.Thread(target=write)
+        start = time.perf_counter()
+        writer.start()
+        writer.join(timeout=2)
+        assert not writer.is_alive()
+        assert time.perf_counter() - start < 1  # no busy wait on the reader
+        # still the database as of the first read
+        assert con.execute("SELECT COUNT(*) FROM tickets").fetchone()[0] == 1
+
+    with db._snapshot() as con:
+        assert con.execute("SELECT COUNT(*) FROM tickets").fetchone()[0] == 6
+
+
+def test_dashboard_reads_under_mixed_load():
+    ids = [create_ticket("Bug", f"T{i}", "s", "p", "s", "o", "e", "alice") for i in range(20)]
+    errors, stop = [], threading.Event()
+
+    def writer(n):
+        try:
+            for i in range(30):
+                update_ticket_status(ids[(n + i) % len(ids)], ["Open", "In Progress", "Closed"][i % 3])
+                create_ticket("Bug", f"W{n}-{i}", "s", "p", "s", "o", "e", "alice")
+        except Exception as exc:  # pragma: no cover - reported below
+            errors.append(exc)
+
+    def reader():
+        try:
+            while not stop.is_set():
+                stats = get_dashboard_stats.uncached("alice")
+                assert stats["total"] == sum(stats["status_counts"].values())
+                # two statements, one snapshot: the counters match the table
+                with db._snapshot() as con:
+                    counted = con.execute("SELECT SUM(n) FROM ticket_counters").fetchone()[0]
+                    actual = con.execute("SELECT COUNT(*) FROM tickets").fetchone()[0]
+                assert counted == actual
+        except Exception as exc:  # pragma: no cover - reported below
+            errors.append(exc)
+
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    writers = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for t in readers + writers:
+        t.start()
+    for t in writers:
+        t.join()
+    stop.set()
+    for t in readers:
+        t.join()
+
+    assert errors == []
+    assert get_dashboard_stats.uncached("alice")["total"] == 20 + 4 * 30
@@ -0,0 +1,103 @@
+import csv
+import io
+import json
+import os
+import time
+import tracemalloc
+
+from auth import create_user
+import db
+from db import create_ticket, export_tickets, get_ticket, import_tickets, iter_tickets, list_users, new_export_file
+
+
+class _NullWriter(io.TextIOBase):
+    """Discards output, so only the exporter's own memory is measured."""
+
+    def write(self, s):
+        return len(s)
+
+
+def _seed(n):
+    rows = (
+        {"subject": f"Ticket {i}", "summary": "s", "prerequisites": "p",
+         "steps_to_replicate": "step " * 200, "outcome": "o", "expected_outcome": "e",
+         "status": "Closed" if i % 2 else "New"}
+        for i in range(n)
+    )
+    import_tickets(rows)
+
+
+def _export_peak(fmt):
+    tracemalloc.start()
+    try:
+        count = export_tickets(_NullWriter(), fmt, batch_size=200)
+        return count, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_iter_tickets_filters_and_batches():
+    ids = [create_ticket("Bug", f"T{i}", "s", "p", "s", "o", "e", "x",
+                         status="Closed" if i % 2 else "New") for i in range(7)]
+
+    rows = list(iter_tickets(statuses=["New"], batch_size=2))
+
+    assert [r["ticket_id"] for r in rows] == ids[::2]
+    assert rows[0]["steps_to_replicate"] == "s"
+
+
+def test_export_csv_and_jsonl():
+    tid = create_ticket("Bug", "Crash, badly", "s", "p", "line1\nline2", "o", "e", "alice")
+
+    buf = io.StringIO()
+    assert export_tickets(buf, "csv") == 1
+    row = list(csv.DictReader(io.StringIO(buf.getvalue())))[0]
+    assert row["subject"] == "Crash, badly" and row["steps_to_replicate"] == "line1\nline2"
+
+    buf = io.StringIO()
+    export_tickets(buf, "jsonl")
+    assert json.loads(buf.getvalue())["ticket_id"] == tid
+
+
+def test_export_then_import_keeps_assignees():
+    create_user("alice", "pw", "user")
+    alice = list_users()[0]["id"]
+    create_ticket("Bug", "Crash", "s", "p", "s", "o", "e", "bob", user_id=alice)
+
+    buf = io.StringIO()
+    export_tickets(buf, "csv")
+    report = import_tickets(csv.DictReader(io.StringIO(buf.getvalue())))
+
+    assert report.inserted == 1 and report.rejected == []
+    assert get_ticket(2)["user_id"] == alice
+
+
+def test_export_memory_stays_flat():
+    _seed(1000)
+    small_count, small_peak = _export_peak("jsonl")
+    _seed(4000)
+    large_count, large_peak = _export_peak("jsonl")
+
+    assert (small_count, large_count) == (1000, 5000)
+    # one batch of ~1 KB rows plus overhead, independent of the total
+    assert large_peak < 2 * 1024 * 1024
+    assert large_peak < small_peak * 1.5
+
+
+def test_export_files_left_behind_are_aged_out(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "EXPORT_DIR", str(tmp_path / "exports"))
+    create_ticket("Bug", "Crash", "sum", "pre", "steps", "out", "exp", "alice")
+
+    with new_export_file("csv") as abandoned:
+        export_tickets(abandoned, "csv")
+    stale = time.time() - db.EXPORT_MAX_AGE - 60
+    os.utime(abandoned.name, (stale, stale))
+    with new_export_file("csv") as recent:
+        pass
+    with new_export_file("jsonl") as latest:
+        export_tickets(latest, "jsonl")
+
+    assert sorted(os.listdir(db.EXPORT_DIR)) == sorted(
+        os.path.basename(f.name) for f in (recent, latest)
+    )
+    assert os.stat(db.EXPORT_DIR).st_mode & 0o777 == 0o700
@@ -0,0 +1,90 @@
+import json
+
+import db
+import history
+from db import (
+    bulk_assign,
+    bulk_update_status,
+    create_ticket,
+    get_ticket,
+    get_ticket_as_of,
+    list_ticket_history,
+    patch_ticket,
+    update_ticket,
+    update_ticket_status,
+)
+
+STEPS = "".join(f"{i}. do step {i} of the reproduction\n" for i in range(1, 41))
+
+
+def test_long_text_is_stored_as_a_reverse_line_diff():
+    edited = STEPS.replace("7. do step 7", "7. do step seven")
+    ops = history.reverse_diff(edited, STEPS)
+    assert history.apply_reverse(edited, ops) == STEPS
+
+    stored = history.encode_changes({"steps_to_replicate": STEPS, "status": "New"},
+                                    {"steps_to_replicate": edited, "status": "Closed"})
+    assert len(stored) < len(STEPS) / 10
+    assert history.undo({"steps_to_replicate": edited, "status": "Closed"}, stored) == {
+        "steps_to_replicate": STEPS,
+        "status": "New",
+    }
+
+
+def test_writes_record_only_changed_fields_and_page_newest_first():
+    tid = create_ticket("Bug", "Crash", "sum", "pre", STEPS, "out", "exp", "alice")
+    update_ticket_status(tid, "In Progress", changed_by="bob")
+    update_ticket_status(tid, "In Progress", changed_by="bob")  # no change, no entry
+    update_ticket(tid, "Bug", "Crash", "sum", "pre", STEPS + "41. boom\n", "out", "exp",
+                  "In Progress", None, None, changed_by="carol")
+    bulk_update_status([tid], "Closed", changed_by="dave")
+
+    with db._connect() as con:
+        stored = con.execute(
+            "SELECT version, changed_by, changes FROM ticket_history WHERE ticket_id = ? ORDER BY version",
+            (tid,),
+        ).fetchall()
+    assert [(v, who, list(json.loads(c))) for v, who, c in stored] == [
+        (2, "bob", ["status"]),
+        (3, "carol", ["steps_to_replicate"]),
+        (4, "dave", ["status"]),
+    ]
+
+    page, cursor = list_ticket_history(tid, limit=2)
+    assert [(e["version"], e["changes"]) for e in page] == [
+        (4, {"status": ("In Progress", "Closed")}),
+        (3, {"steps_to_replicate": (STEPS, STEPS + "41. boom\n")}),
+    ]
+    page, cursor = list_ticket_history(tid, limit=2, before=cursor)
+    assert [(e["version"], e["changed_by"], e["changes"]) for e in page] == [
+        (2, "bob", {"status": ("New", "In Progress")}),
+    ]
+    assert cursor is None
+
+
+def test_ticket_as_of_walks_back_from_the_current_row():
+    tid = create_ticket("Bug", "Crash", "sum", "pre", STEPS, "out", "exp", "alice")
+    patch_ticket(tid, {"subject": "Crash on save", "steps_to_replicate": STEPS + "41. boom\n"}, 1)
+    patch_ticket(tid, {"status": "Closed"}, 2)
+    with db._connect() as con:
+        con.execute("UPDATE tickets SET created_ts = 1000 WHERE ticket_id = ?", (tid,))
+        con.execute("UPDATE ticket_history SET changed_ts = 1000 + version * 100 WHERE ticket_id = ?", (tid,))
+
+    assert get_ticket_as_of(tid, 999) is None
+    first = get_ticket_as_of(tid, 1100)
+    assert (first["subject"], first["steps_to_replicate"], first["status"], first["version"]) == (
+        "Crash", STEPS, "New", 1,
+    )
+    middle = get_ticket_as_of(tid, 1250)
+    assert (middle["subject"], middle["status"], middle["version"], middle["updated_ts"]) == (
+        "Crash on save", "New", 2, 1200,
+    )
+    assert get_ticket_as_of(tid, 1300)["status"] == "Closed"
+
+
+def test_no_op_bulk_writes_leave_version_and_history_alone():
+    tid = create_ticket("Bug", "Crash", "sum", "pre", "steps", "out", "exp", "alice")
+    assert bulk_assign([tid], None, changed_by="bob") == 0
+    assert bulk_update_status([tid], "New", changed_by="bob") == 0
+    assert get_ticket(tid)["version"] == 1
+    assert list_ticket_history(tid) == ([], None)
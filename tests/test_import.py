@@ -0,0 +1,101 @@
+import csv
+import json
+
+import db
+import writer
+from auth import create_user
+from db import (
+    check_ticket_counters,
+    get_ticket,
+    import_tickets,
+    list_ticket_history,
+    list_tickets,
+    read_ticket_file,
+)
+
+FIELDS = [
+    "ticket_id", "parent_id", "ticket_type", "subject", "summary", "prerequisites",
+    "steps_to_replicate", "outcome", "expected_outcome", "status", "assignee",
+]
+
+
+def _bug(source_id, subject, **extra):
+    row = {
+        "ticket_id": source_id, "ticket_type": "Bug", "subject": subject, "summary": "s",
+        "prerequisites": "p", "steps_to_replicate": "steps", "outcome": "o",
+        "expected_outcome": "e",
+    }
+    row.update(extra)
+    return row
+
+
+def test_import_csv_in_batches_with_assignees_and_parents(tmp_path):
+    create_user("alice", "pw", "user")
+    path = tmp_path / "tickets.csv"
+    with open(path, "w", newline="") as f:
+        out = csv.DictWriter(f, fieldnames=FIELDS)
+        out.writeheader()
+        out.writerow(_bug(501, "Child", parent_id=900, assignee="alice"))
+        out.writerow(_bug(900, "Epic", status="In Progress"))
+        out.writerow(_bug(901, "Sibling", parent_id=900))
+
+    report = import_tickets(read_ticket_file(str(path)), batch_size=2, created_by="importer")
+
+    assert report.inserted == 3 and report.rejected == [] and report.unresolved_parents == 0
+    by_subject = {r["subject"]: get_ticket(r["ticket_id"]) for r in list_tickets()}
+    epic = by_subject["Epic"]["ticket_id"]
+    assert by_subject["Child"]["parent_id"] == epic
+    assert by_subject["Sibling"]["parent_id"] == epic
+    assert by_subject["Child"]["assigned_to"] == "alice"
+    assert by_subject["Epic"]["status"] == "In Progress"
+    assert by_subject["Epic"]["created_by"] == "importer"
+    assert check_ticket_counters() == []
+    assert len(list_tickets(search="sibling")) == 1
+    if writer.ENABLED:
+        # two batches and the parent fix-up, each its own queued write
+        assert writer.get_writer(db.DB_PATH).operations == 3
+
+
+def test_import_rejects_invalid_rows(tmp_path):
+    path = tmp_path / "tickets.jsonl"
+    rows = [
+        _bug(1, "Fine"),
+        _bug(2, "No summary", summary=""),
+        {"ticket_type": "Test Case", "subject": "TC", "prerequisites": "p",
+         "steps_to_replicate": "s", "expected_outcome": "e"},
+        _bug(3, "Ghost assignee", assignee="nobody"),
+        _bug(4, "Orphan", parent_id=77),
+        _bug(5, "Made-up status", status="Done-ish"),
+    ]
+    path.write_text("\n".join(json.dumps(r) for r in rows))
+
+    report = import_tickets(read_ticket_file(str(path)))
+
+    assert report.inserted == 3
+    assert report.rejected == [
+        (2, "missing Summary"),
+        (4, "unknown assignee 'nobody'"),
+        (6, "unknown status 'Done-ish'"),
+    ]
+    assert report.unresolved_parents == 1
+
+
+def test_import_links_deferred_parents_and_skips_cycles():
+    rows = [
+        _bug(1, "A", parent_id=2),
+        _bug(2, "B", parent_id=1),   # closes a cycle with A
+        _bug(3, "C", parent_id=4),
+        _bug(4, "D"),
+    ]
+    report = import_tickets(rows, created_by="importer")
+
+    assert report.inserted == 4 and report.unresolved_parents == 1
+    ids = {r["subject"]: r["ticket_id"] for r in list_tickets()}
+    assert get_ticket(ids["C"])["parent_id"] == ids["D"]
+    assert [get_ticket(ids[s])["parent_id"] is None for s in "AB"].count(True) == 1
+
+    # every version the fix-up created is accounted for in the history
+    entries, _ = list_ticket_history(ids["C"])
+    assert [(e["version"], e["changed_by"], e["changes"]) for e in entries] == [
+        (get_ticket(ids["C"])["version"], "importer", {"parent_id": (None, ids["D"])}),
+    ]
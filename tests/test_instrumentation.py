@@ -0,0 +1,117 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import db
+import instrumentation
+import writer
+from db import create_ticket, get_dashboard_stats, get_ticket, list_tickets
+from instrumentation import QueryStats, normalize_sql, read_slow_log
+
+
+@pytest.fixture
+def stats(tmp_path, monkeypatch):
+    monkeypatch.setattr(instrumentation, "ENABLED", True)
+    stats = QueryStats(slow_ms=0, slow_log=str(tmp_path / "slow.log"))
+    monkeypatch.setattr(instrumentation, "query_stats", stats)
+    return stats
+
+
+def test_normalize_sql_groups_statements_by_shape():
+    assert normalize_sql("SELECT *  FROM t\n WHERE a IN (?, ?, ?) AND b = 'x' LIMIT 10") == (
+        "SELECT * FROM t WHERE a IN (...) AND b = ? LIMIT ?"
+    )
+    assert normalize_sql("SELECT 1 FROM idx_2") == "SELECT ? FROM idx_2"
+
+
+def test_statements_are_attributed_timed_and_logged(stats):
+    for i in range(3):
+        create_ticket("Bug", f"T{i}", "s", "p", "s", "o", "e", "alice")
+    list_tickets.uncached(statuses=["New"])
+    get_ticket(1)
+
+    top = {(r["function"], r["sql"].split()[0]): r for r in stats.top(100)}
+    listed = top[("db.list_tickets", "SELECT")]
+    assert listed["calls"] == 1 and listed["rows"] == 3
+    assert top[("db.create_ticket", "INSERT")]["calls"] == 3
+    assert top[("db._load_ticket", "SELECT")]["rows"] == 1
+    assert listed["p95_ms"] >= listed["p50_ms"] > 0
+
+    logged = read_slow_log(path=stats.slow_log)
+    assert {e["function"] for e in logged} >= {"db.list_tickets", "db.create_ticket"}
+
+
+@pytest.mark.parametrize("queued", [False, True])
+def test_lock_waits_are_measured(stats, monkeypatch, queued):
+    monkeypatch.setattr(writer, "ENABLED", queued)
+    locked = threading.Event()
+
+    def hold_write_lock():
+        blocker = sqlite3.connect(db.DB_PATH, isolation_level=None)
+        blocker.execute("BEGIN IMMEDIATE")
+        locked.set()
+        time.sleep(0.1)
+        blocker.execute("COMMIT")
+        blocker.close()
+
+    holder = threading.Thread(target=hold_write_lock)
+    holder.start()
+    locked.wait()
+    create_ticket("Bug", "Waited", "s", "p", "s", "o", "e", "alice")
+    holder.join()
+
+    if queued:
+        # the writer thread takes the lock up front for the whole batch
+        waited = next(r for r in stats.top(100) if r["sql"] == "BEGIN IMMEDIATE")
+        assert waited["function"] == "writer._commit"
+    else:
+        waited = next(r for r in stats.top(100) if r["function"] == "db.create_ticket" and r["sql"].startswith("INSERT"))
+    assert waited["lock_wait_ms"] >= 50
+
+
+def test_generator_fed_executemany_survives_a_lock_retry(stats):
+    locked = threading.Event()
+
+    def hold_write_lock():
+        blocker = sqlite3.connect(db.DB_PATH, isolation_level=None)
+        blocker.execute("BEGIN IMMEDIATE")
+        locked.set()
+        time.sleep(0.1)
+        blocker.execute("COMMIT")
+        blocker.close()
+
+    holder = threading.Thread(target=hold_write_lock)
+    holder.start()
+    locked.wait()
+    with db._connect() as con:
+        con.executemany(
+            "INSERT INTO users (username, password_hash, role, created_at) VALUES (?, x'00', 'user', '')",
+            ((f"user{i}",) for i in range(3)),
+        )
+    holder.join()
+
+    with db._connect() as con:
+        assert con.execute("SELECT COUNT(*) FROM users WHERE username LIKE 'user%'").fetchone()[0] == 3
+    inserted = next(r for r in stats.top(100) if r["sql"].startswith("INSERT INTO users"))
+    assert inserted["lock_wait_ms"] >= 50
+
+
+# the per-row fields Home.py renders from the dashboard lists
+HOME_ROW_FIELDS = ("ticket_id", "subject", "status", "created_at", "ticket_type", "created_by")
+
+
+def test_dashboard_lists_take_one_query_each(stats):
+    for i in range(5):
+        create_ticket("Bug", f"T{i}", "s", "p", "s" * 5000, "o", "e", "alice")
+    stats.reset()
+
+    dashboard = get_dashboard_stats.uncached("alice", top_n=5)
+    for row in dashboard["unassigned_top"] + dashboard["assigned_to_me_top"]:
+        for name in HOME_ROW_FIELDS:
+            row[name]
+
+    listed = [r for r in stats.top(100) if r["sql"].endswith("LIMIT ?")]
+    assert [r["calls"] for r in listed] == [1, 1]
+    assert all(r["function"] == "db.get_dashboard_stats" for r in stats.top(100))
@@ -0,0 +1,137 @@
+import threading
+
+import db
+import migrations
+from connection import connect
+from migrations import current_version, latest_version, migrate, pending
+
+
+def _legacy_db(path, rows):
+    """A tickets table in the pre-ticket_id shape that migrate.py used to fix."""
+    with connect(str(path)) as con:
+        con.execute(
+            """
+            CREATE TABLE tickets (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                summary TEXT NOT NULL,
+                prerequisites TEXT,
+                steps_to_replicate TEXT,
+                outcome TEXT,
+                expected_outcome TEXT,
+                status TEXT NOT NULL DEFAULT 'Open'
+                    CHECK(status IN ('Open','In Progress','Closed')),
+                created_by TEXT,
+                created_at TEXT NOT NULL DEFAULT (datetime('now'))
+            )
+            """
+        )
+        con.executemany(
+            "INSERT INTO tickets (id, summary, status, created_by) VALUES (?, ?, 'Open', 'old')",
+            [(i, f"legacy {i}") for i in rows],
+        )
+
+
+def test_fresh_database_is_at_latest_version():
+    with db._connect() as con:
+        assert current_version(con) == latest_version()
+        assert pending(con) == []
+
+
+def test_init_db_is_a_no_op_after_first_call(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("migrations should not run again")
+
+    monkeypatch.setattr(db, "migrate", fail)
+    db.init_db()
+
+
+def test_legacy_table_is_copied_in_batches_keeping_ids(tmp_path):
+    path = tmp_path / "legacy.db"
+    _legacy_db(path, [1, 2, 5, 9, 10])
+
+    with connect(str(path)) as con:
+        migrate(con, batch_size=2)
+        rows = con.execute("SELECT ticket_id, subject, ticket_type, status FROM tickets").fetchall()
+        assert current_version(con) == latest_version()
+
+    assert [tuple(r) for r in rows] == [
+        (i, f"legacy {i}", "Bug", "Open") for i in [1, 2, 5, 9, 10]
+    ]
+
+
+def test_interrupted_copy_resumes(tmp_path):
+    path = tmp_path / "legacy.db"
+    _legacy_db(path, range(1, 8))
+
+    with connect(str(path)) as con:
+        # simulate a crash after the first batch of a previous run
+        con.execute("PRAGMA foreign_keys = OFF")
+        con.execute(migrations.TICKETS_SCHEMA.format(name="tickets_new"))
+        con.execute(
+            "INSERT INTO tickets_new (ticket_id, subject, summary) VALUES (1, 'legacy 1', 'legacy 1'), (2, 'legacy 2', 'legacy 2')"
+        )
+        con.commit()
+
+        migrate(con, batch_size=3)
+        ids = [r[0] for r in con.execute("SELECT ticket_id FROM tickets ORDER BY ticket_id")]
+
+    assert ids == list(range(1, 8))
+
+
+def test_missing_ticket_type_is_added_in_place(tmp_path):
+    path = tmp_path / "old.db"
+    with connect(str(path)) as con:
+        con.execute("PRAGMA foreign_keys = OFF")
+        con.execute(migrations.TICKETS_SCHEMA.format(name="tickets").replace(
+            "ticket_type TEXT NOT NULL DEFAULT 'Bug',", ""
+        ))
+        con.execute("INSERT INTO tickets (subject, summary) VALUES ('s', 'x')")
+        con.commit()
+        con.execute("PRAGMA foreign_keys = ON")
+
+        migrate(con)
+        row = con.execute("SELECT subject, ticket_type FROM tickets").fetchone()
+
+    assert tuple(row) == ("s", "Bug")
+
+
+def test_created_at_text_is_backfilled_to_epoch_columns(tmp_path):
+    path = tmp_path / "legacy.db"
+    _legacy_db(path, [1, 2, 3])
+    with connect(str(path)) as con:
+        con.executemany(
+            "UPDATE tickets SET created_at = ? WHERE id = ?",
+            [("2024-03-01 10:00:00", 1), ("2024-03-01T10:00:30.250000", 2), ("2024-03-01T12:00:00+02:00", 3)],
+        )
+
+    with connect(str(path)) as con:
+        migrate(con, batch_size=2)
+        rows = con.execute(
+            "SELECT created_at, created_ts, updated_ts FROM tickets ORDER BY ticket_id"
+        ).fetchall()
+
+    assert [tuple(r) for r in rows] == [
+        ("2024-03-01 10:00:00", 1709287200, 1709287200),
+        ("2024-03-01 10:00:30", 1709287230, 1709287230),
+        ("2024-03-01 10:00:00", 1709287200, 1709287200),
+    ]
+
+
+def test_migrating_from_a_stale_pending_list_changes_nothing(tmp_path, monkeypatch):
+    # two processes start on the same old database; one finishes first
+    path = tmp_path / "legacy.db"
+    _legacy_db(path, [1, 2, 3])
+    with connect(str(path)) as late:
+        stale = pending(late)
+
+        def migrate_first():
+            with connect(str(path)) as first:
+                migrate(first)
+
+        other = threading.Thread(target=migrate_first)
+        other.start()
+        other.join()
+
+        monkeypatch.setattr(migrations, "pending", lambda con: stale)
+        assert migrate(late) == []
+        assert current_version(late) == latest_version()
@@ -0,0 +1,119 @@
+import json
+import threading
+
+import pytest
+
+import profiler
+from profiler import PageStats
+
+
+@pytest.fixture
+def stats(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler, "ENABLED", True)
+    monkeypatch.setattr(profiler, "TRACE_MEMORY", False)
+    stats = PageStats(str(tmp_path / "profile.jsonl"))
+    monkeypatch.setattr(profiler, "page_stats", stats)
+    monkeypatch.setattr(profiler._local, "rerun", None, raising=False)
+    monkeypatch.setattr(profiler._local, "state", {}, raising=False)
+    return stats
+
+
+def test_phases_and_spans_are_recorded_and_logged(stats):
+    @profiler.span("helper")
+    def helper():
+        return 1
+
+    profiler.start("Home")
+    profiler.phase("auth")
+    profiler.phase("db")
+    with profiler.span("load"):
+        helper()
+    profiler.phase("render")
+    profiler.finish()
+
+    [sample] = stats.recent()
+    assert sample["page"] == "Home" and not sample["interrupted"]
+    assert [p["name"] for p in sample["phases"]] == ["setup", "auth", "db", "render"]
+    assert [s["name"] for s in sample["spans"]] == ["helper", "load"]
+    assert sample["total_ms"] >= sum(p["ms"] for p in sample["phases"]) - 0.01
+
+    with open(stats.log_path, encoding="utf-8") as f:
+        assert [json.loads(line)["page"] for line in f] == ["Home"]
+
+    rows = {r["phase"]: r for r in stats.summary()}
+    assert rows["(total)"]["samples"] == 1
+    assert {"auth", "db", "render", "span: load", "span: helper"} <= rows.keys()
+
+
+def test_abandoned_rerun_is_recorded_as_interrupted(stats):
+    profiler.start("Tickets")
+    profiler.phase("auth")
+    # st.switch_page raised here: finish() never ran
+    profiler.start("View_Ticket")
+    profiler.finish()
+
+    by_page = {s["page"]: s for s in stats.recent()}
+    assert by_page["Tickets"]["interrupted"]
+    assert [p["name"] for p in by_page["Tickets"]["phases"]] == ["setup"]
+    assert not by_page["View_Ticket"]["interrupted"]
+
+
+def test_rerun_cut_short_is_recorded_by_the_sessions_next_rerun(stats):
+    # Streamlit runs each rerun of a session on a fresh thread
+    session = {}
+
+    def rerun(page, finish):
+        profiler.start(page, session)
+        profiler.phase("auth")
+        if finish:
+            profiler.finish()
+
+    for page, finish in [("Tickets", False), ("View_Ticket", True), ("Home", True)]:
+        worker = threading.Thread(target=rerun, args=(page, finish))
+        worker.start()
+        worker.join()
+
+    assert sorted((s["page"], s["interrupted"]) for s in stats.recent()) == [
+        ("Home", False), ("Tickets", True), ("View_Ticket", False),
+    ]
+    assert session == {}
+
+
+def test_reruns_on_other_threads_are_kept_apart(stats):
+    profiler.start("Home")
+    worker = threading.Thread(target=lambda: (profiler.start("Tickets"), profiler.finish()))
+    worker.start()
+    worker.join()
+    profiler.finish()
+    assert sorted(s["page"] for s in stats.recent()) == ["Home", "Tickets"]
+    assert not any(s["interrupted"] for s in stats.recent())
+
+
+def test_disabled_profiler_records_nothing(stats, monkeypatch):
+    monkeypatch.setattr(profiler, "ENABLED", False)
+    profiler.start("Home")
+    profiler.phase("db")
+    with profiler.span("load"):
+        pass
+    profiler.finish()
+    assert stats.recent() == [] and stats.summary() == []
+
+
+def test_memory_deltas_when_tracing(stats):
+    profiler.enable(memory=True)
+    try:
+        profiler.start("Home")
+        profiler.phase("db")
+        rows = [bytearray(1024) for _ in range(512)]
+        profiler.phase("render")
+        profiler.finish()
+    finally:
+        profiler.disable()
+    del rows
+
+    [sample] = stats.recent()
+    db_phase = next(p for p in sample["phases"] if p["name"] == "db")
+    assert db_phase["alloc_kb"] >= 512
+    assert sample["peak_kb"] >= 512
+    row = next(r for r in stats.summary() if r["phase"] == "db")
+    assert row["mean_alloc_kb"] >= 512
@@ -0,0 +1,49 @@
+from db import (
+    create_ticket,
+    delete_ticket,
+    get_ancestors,
+    get_descendants,
+    get_subtree,
+    get_ticket,
+    get_ticket_tree,
+    list_tickets,
+    list_tickets_page,
+    update_ticket,
+    update_ticket_status,
+)
+from query_plan import capture_queries, full_scans, unindexed_foreign_keys
+
+
+def _seed():
+    parent = create_ticket("Bug", "Parent", "s", "p", "s", "o", "e", "alice")
+    child = create_ticket("Bug", "Child", "s", "p", "s", "o", "e", "alice", parent_id=parent)
+    return parent, child
+
+
+def test_hot_ticket_queries_use_indexes():
+    parent, child = _seed()
+
+    with capture_queries() as statements:
+        list_tickets(statuses=["New", "In Progress"])
+        list_tickets(search="child")
+        list_tickets(created_from=0, created_to=2**31)
+        list_tickets(updated_from=0)
+        list_tickets_page(statuses=["New"], created_from=0, limit=1)
+        _, cursor = list_tickets_page(statuses=["New", "In Progress"], limit=1)
+        list_tickets_page(statuses=["New", "In Progress"], after=cursor, limit=1)
+        get_ticket(child)
+        get_ancestors(child)
+        get_descendants(parent)
+        get_subtree(parent)
+        get_ticket_tree(child)
+        update_ticket_status(child, "In Progress")
+        update_ticket(child, "Bug", "Child", "s", "p", "s", "o", "e", "Open", None, parent)
+        delete_ticket(child)
+
+    assert statements
+    assert full_scans(statements) == []
+
+
+def test_foreign_key_columns_are_indexed():
+    # ON DELETE SET NULL looks these up on every user / parent ticket delete
+    assert unindexed_foreign_keys("tickets") == []
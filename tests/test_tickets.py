@@ -1,7 +1,34 @@
+import sqlite3
+
+import db
+from auth import create_user
+import pytest
+
 from db import (
+    TicketConflictError,
+    TicketCycleError,
+    bulk_assign,
+    bulk_delete,
+    bulk_set_parent,
+    bulk_update_status,
+    check_ticket_counters,
     create_ticket,
+    delete_user,
+    get_ancestors,
+    get_dashboard_stats,
+    get_descendants,
+    get_subtree,
+    get_ticket_tree,
+    delete_ticket,
     list_tickets,
+    list_tickets_page,
+    patch_ticket,
+    list_users,
     get_ticket,
+    rebuild_search_index,
+    rebuild_ticket_closure,
+    rebuild_ticket_counters,
+    update_ticket,
     update_ticket_status,
 )
 
@@ -62,4 +89,322 @@ def test_update_ticket_status():
     update_ticket_status(tid, "In Progress")
     t = get_ticket(tid)
 
-    assert t["status"] == "In Progress"
\ No newline at end of file
+    assert t["status"] == "In Progress"
+
+
+def test_search_covers_all_text_fields_with_prefixes_and_ranking():
+    body = create_ticket("Bug", "Crash", "sum", "pre", "Open the invoice screen", "out", "exp", "alice")
+    title = create_ticket("Bug", "Invoice totals wrong", "s", "p", "s", "o", "e", "bob")
+
+    results = list_tickets(search="invo")
+    assert [r["ticket_id"] for r in results] == [title, body]
+    assert "**invoice**" in results[1]["snippet"].lower()
+
+
+def test_search_index_follows_updates_and_deletes():
+    tid = create_ticket("Bug", "Crash", "sum", "pre", "steps", "out", "exp", "alice")
+    update_ticket(tid, "Bug", "Timeout", "sum", "pre", "steps", "out", "exp", "New", None, None)
+
+    assert list_tickets(search="crash") == []
+    assert len(list_tickets(search="timeout")) == 1
+
+    delete_ticket(tid)
+    rebuild_search_index()
+    assert list_tickets(search="timeout") == []
+
+
+def test_list_tickets_page_walks_all_rows_with_cursors():
+    ids = [
+        create_ticket("Bug", f"T{i}", "s", "p", "s", "o", "e", "alice",
+                      status=["New", "Open", "Closed"][i % 3])
+        for i in range(12)
+    ]
+    expected = [tid for i, tid in enumerate(ids) if i % 3 != 2][::-1]
+
+    seen, cursor = [], None
+    while True:
+        rows, cursor = list_tickets_page(statuses=["New", "Open"], after=cursor, limit=3)
+        assert len(rows) <= 3
+        seen += [r["ticket_id"] for r in rows]
+        if cursor is None:
+            break
+
+    # all tickets share created_at (same second), so ticket_id breaks the tie
+    assert seen == expected
+
+
+@pytest.mark.parametrize("sort", ["subject", "status", "id"])
+@pytest.mark.parametrize("descending", [True, False])
+def test_list_tickets_page_sorts_in_sql(sort, descending):
+    for i, subject in enumerate(["pear", "apple", "fig", "apple", "kiwi", "date", "fig"]):
+        create_ticket("Bug", subject, "s", "p", "s", "o", "e", "alice", status=["New", "Open"][i % 2])
+    column = db.SORT_COLUMNS[sort]
+    expected = sorted(
+        ((r[column], r["ticket_id"]) for r in list_tickets()), reverse=descending
+    )
+
+    seen, cursor = [], None
+    while True:
+        rows, cursor = list_tickets_page(
+            statuses=["New", "Open"], after=cursor, limit=2, sort=sort, descending=descending
+        )
+        seen += [(r[column], r["ticket_id"]) for r in rows]
+        if cursor is None:
+            break
+    assert seen == expected
+
+    with pytest.raises(ValueError):
+        list_tickets_page(sort="subject; DROP TABLE tickets")
+
+
+def test_list_tickets_page_ranks_search_results_by_relevance():
+    for i, subject in enumerate(["invoice", "crash", "invoice totals", "login", "invoice export"]):
+        create_ticket("Bug", subject, "s", "p", "invoice" if i == 1 else "s", "o", "e", "alice")
+    expected = [r["ticket_id"] for r in list_tickets(search="invoice")]
+
+    seen, cursor = [], None
+    while True:
+        rows, cursor = list_tickets_page(search="invoice", after=cursor, limit=2, sort="relevance")
+        seen += [r["ticket_id"] for r in rows]
+        if cursor is None:
+            break
+    assert seen == expected
+    # without a search term there is nothing to rank by
+    assert [r["ticket_id"] for r in list_tickets_page(sort="relevance")[0]] == [5, 4, 3, 2, 1]
+
+
+def test_projections_leave_long_text_for_first_access():
+    tid = create_ticket("Bug", "Slow page", "sum", "pre", "1. step", "out", "exp", "alice")
+    long_text = set(db.TICKET_COLUMNS) - set(db.PROJECTIONS["list"])
+    assert {"summary", "prerequisites", "steps_to_replicate", "outcome"} <= long_text
+
+    [row] = list_tickets()
+    assert not long_text & set(sqlite3.Row.keys(row))
+    assert row["subject"] == "Slow page" and row["assigned_to"] == ""
+    assert "steps_to_replicate" in row.keys()
+
+    # the lazy read fetches the current version of the whole row
+    update_ticket(tid, "Bug", "Renamed", "sum", "pre", "1. step\n2. again", "out", "exp", "Open", None, None)
+    assert row["steps_to_replicate"] == "1. step\n2. again"
+    assert row["subject"] == "Renamed" and row["assigned_to"] == ""
+
+    row = get_ticket(tid, fields=["status"])
+    assert set(sqlite3.Row.keys(row)) == {"ticket_id", "status"}
+    assert row["expected_outcome"] == "exp" and row["assigned_to"] is None
+
+    with pytest.raises(ValueError):
+        list_tickets(fields=["subject", "password_hash"])
+
+
+def test_dashboard_stats_are_aggregated_in_sql():
+    create_user("alice", "pw", "user")
+    create_user("bob", "pw", "user")
+    alice, bob = [u["id"] for u in list_users()]
+
+    create_ticket("Bug", "A1", "s", "p", "s", "o", "e", "x", user_id=alice, status="In Progress")
+    create_ticket("Bug", "A2", "s", "p", "s", "o", "e", "x", user_id=alice, status="Closed")
+    create_ticket("Bug", "B1", "s", "p", "s", "o", "e", "x", user_id=bob, status="In Progress")
+    create_ticket("Bug", "U1", "s", "p", "s", "o", "e", "x")
+    create_ticket("Bug", "U2", "s", "p", "s", "o", "e", "x", status="Released")
+
+    stats = get_dashboard_stats("ALICE", top_n=1)
+
+    assert stats["total"] == 5
+    assert stats["open"] == 3
+    assert stats["new_this_week"] == 5
+    assert stats["assigned_to_me"] == 2
+    assert stats["unassigned"] == 2
+    assert stats["status_counts"] == {"In Progress": 2, "Closed": 1, "New": 1, "Released": 1}
+    assert stats["in_progress_by_user"] == {"alice": 1, "bob": 1}
+    assert [r["subject"] for r in stats["unassigned_top"]] == ["U2"]
+    assert [r["subject"] for r in stats["assigned_to_me_top"]] == ["A2"]
+
+
+def test_ticket_counters_follow_every_write():
+    create_user("carol", "pw", "user")
+    carol = list_users()[0]["id"]
+
+    a = create_ticket("Bug", "A", "s", "p", "s", "o", "e", "x", user_id=carol)
+    b = create_ticket("Test Case", "B", "", "p", "s", "", "e", "x")
+    update_ticket_status(a, "In Progress")
+    update_ticket(b, "Bug", "B", "s", "p", "s", "o", "e", "Closed", carol, None)
+    delete_ticket(a)
+    delete_user(carol)  # ON DELETE SET NULL unassigns ticket b
+
+    assert check_ticket_counters() == []
+    assert get_dashboard_stats("carol")["status_counts"] == {"Closed": 1}
+    assert get_dashboard_stats("carol")["unassigned"] == 1
+
+
+def test_ticket_counters_rebuild_repairs_drift():
+    create_ticket("Bug", "A", "s", "p", "s", "o", "e", "x")
+    with db._connect() as con:
+        con.execute("UPDATE ticket_counters SET n = 7")
+
+    assert [tuple(r) for r in check_ticket_counters()] == [("New", 0, "Bug", 7, 1)]
+    rebuild_ticket_counters()
+    assert check_ticket_counters() == []
+
+
+def test_bulk_operations_by_ids_and_filter():
+    create_user("dave", "pw", "user")
+    dave = list_users()[0]["id"]
+    a = create_ticket("Bug", "Login crash", "s", "p", "s", "o", "e", "x")
+    b = create_ticket("Bug", "Logout crash", "s", "p", "s", "o", "e", "x")
+    c = create_ticket("Test Case", "Report export", "", "p", "s", "", "e", "x")
+
+    assert bulk_update_status([a, b], "In Progress") == 2
+    assert [get_ticket(t)["status"] for t in (a, b, c)] == ["In Progress", "In Progress", "New"]
+
+    assert bulk_assign({"statuses": ["In Progress"], "search": "login"}, dave) == 1
+    assert get_ticket(a)["user_id"] == dave and get_ticket(b)["user_id"] is None
+
+    # the parent is never made its own parent
+    assert bulk_set_parent([a, b, c], c) == 2
+    assert get_ticket(c)["parent_id"] is None
+
+    assert bulk_delete({"ticket_type": "Bug"}) == 2
+    assert get_ticket(a) is None and get_ticket(c) is not None
+    assert check_ticket_counters() == []
+
+
+def test_bulk_operations_reject_bad_filters():
+    create_ticket("Bug", "A", "s", "p", "s", "o", "e", "x")
+    with pytest.raises(ValueError):
+        bulk_delete({})
+    with pytest.raises(ValueError):
+        bulk_update_status({"owner": "x"}, "Closed")
+    assert bulk_delete([]) == 0
+
+
+def _closure():
+    with db._connect() as con:
+        return sorted(tuple(r) for r in con.execute("SELECT * FROM ticket_closure"))
+
+
+def test_hierarchy_follows_insert_reparent_and_delete():
+    def new(subject, parent=None):
+        return create_ticket("Bug", subject, "s", "p", "s", "o", "e", "x", parent_id=parent)
+
+    epic = new("Epic")
+    story = new("Story", epic)
+    task = new("Task", story)
+    other = new("Other", epic)
+
+    assert [r["ticket_id"] for r in get_ancestors(task)] == [epic, story]
+    assert [(r["ticket_id"], r["depth"]) for r in get_descendants(epic)] == [(story, 1), (other, 1), (task, 2)]
+    assert [(r["ticket_id"], r["depth"]) for r in get_subtree(epic)] == [(epic, 0), (story, 1), (task, 2), (other, 1)]
+    assert get_ticket_tree(task) == get_ticket_tree(epic) == get_subtree(epic)
+
+    # moving a subtree moves all of its descendants
+    update_ticket(story, "Bug", "Story", "s", "p", "s", "o", "e", "New", None, other)
+    assert [r["ticket_id"] for r in get_ancestors(task)] == [epic, other, story]
+
+    delete_ticket(other)  # ON DELETE SET NULL detaches story
+    assert get_ancestors(task)[0]["ticket_id"] == story
+    assert get_descendants(epic) == []
+
+    new("Leaf", task)
+    delete_ticket(new("Gone", epic))
+
+    # the triggers left exactly what a rebuild from parent_id produces
+    maintained = _closure()
+    rebuild_ticket_closure()
+    assert _closure() == maintained
+
+
+def test_parent_changes_that_would_cycle_are_rejected():
+    a = create_ticket("Bug", "A", "s", "p", "s", "o", "e", "x")
+    b = create_ticket("Bug", "B", "s", "p", "s", "o", "e", "x", parent_id=a)
+    c = create_ticket("Bug", "C", "s", "p", "s", "o", "e", "x", parent_id=b)
+
+    with pytest.raises(TicketCycleError):
+        update_ticket(a, "Bug", "A", "s", "p", "s", "o", "e", "New", None, c)
+    with pytest.raises(TicketCycleError):
+        update_ticket(a, "Bug", "A", "s", "p", "s", "o", "e", "New", None, a)
+    with pytest.raises(TicketCycleError):
+        bulk_set_parent([a], c)
+    with pytest.raises(ValueError):
+        create_ticket("Bug", "D", "s", "p", "s", "o", "e", "x", parent_id=999)
+
+    assert get_ticket(a)["parent_id"] is None
+    assert [r["ticket_id"] for r in get_ancestors(c)] == [a, b]
+
+
+def test_list_tickets_filters_on_created_and_updated_ranges():
+    import datetime
+
+    old = create_ticket("Bug", "Old", "s", "p", "s", "o", "e", "x")
+    new = create_ticket("Bug", "New", "s", "p", "s", "o", "e", "x")
+    with db._connect() as con:
+        # 2024-01-10 12:00 UTC, last touched 2024-02-01
+        con.execute("UPDATE tickets SET created_ts = 1704888000, updated_ts = 1706745600 WHERE ticket_id = ?", (old,))
+
+    ids = lambda rows: [r["ticket_id"] for r in rows]
+    assert ids(list_tickets(created_from=datetime.date(2024, 1, 11))) == [new]
+    assert ids(list_tickets(created_to=datetime.date(2024, 1, 10))) == [old]  # whole day included
+    assert ids(list_tickets(created_to="2024-01-10T12:00:00")) == []          # exclusive bound
+    assert ids(list_tickets(created_to="2024-01-10")) == [old]                # same as the date
+    assert ids(list_tickets(created_from="2024-01-10", created_to="2024-01-10")) == [old]
+    assert ids(list_tickets(updated_from=1706745600, updated_to=1706745601)) == [old]
+    rows, _ = list_tickets_page(statuses=["New"], created_from=datetime.date(2024, 1, 1), created_to=datetime.date(2024, 1, 31))
+    assert ids(rows) == [old]
+
+    update_ticket_status(old, "Closed")
+    assert ids(list_tickets(updated_to=datetime.date(2024, 2, 1))) == []
+    with pytest.raises(ValueError):
+        list_tickets(created_from="last tuesday")
+
+
+@pytest.mark.parametrize("value", [True, False, 1704888000.5, float("nan"), [2024, 1, 10]])
+def test_range_filters_reject_values_that_are_not_timestamps(value):
+    with pytest.raises(ValueError):
+        list_tickets(created_from=value)
+    with pytest.raises(ValueError):
+        list_tickets_page(statuses=["New"], updated_to=value)
+
+
+def test_patch_ticket_writes_only_changed_fields_and_bumps_version():
+    tid = create_ticket("Bug", "Crash", "sum", "pre", "steps", "out", "exp", "alice")
+    assert get_ticket(tid)["version"] == 1
+
+    statements = []
+    with db._connect() as con:  # nested writes share this connection
+        con.set_trace_callback(statements.append)
+        assert patch_ticket(tid, {"status": "In Progress"}, expected_version=1) == 2
+        con.set_trace_callback(None)
+    # no text column is in the UPDATE, so the search index trigger skips it
+    update = next(s for s in statements if s.lstrip().startswith("UPDATE tickets"))
+    assert "status = " in update and "subject" not in update and "summary" not in update
+
+    assert patch_ticket(tid, {"subject": "Timeout"}, expected_version=2) == 3
+    t = get_ticket(tid)
+    assert (t["subject"], t["status"], t["summary"], t["version"]) == ("Timeout", "In Progress", "sum", 3)
+    assert len(list_tickets(search="timeout")) == 1
+
+    with pytest.raises(ValueError):
+        patch_ticket(tid, {"created_by": "mallory"}, expected_version=3)
+    with pytest.raises(TicketCycleError):
+        patch_ticket(tid, {"parent_id": tid}, expected_version=3)
+
+
+def test_patch_ticket_rejects_stale_versions():
+    tid = create_ticket("Bug", "Crash", "sum", "pre", "steps", "out", "exp", "alice")
+    base = get_ticket(tid)["version"]
+
+    # every other kind of write moves the version on too
+    update_ticket_status(tid, "In Progress")
+    create_user("bob", "pw", "user")
+    bulk_assign([tid], list_users()[0]["id"])
+    with db._connect() as con:
+        con.execute("UPDATE tickets SET outcome = 'changed by hand' WHERE ticket_id = ?", (tid,))
+    assert get_ticket(tid)["version"] == base + 3
+
+    with pytest.raises(TicketConflictError) as conflict:
+        patch_ticket(tid, {"status": "Closed"}, expected_version=base)
+    assert conflict.value.current_version == base + 3
+    assert get_ticket(tid)["status"] == "In Progress"
+
+    delete_ticket(tid)
+    with pytest.raises(TicketConflictError, match="deleted"):
+        patch_ticket(tid, {"status": "Closed"}, expected_version=base + 3)
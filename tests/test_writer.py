@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+
+import db
+import writer
+from db import create_ticket, get_ticket, list_tickets
+
+
+def _block(writer_):
+    """Occupy the writer thread until the returned event is set."""
+    release, started = threading.Event(), threading.Event()
+
+    def wait():
+        started.set()
+        release.wait(5)
+
+    writer_.submit(wait)
+    started.wait(5)
+    return release
+
+
+def test_concurrent_writers_are_group_committed():
+    errors = []
+
+    def worker(n):
+        try:
+            for i in range(10):
+                create_ticket("Bug", f"T{n}-{i}", "s", "p", "s", "o", "e", "alice")
+        except Exception as exc:  # pragma: no cover - reported below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(32)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert len(list_tickets.uncached()) == 320
+    w = writer.get_writer(db.DB_PATH)
+    assert w.operations == 320
+    assert w.batches < w.operations  # several writes per transaction
+
+
+def test_failed_write_does_not_undo_its_batch():
+    w = writer.get_writer(db.DB_PATH)
+    release = _block(w)
+    futures = [
+        w.submit(create_ticket, "Bug", "Kept", "s", "p", "s", "o", "e", "alice"),
+        w.submit(create_ticket, "Bug", "Orphan", "s", "p", "s", "o", "e", "alice", parent_id=999),
+        w.submit(create_ticket, "Bug", "Also kept", "s", "p", "s", "o", "e", "alice"),
+    ]
+    batches = w.batches
+    release.set()
+
+    kept = futures[0].result(5)
+    with pytest.raises(ValueError):
+        futures[1].result(5)
+    also_kept = futures[2].result(5)
+    assert w.batches == batches + 2  # the blocker, then all three together
+    assert get_ticket(kept)["subject"] == "Kept"
+    assert get_ticket(also_kept)["subject"] == "Also kept"
+    assert [r["subject"] for r in list_tickets.uncached()] == ["Also kept", "Kept"]
+
+
+def test_full_queue_pushes_back(monkeypatch):
+    monkeypatch.setattr(writer, "QUEUE_SIZE", 2)
+    monkeypatch.setattr(writer, "SUBMIT_TIMEOUT", 0.05)
+    w = writer.get_writer(db.DB_PATH)
+    release = _block(w)
+    try:
+        w.submit(lambda: None)
+        w.submit(lambda: None)
+        with pytest.raises(writer.WriterBusyError):
+            w.submit(lambda: None)
+    finally:
+        release.set()
+
+
+def test_writes_inside_a_caller_transaction_run_inline():
+    with db._connect():
+        tid = create_ticket("Bug", "Inline", "s", "p", "s", "o", "e", "alice")
+    assert get_ticket(tid)["subject"] == "Inline"
+    assert db.DB_PATH not in writer._writers
@@ -0,0 +1,97 @@
+import pandas as pd
+import streamlit as st
+
+# Rows per page in each layout. A table is one element however many rows it
+# holds, so it can show a larger window than the per-row card layout.
+TABLE_PAGE_SIZE = 200
+CARD_PAGE_SIZE = 50
+
+
+def open_ticket(tid: int):
+    st.session_state.view_ticket_id = tid
+    st.switch_page("pages/View_Ticket.py")
+
+
+# ---------- Table layout ----------
+
+def _table_frame(rows) -> pd.DataFrame:
+    df = pd.DataFrame(
+        {
+            "ID": [r["ticket_id"] for r in rows],
+            "Type": [r["ticket_type"] for r in rows],
+            "Subject": [r["subject"] for r in rows],
+            "Status": [r["status"] for r in rows],
+            "Assigned": [r["assigned_to"] or "—" for r in rows],
+            "Created by": [r["created_by"] or "—" for r in rows],
+            "Created": [r["created_at"] for r in rows],
+            "Updated": pd.to_datetime([r["updated_ts"] for r in rows], unit="s"),
+        }
+    )
+    if any(r["snippet"] for r in rows):
+        df["Match"] = [(r["snippet"] or "").replace("**", "") for r in rows]
+    return df
+
+
+def render_table(rows, key: str, multi_select: bool = False) -> list[int]:
+    """
+    Show ``rows`` (list_tickets_page rows) as a single dataframe and return
+    the ticket IDs of the selected rows. Sorting is left to the query: the
+    table only ever holds the current page.
+    """
+    df = _table_frame(rows)
+    event = st.dataframe(
+        df,
+        key=key,
+        hide_index=True,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="multi-row" if multi_select else "single-row",
+        column_config={
+            "ID": st.column_config.NumberColumn(format="#%d", width="small"),
+            "Subject": st.column_config.TextColumn(width="large"),
+            "Updated": st.column_config.DatetimeColumn(format="YYYY-MM-DD HH:mm"),
+        },
+    )
+    return [int(df["ID"].iat[i]) for i in event.selection.rows]
+
+
+# ---------- Card layout (one widget row per ticket) ----------
+
+def render_cards(rows) -> list[int]:
+    """Show ``rows`` one card per ticket; return the IDs whose box is ticked."""
+    for row in rows:
+        tid = row["ticket_id"]
+        ticket_type = row["ticket_type"]
+        subject = row["subject"]
+        status = row["status"]
+        created_by = row["created_by"]
+        created_at = row["created_at"]
+        assigned_to = row["assigned_to"]
+        snippet = row["snippet"]
+
+        with st.container():
+            c0, c1, c2, c3, c4, c5 = st.columns([0.4, 4, 2, 2, 2, 1])
+
+            with c0:
+                st.checkbox("Select", key=f"select_{tid}", label_visibility="collapsed")
+            with c1:
+                st.markdown(
+                    f"**[{ticket_type}] #{tid} — {subject}**  \n"
+                    f"<small>by {created_by or '—'}</small>",
+                    unsafe_allow_html=True,
+                )
+                if snippet:
+                    st.caption(snippet)
+            with c2:
+                st.markdown(f"**Status:** `{status}`")
+            with c3:
+                st.markdown(f"**Assigned:** {assigned_to or '—'}")
+            with c4:
+                st.markdown(f"**Created:** {created_at}")
+            with c5:
+                if st.button("View", key=f"view_{tid}"):
+                    open_ticket(tid)
+
+            st.markdown("---")
+
+    return [r["ticket_id"] for r in rows if st.session_state.get(f"select_{r['ticket_id']}")]
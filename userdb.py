@@ -1,6 +1,5 @@
-from db import init_db, create_user, init_user_db
+from db import init_db, create_user
 init_db()
-init_user_db()
 create_user("alice", "S3curePass!", "admin")
 create_user("bob", "hunter2", "user")
 create_user("admin", "ChangeMe123!", "admin")
@@ -0,0 +1,171 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from connection import connect, holds_connection
+
+# =========================================================
+# CONFIGURATION
+# =========================================================
+# Writes from every session go through one thread per database, which owns
+# the write connection. Operations that arrive together are committed in one
+# transaction (group commit), each inside its own savepoint so one failing
+# operation does not undo the others.
+ENABLED = os.environ.get("TICKETAPP_WRITE_QUEUE", "1") == "1"
+# Operations that may wait for the writer; past that, submit() blocks for up
+# to SUBMIT_TIMEOUT seconds and then raises WriterBusyError.
+QUEUE_SIZE = int(os.environ.get("TICKETAPP_WRITE_QUEUE_SIZE", "256"))
+SUBMIT_TIMEOUT = float(os.environ.get("TICKETAPP_WRITE_SUBMIT_TIMEOUT", "5"))
+# How long a batch stays open for more operations after the first (only
+# while writes are arriving together, so a lone write is not delayed), and
+# the most operations one transaction may hold
+GROUP_COMMIT_MS = float(os.environ.get("TICKETAPP_GROUP_COMMIT_MS", "2"))
+MAX_BATCH = int(os.environ.get("TICKETAPP_WRITE_MAX_BATCH", "64"))
+
+_STOP = object()
+
+
+class WriterBusyError(RuntimeError):
+    """The write queue stayed full for SUBMIT_TIMEOUT; try again shortly."""
+
+
+# =========================================================
+# WRITER THREAD
+# =========================================================
+class _Op:
+    __slots__ = ("fn", "args", "kwargs", "future")
+
+    def __init__(self, fn, args, kwargs):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+
+
+class Writer:
+    """
+    The writer thread for one database file. ``submit`` queues a write
+    function and returns a future; the thread runs queued functions in
+    batches, each batch one BEGIN IMMEDIATE ... COMMIT. The functions use
+    connection.connect as usual and get the batch's connection, since nested
+    use on a thread shares it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.batches = 0
+        self.operations = 0
+        self._last_batch = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._run, name=f"writer:{path}", daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        op = _Op(fn, args, kwargs)
+        try:
+            self._queue.put(op, timeout=SUBMIT_TIMEOUT)
+        except queue.Full:
+            raise WriterBusyError("Too many changes are being saved, please retry.") from None
+        return op.future
+
+    def close(self):
+        """Finish the queued operations and stop the thread."""
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _next_batch(self) -> tuple[list, bool]:
+        batch = [self._queue.get()]
+        # Hold the batch open only while writes are arriving together, and
+        # only until it is as large as the last one: by then every session
+        # that was writing has usually had its turn.
+        window = GROUP_COMMIT_MS / 1000 if self._last_batch > 1 or not self._queue.empty() else 0
+        deadline = time.perf_counter() + window
+        while batch[-1] is not _STOP and len(batch) < MAX_BATCH:
+            wait = deadline - time.perf_counter() if len(batch) < self._last_batch else 0
+            try:
+                batch.append(self._queue.get(timeout=max(wait, 0)))
+            except queue.Empty:
+                break
+        stop = batch[-1] is _STOP
+        batch = batch[:-1] if stop else batch
+        self._last_batch = len(batch)
+        return batch, stop
+
+    def _run(self):
+        while True:
+            batch, stop = self._next_batch()
+            batch = [op for op in batch if op.future.set_running_or_notify_cancel()]
+            if batch:
+                self._commit(batch)
+            if stop:
+                return
+
+    def _commit(self, batch: list):
+        outcomes = []
+        try:
+            with connect(self.path) as con:
+                con.execute("BEGIN IMMEDIATE")
+                for op in batch:
+                    con.execute("SAVEPOINT op")
+                    try:
+                        result = op.fn(*op.args, **op.kwargs)
+                    except Exception as e:
+                        con.execute("ROLLBACK TO op")
+                        con.execute("RELEASE op")
+                        outcomes.append((op, e, False))
+                    else:
+                        con.execute("RELEASE op")
+                        outcomes.append((op, result, True))
+        except Exception as e:
+            # the transaction itself failed: nothing in it was saved
+            for op in batch:
+                op.future.set_exception(e)
+            return
+        self.batches += 1
+        self.operations += len(batch)
+        for op, value, ok in outcomes:
+            if ok:
+                op.future.set_result(value)
+            else:
+                op.future.set_exception(value)
+
+
+_writers: dict[str, Writer] = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(path: str) -> Writer:
+    """Return the writer thread for a database file, starting it on first use."""
+    writer = _writers.get(path)
+    if writer is None:
+        with _writers_lock:
+            writer = _writers.get(path)
+            if writer is None:
+                writer = _writers[path] = Writer(path)
+    return writer
+
+
+def run_write(path: str, fn, *args, **kwargs):
+    """
+    Run the write function ``fn`` on the writer thread for ``path`` and
+    return its result (or raise its exception) once its batch is committed.
+
+    Runs ``fn`` directly when the queue is off, and when this thread is
+    already inside a connection to ``path`` (the writer thread running a
+    batch, or a caller's own transaction, which must then include the write
+    and may hold the lock the writer would wait for).
+    """
+    if not ENABLED or holds_connection(path):
+        return fn(*args, **kwargs)
+    return get_writer(path).submit(fn, *args, **kwargs).result()
+
+
+def close_writers():
+    """Stop every writer thread after its queued operations (tests, shutdown)."""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()